@@ -5,6 +5,7 @@ from __future__ import annotations
 # pyright: reportMissingImports=false
 
 import logging
+import math
 from datetime import timedelta
 
 from homeassistant.config_entries import (
@@ -16,17 +17,59 @@ from homeassistant.const import (  # pyright: ignore[reportMissingImports]
     CONF_SCAN_INTERVAL,
     Platform,
 )
-from homeassistant.core import HomeAssistant  # pyright: ignore[reportMissingImports]
+from homeassistant.core import (  # pyright: ignore[reportMissingImports]
+    HomeAssistant,
+    callback,
+)
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_HUMIDITY_MAX_SILENCE,
+    CONF_HUMIDITY_MIN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MODBUS_PROXY,
+    CONF_MQTT_BRIDGE,
+    CONF_MQTT_PREFIX,
+    CONF_PROXY_HOST,
+    CONF_PROXY_MAX_AGE,
+    CONF_PROXY_PORT,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_TEMPERATURE_MAX_SILENCE,
+    CONF_TEMPERATURE_MIN_INTERVAL,
     CONF_UNIT_ID,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_HUMIDITY_DEADBAND,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MODBUS_PROXY,
+    DEFAULT_MQTT_BRIDGE,
+    DEFAULT_MQTT_PREFIX,
     DEFAULT_PORT,
+    DEFAULT_PROXY_HOST,
+    DEFAULT_PROXY_MAX_AGE,
+    DEFAULT_PROXY_PORT,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_TEMPERATURE_DEADBAND,
     DEFAULT_UNIT_ID,
     DOMAIN,
+    HISTORY_WINDOW,
+    MIN_SCAN_INTERVAL,
 )
+from .calibration import TRANSPORT_OPTIONS, transport_profile
 from .coordinator import MadelonVentilationCoordinator  # pyright: ignore[reportMissingImports]
-from .fresh_air_controller import FreshAirSystem
+from .deadband import Deadband
+from .fresh_air_controller import FreshAirSystem, ModbusGateway
+from .history import HISTORY_REGISTERS, SnapshotHistory
+from .modbus_proxy import ModbusProxy
+from .planner import PollTier
+from .snapshot_store import SnapshotStore
+from .transport_cache import TransportCache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,41 +81,233 @@ PLATFORMS: list[Platform] = [
 ]
 
 
+# Options of each measurement sensor's deadband with their defaults, in the
+# order of the Deadband arguments.
+DEADBAND_OPTIONS = {
+    "temperature": (
+        (CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND),
+        (CONF_TEMPERATURE_MIN_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL),
+        (CONF_TEMPERATURE_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+    ),
+    "humidity": (
+        (CONF_HUMIDITY_DEADBAND, DEFAULT_HUMIDITY_DEADBAND),
+        (CONF_HUMIDITY_MIN_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL),
+        (CONF_HUMIDITY_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+    ),
+}
+POLL_OPTIONS = frozenset(
+    {
+        CONF_SCAN_INTERVAL,
+        CONF_FAST_SCAN_INTERVAL,
+        CONF_SLOW_SCAN_INTERVAL,
+        CONF_ADAPTIVE_POLLING,
+        CONF_MAX_SCAN_INTERVAL,
+    }
+)
+PROXY_OPTIONS = frozenset({CONF_MODBUS_PROXY, CONF_PROXY_HOST, CONF_PROXY_PORT})
+BRIDGE_OPTIONS = frozenset({CONF_MQTT_BRIDGE, CONF_MQTT_PREFIX})
+
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up the Fresh Air System from a config entry."""
-    system = FreshAirSystem(
-        host=config_entry.data[CONF_HOST],
-        port=config_entry.data.get(CONF_PORT, DEFAULT_PORT),
-        unit_id=config_entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
-    )
-    system.enable_coordinator_mode()
+    host = config_entry.data[CONF_HOST]
+    port = config_entry.data.get(CONF_PORT, DEFAULT_PORT)
+    unit_id = config_entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+    # A config flow that just validated this unit hands over its connection.
+    validated = TransportCache.async_get(hass).async_claim(host, port, unit_id)
+    if validated is not None:
+        system, read_at = validated
+    else:
+        system = FreshAirSystem(host=host, port=port, unit_id=unit_id)
+    options = config_entry.options
+    if (profile := transport_profile(options)) is not None:
+        # Units sharing a gateway share its profile; the last one set wins.
+        system.modbus.gateway.apply_profile(profile)
     coordinator = MadelonVentilationCoordinator(
         hass,
         config_entry,
         system,
-        timedelta(
-            seconds=config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-        ),
+        *_poll_settings(options),
+        SnapshotStore(hass, config_entry.entry_id),
+        SnapshotHistory(HISTORY_REGISTERS, _history_capacity(options), HISTORY_WINDOW),
     )
 
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][config_entry.entry_id] = {
+    entry_data = hass.data[DOMAIN][config_entry.entry_id] = {
         "system": system,
         "coordinator": coordinator,
+        # Options in effect, to tell what an update changed.
+        "options": dict(options),
+        # Shared with the measurement sensors, so option changes reach them.
+        "deadbands": {
+            register: Deadband(*_deadband_settings(options, register))
+            for register in DEADBAND_OPTIONS
+        },
+        "proxy": None,
+        "bridge": None,
     }
-    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
+    config_entry.async_on_unload(config_entry.add_update_listener(async_update_options))
     _LOGGER.info("Setting up Madelon Ventilation entry")
 
     # Do not use async_config_entry_first_refresh: an offline device must not
     # delay platform setup. CoordinatorEntity will expose the failed refresh.
-    await coordinator.async_refresh()
+    if validated is not None:
+        coordinator.async_set_validated_data(read_at)
+    elif await coordinator.async_restore():
+        # Entities render the persisted snapshot, marked stale, right away.
+        config_entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} initial refresh"
+        )
+    else:
+        await coordinator.async_refresh()
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+
+    await _async_start_proxy(entry_data, options)
+    _async_start_bridge(hass, config_entry, entry_data)
     return True
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload an entry after its options change."""
-    await hass.config_entries.async_reload(entry.entry_id)
+def _poll_settings(options) -> tuple:
+    """Return the coordinator's update interval, tier intervals and ceiling."""
+    return (
+        timedelta(seconds=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
+        {
+            PollTier.FAST: timedelta(
+                seconds=options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL)
+            ),
+            PollTier.SLOW: timedelta(
+                seconds=options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)
+            ),
+        },
+        timedelta(
+            seconds=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+        )
+        if options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+        else None,
+    )
+
+
+def _history_capacity(options) -> int:
+    """Return the history size for one reading per fast poll.
+
+    Confirmation reads after writes come faster and briefly shorten the
+    window instead of growing memory.
+    """
+    fast_interval = options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL)
+    return math.ceil(HISTORY_WINDOW / max(fast_interval, MIN_SCAN_INTERVAL)) + 1
+
+
+def _deadband_settings(options, register) -> tuple:
+    return tuple(
+        options.get(option, default) for option, default in DEADBAND_OPTIONS[register]
+    )
+
+
+async def _async_start_proxy(entry_data, options) -> None:
+    if not options.get(CONF_MODBUS_PROXY, DEFAULT_MODBUS_PROXY):
+        return
+    proxy = ModbusProxy(
+        entry_data["coordinator"],
+        options.get(CONF_PROXY_PORT, DEFAULT_PROXY_PORT),
+        options.get(CONF_PROXY_MAX_AGE, DEFAULT_PROXY_MAX_AGE),
+        options.get(CONF_PROXY_HOST, DEFAULT_PROXY_HOST),
+    )
+    try:
+        await proxy.async_start()
+    except OSError as error:
+        # The entities work without it; a busy port only disables the proxy.
+        _LOGGER.error("Cannot start the Modbus TCP proxy: %s", error)
+    else:
+        entry_data["proxy"] = proxy
+
+
+async def _async_stop_proxy(entry_data) -> None:
+    if (proxy := entry_data["proxy"]) is not None:
+        entry_data["proxy"] = None
+        await proxy.async_stop()
+
+
+@callback
+def _async_start_bridge(hass, config_entry, entry_data) -> None:
+    options = config_entry.options
+    if not options.get(CONF_MQTT_BRIDGE, DEFAULT_MQTT_BRIDGE):
+        return
+    # Imported here: the MQTT integration is only needed with the bridge.
+    from .mqtt_bridge import MqttBridge
+
+    bridge = MqttBridge(
+        hass,
+        config_entry,
+        entry_data["coordinator"],
+        options.get(CONF_MQTT_PREFIX, DEFAULT_MQTT_PREFIX),
+    )
+    # Waiting for the broker must not hold up setup.
+    task = config_entry.async_create_background_task(
+        hass, bridge.async_start(), f"{DOMAIN} MQTT bridge"
+    )
+    entry_data["bridge"] = (bridge, task)
+
+
+@callback
+def _async_stop_bridge(entry_data) -> None:
+    if entry_data["bridge"] is not None:
+        bridge, task = entry_data["bridge"]
+        entry_data["bridge"] = None
+        task.cancel()
+        bridge.async_stop()
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the running entry.
+
+    Only another host, port or unit ID reloads the entry. Options are
+    applied in place, so the connection stays open and entities stay
+    available. No option adds or removes entities: the MQTT bridge and the
+    Modbus proxy have none, and the trend sensors are enabled in the entity
+    registry.
+    """
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    modbus = entry_data["system"].modbus
+    if (modbus.host, modbus.port, modbus.unit_id) != (
+        entry.data[CONF_HOST],
+        entry.data.get(CONF_PORT, DEFAULT_PORT),
+        entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+    ):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    options = entry.options
+    previous, entry_data["options"] = entry_data["options"], dict(options)
+    changed = {
+        key
+        for key in previous.keys() | options.keys()
+        if previous.get(key) != options.get(key)
+    }
+    coordinator = entry_data["coordinator"]
+    if changed & TRANSPORT_OPTIONS:
+        # Removing the calibrated profile restores the defaults.
+        modbus.gateway.apply_profile(
+            transport_profile(options) or ModbusGateway.default_profile()
+        )
+    if changed & POLL_OPTIONS:
+        coordinator.async_set_poll_intervals(*_poll_settings(options))
+        coordinator.history.resize(_history_capacity(options))
+    for register, deadband in entry_data["deadbands"].items():
+        (
+            deadband.delta,
+            deadband.min_interval,
+            deadband.max_silence,
+        ) = _deadband_settings(options, register)
+    if changed & PROXY_OPTIONS:
+        await _async_stop_proxy(entry_data)
+        await _async_start_proxy(entry_data, options)
+    elif entry_data["proxy"] is not None:
+        entry_data["proxy"].max_age = options.get(
+            CONF_PROXY_MAX_AGE, DEFAULT_PROXY_MAX_AGE
+        )
+    if changed & BRIDGE_OPTIONS:
+        _async_stop_bridge(entry_data)
+        _async_start_bridge(hass, entry, entry_data)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -80,7 +315,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         entry_data = hass.data[DOMAIN][entry.entry_id]
-        await hass.async_add_executor_job(entry_data["system"].modbus.close)
+        _async_stop_bridge(entry_data)
+        await _async_stop_proxy(entry_data)
+        await entry_data["system"].modbus.close()
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the persisted snapshot of a removed entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
@@ -13,6 +13,9 @@ from homeassistant.config_entries import (
     ConfigEntry,  # pyright: ignore[reportMissingImports]
 )
 from homeassistant.core import HomeAssistant  # pyright: ignore[reportMissingImports]
+from homeassistant.exceptions import (  # pyright: ignore[reportMissingImports]
+    HomeAssistantError,
+)
 from homeassistant.helpers.device_registry import (  # pyright: ignore[reportMissingImports]
     DeviceInfo,
 )
@@ -25,7 +28,7 @@ from homeassistant.helpers.update_coordinator import (  # pyright: ignore[report
 
 from .const import DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_SW_VERSION, DOMAIN
 from .coordinator import MadelonVentilationCoordinator  # pyright: ignore[reportMissingImports]
-from .fresh_air_controller import FreshAirSystem
+from .fresh_air_controller import CircuitOpenError, FreshAirSystem
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,9 +68,10 @@ class FilterResetButton(CoordinatorEntity[MadelonVentilationCoordinator], Button
 
     async def async_press(self) -> None:
         """Handle the button press."""
-        result = await self.hass.async_add_executor_job(
-            self._system.reset_filter_usage_time
-        )
+        try:
+            result = await self._system.reset_filter_usage_time()
+        except CircuitOpenError as error:
+            raise HomeAssistantError(str(error)) from error
         if result:
             _LOGGER.info("Filter usage time reset successfully")
             await self.coordinator.async_request_refresh()
@@ -0,0 +1,145 @@
+"""Benchmark a gateway to find the fastest transport profile it handles."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from .const import (
+    CONF_REQUEST_SPACING,
+    CONF_REQUEST_TIMEOUT,
+    CONF_RETRY_COUNT,
+    CONF_RETRY_DELAY,
+)
+from .fresh_air_controller import (
+    FreshAirSystem,
+    RegisterSnapshot,
+    TransportProfile,
+    _is_error_response,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Request spacings tried from the safest down; the sweep stops at the first
+# one with errors, since tighter spacing only gets worse.
+SPACINGS = (0.2, 0.1, 0.05, 0.02, 0.0)
+# Timeouts to choose from; the smallest one that leaves TIMEOUT_MARGIN
+# times the slowest response observed wins.
+TIMEOUTS = (0.25, 0.5, 1.0, 2.0, 3.0)
+TIMEOUT_MARGIN = 3.0
+SAMPLES = 10
+
+# Entry options holding the profile; changing only these needs no reload.
+TRANSPORT_OPTIONS = frozenset(
+    {CONF_REQUEST_SPACING, CONF_REQUEST_TIMEOUT, CONF_RETRY_COUNT, CONF_RETRY_DELAY}
+)
+
+
+class CalibrationError(Exception):
+    """The gateway answered unreliably even at the widest spacing."""
+
+
+@dataclass(frozen=True)
+class SpacingResult:
+    """Round trip times and failures of the reads at one spacing."""
+
+    spacing: float
+    rtts: tuple[float, ...]
+    errors: int
+
+    @property
+    def error_rate(self) -> float:
+        """Return the share of reads that failed."""
+        return self.errors / (len(self.rtts) + self.errors)
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """The proposed profile and the measurements behind it."""
+
+    profile: TransportProfile
+    results: tuple[SpacingResult, ...]
+
+
+def transport_profile(options: Mapping) -> TransportProfile | None:
+    """Return the profile stored in entry options, None before calibration."""
+    if CONF_REQUEST_SPACING not in options:
+        return None
+    return TransportProfile(
+        options[CONF_REQUEST_SPACING],
+        options[CONF_REQUEST_TIMEOUT],
+        options[CONF_RETRY_COUNT],
+        options[CONF_RETRY_DELAY],
+    )
+
+
+async def async_calibrate(
+    system: FreshAirSystem, samples: int = SAMPLES, spacings=SPACINGS
+) -> Calibration:
+    """Read the register block samples times per spacing and propose a profile.
+
+    The proposal takes the smallest spacing without a single failed read and
+    a timeout from TIMEOUTS that covers every response seen at the reliable
+    spacings with margin. Retries keep the gateway's current settings; they
+    only matter when connecting, which the sweep does not exercise.
+    """
+    gateway = system.modbus.gateway
+    results = []
+    for spacing in spacings:
+        result = await _measure(system, spacing, samples)
+        _LOGGER.debug(
+            "Spacing %.2f s: %s errors, slowest response %.3f s",
+            spacing,
+            result.errors,
+            max(result.rtts, default=0.0),
+        )
+        results.append(result)
+        if result.errors:
+            break
+    reliable = [result for result in results if not result.errors]
+    if not reliable:
+        raise CalibrationError(
+            f"{result.errors} of {samples} reads failed at {spacings[0]} s spacing"
+        )
+    slowest = max(rtt for result in reliable for rtt in result.rtts)
+    timeout = next(
+        (timeout for timeout in TIMEOUTS if timeout >= slowest * TIMEOUT_MARGIN),
+        TIMEOUTS[-1],
+    )
+    current = gateway.profile
+    profile = TransportProfile(
+        reliable[-1].spacing, timeout, current.retry_count, current.retry_delay
+    )
+    return Calibration(profile, tuple(results))
+
+
+async def _measure(system: FreshAirSystem, spacing: float, samples: int):
+    unit_id = system.modbus.unit_id
+    started = 0.0
+
+    async def read(client):
+        nonlocal started
+        started = time.monotonic()
+        return await client.read_holding_registers(
+            RegisterSnapshot.START, count=RegisterSnapshot.SIZE, device_id=unit_id
+        )
+
+    rtts = []
+    errors = 0
+    for _ in range(samples):
+        try:
+            response = await system.modbus.gateway.probe(read, spacing, unit_id)
+        except Exception as error:  # pylint: disable=broad-except
+            _LOGGER.debug("Calibration read failed: %s", error)
+            errors += 1
+            continue
+        if (
+            _is_error_response(response)
+            or len(response.registers) != RegisterSnapshot.SIZE
+        ):
+            errors += 1
+            continue
+        rtts.append(time.monotonic() - started)
+    return SpacingResult(spacing, tuple(rtts), errors)
@@ -0,0 +1,118 @@
+"""Circuit breaker that stops hammering an unreachable Modbus device."""
+
+import logging
+import random
+import time
+from enum import Enum
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of contacting a device whose circuit is open."""
+
+    def __init__(self, name, retry_after):
+        self.retry_after = retry_after
+        super().__init__(
+            f"{name} is unreachable; next connection attempt in {retry_after:.0f}s"
+        )
+
+
+class CircuitBreaker:
+    """Closed, open and half-open states with jittered exponential backoff.
+
+    After FAILURE_THRESHOLD consecutive transport failures the circuit opens
+    and every call fails immediately. Once the backoff expires a single probe
+    is let through (half-open): success closes the circuit, failure reopens it
+    with twice the previous backoff, capped at MAX_BACKOFF.
+    """
+
+    FAILURE_THRESHOLD = 3
+    BASE_BACKOFF = 5.0
+    MAX_BACKOFF = 300.0
+    JITTER = 0.2
+
+    def __init__(self, name, clock=time.monotonic, jitter_source=random.random):
+        self.name = name
+        self.logger = _LOGGER
+        self.failure_threshold = self.FAILURE_THRESHOLD
+        self.base_backoff = self.BASE_BACKOFF
+        self.max_backoff = self.MAX_BACKOFF
+        self.jitter = self.JITTER
+        self._clock = clock
+        self._jitter_source = jitter_source
+        self._failures = 0
+        self._trips = 0
+        self._opened_until = None
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the current state, moving open to half-open once due."""
+        if self._opened_until is None:
+            return CircuitState.CLOSED
+        if self._clock() < self._opened_until:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds left until the next probe is allowed."""
+        if self._opened_until is None:
+            return 0.0
+        return max(0.0, self._opened_until - self._clock())
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError unless a request may contact the device.
+
+        Returns True when the caller is the single half-open probe.
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return False
+        if state is CircuitState.HALF_OPEN and not self._probing:
+            self._probing = True
+            self.logger.debug("%s: probing after backoff", self.name)
+            return True
+        raise CircuitOpenError(self.name, self.retry_after)
+
+    def record_success(self):
+        """Close the circuit after the device answered."""
+        if self._opened_until is not None:
+            self.logger.info("%s is reachable again", self.name)
+        self._failures = 0
+        self._trips = 0
+        self._opened_until = None
+        self._probing = False
+
+    def record_failure(self):
+        """Count a transport failure and open the circuit when due."""
+        self._failures += 1
+        if not self._probing and (
+            self._opened_until is not None or self._failures < self.failure_threshold
+        ):
+            return
+
+        backoff = min(self.max_backoff, self.base_backoff * 2**self._trips)
+        backoff *= 1 + self.jitter * (2 * self._jitter_source() - 1)
+        if self._trips == 0:
+            self.logger.warning(
+                "%s is unreachable; pausing requests for %.0fs", self.name, backoff
+            )
+        else:
+            self.logger.debug(
+                "%s still unreachable; backing off %.0fs", self.name, backoff
+            )
+        self._trips += 1
+        self._opened_until = self._clock() + backoff
+        self._probing = False
+
+    def release_probe(self):
+        """Allow another probe when the current one ended without an outcome."""
+        self._probing = False
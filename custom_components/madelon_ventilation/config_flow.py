@@ -3,16 +3,20 @@
 from __future__ import annotations
 
 # pyright: reportCallIssue=false, reportGeneralTypeIssues=false, reportMissingImports=false
+import asyncio
 import logging
+import time
 from typing import Any
 
 import voluptuous as vol
 from homeassistant.config_entries import (
     ConfigEntry,
     ConfigFlow,
+    SOURCE_INTEGRATION_DISCOVERY,
     ConfigFlowResult,
     OptionsFlow,
 )
+from homeassistant.components import network
 from homeassistant.const import (
     CONF_HOST,
     CONF_PORT,
@@ -20,19 +24,76 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_HUMIDITY_MAX_SILENCE,
+    CONF_HUMIDITY_MIN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MODBUS_PROXY,
+    CONF_MQTT_BRIDGE,
+    CONF_MQTT_PREFIX,
+    CONF_PROXY_HOST,
+    CONF_PROXY_MAX_AGE,
+    CONF_PROXY_PORT,
+    CONF_REQUEST_SPACING,
+    CONF_REQUEST_TIMEOUT,
+    CONF_RETRY_COUNT,
+    CONF_RETRY_DELAY,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_TEMPERATURE_MAX_SILENCE,
+    CONF_TEMPERATURE_MIN_INTERVAL,
     CONF_UNIT_ID,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_HUMIDITY_DEADBAND,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_MODBUS_PROXY,
+    DEFAULT_MQTT_BRIDGE,
+    DEFAULT_MQTT_PREFIX,
     DEFAULT_PORT,
+    DEFAULT_PROXY_HOST,
+    DEFAULT_PROXY_MAX_AGE,
+    DEFAULT_PROXY_PORT,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_TEMPERATURE_DEADBAND,
     DEFAULT_UNIT_ID,
     DOMAIN,
     MIN_SCAN_INTERVAL,
 )
-from .fresh_air_controller import FreshAirSystem
+from .calibration import CalibrationError, async_calibrate, transport_profile
+from .discovery import (
+    GatewayInUseError,
+    async_discover_gateways,
+    async_probe_units,
+    scan_networks,
+)
+from .fresh_air_controller import FreshAirSystem, ModbusGateway
+from .transport_cache import TransportCache
 
 _LOGGER = logging.getLogger(__name__)
 
+# Deadband options of the measurement sensors with their defaults.
+_NON_NEGATIVE = vol.All(vol.Coerce(float), vol.Range(min=0))
+DEADBAND_OPTIONS = (
+    (CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND),
+    (CONF_TEMPERATURE_MIN_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL),
+    (CONF_TEMPERATURE_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+    (CONF_HUMIDITY_DEADBAND, DEFAULT_HUMIDITY_DEADBAND),
+    (CONF_HUMIDITY_MIN_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL),
+    (CONF_HUMIDITY_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+)
+
+# Not an option: asks the options flow to calibrate the transport next.
+CONF_CALIBRATE = "calibrate"
+
 # TODO adjust the data schema to the data that you need
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -52,12 +113,29 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     )
 
     # Attempt to read registers to validate connection
-    success = await hass.async_add_executor_job(system.refresh_registers, True)
+    try:
+        success = await system.refresh_registers(True)
+    except BaseException:
+        await system.modbus.close()
+        raise
 
     if not success:
+        await system.modbus.close()
         raise CannotConnect
+    # The entry created next starts with this connection and its registers.
+    TransportCache.async_get(hass).async_park(system, time.monotonic())
+
+    return {"title": entry_title(data)}
+
 
-    return {"title": f"Fresh Air System - {data[CONF_HOST]}"}
+def entry_title(data: dict[str, Any]) -> str:
+    """Return the title of the entry for a unit, which is also its unique ID."""
+    title = f"Fresh Air System - {data[CONF_HOST]}"
+    # Further units on one gateway need their own unique ID.
+    unit_id = data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+    if unit_id != DEFAULT_UNIT_ID:
+        title += f" (unit {unit_id})"
+    return title
 
 
 # pi-lens-ignore: Pyright:reportCallIssue
@@ -67,6 +145,12 @@ class MadelonVentilationConfigFlow(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
     _input_data: dict[str, Any]
+    _discovery_task: asyncio.Task | None = None
+    _discovery_shown = False
+    _discovered_hosts: list[str]
+    _probe_task: asyncio.Task | None = None
+    _gateway: dict[str, Any]
+    _found_units: list[int]
 
     @staticmethod
     @callback
@@ -77,7 +161,189 @@ class MadelonVentilationConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
-        """Handle the initial step."""
+        """Offer to scan the local network or to enter the gateway by hand."""
+        return self.async_show_menu(
+            step_id="user", menu_options=["discovery", "probe", "manual"]
+        )
+
+    async def async_step_manual(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle a gateway entered by hand."""
+        return await self._async_step_connect(
+            "manual", STEP_USER_DATA_SCHEMA, user_input
+        )
+
+    async def async_step_discovery(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Scan the local networks for gateways while showing progress."""
+        if self._discovery_task is None:
+            adapters = await network.async_get_adapters(self.hass)
+            networks = scan_networks(
+                (ip_info["address"], ip_info["network_prefix"])
+                for adapter in adapters
+                if adapter["enabled"]
+                for ip_info in adapter["ipv4"]
+            )
+            # Configured gateways are left alone rather than scanned.
+            configured = {
+                entry.data.get(CONF_HOST) for entry in self._async_current_entries()
+            }
+            self._discovery_task = self.hass.async_create_task(
+                async_discover_gateways(networks, known=configured)
+            )
+        if not self._discovery_shown or not self._discovery_task.done():
+            # Show progress at least once: a scan that finished eagerly must
+            # not hand the menu selection on to the next step.
+            self._discovery_shown = True
+            return self.async_show_progress(
+                step_id="discovery",
+                progress_action="discovery",
+                progress_task=self._discovery_task,
+            )
+        try:
+            self._discovered_hosts = self._discovery_task.result().found
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Gateway discovery failed")
+            self._discovered_hosts = []
+        if not self._discovered_hosts:
+            return self.async_show_progress_done(next_step_id="manual")
+        return self.async_show_progress_done(next_step_id="pick")
+
+    async def async_step_pick(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Choose one of the discovered gateways."""
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_HOST): vol.In(self._discovered_hosts),
+                vol.Optional(CONF_PORT, default=DEFAULT_PORT): int,
+                vol.Optional(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): int,
+            }
+        )
+        return await self._async_step_connect("pick", schema, user_input)
+
+    async def async_step_probe(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Sweep the unit IDs behind one gateway while showing progress."""
+        if self._probe_task is None:
+            errors: dict[str, str] = {}
+            if user_input is not None and ModbusGateway.is_in_use(
+                user_input[CONF_HOST], user_input[CONF_PORT]
+            ):
+                # The sweep would collide with the entry's traffic.
+                errors["base"] = "gateway_in_use"
+            if user_input is None or errors:
+                return self.async_show_form(
+                    step_id="probe",
+                    data_schema=vol.Schema(
+                        {
+                            vol.Required(CONF_HOST): str,
+                            vol.Optional(CONF_PORT, default=DEFAULT_PORT): int,
+                        }
+                    ),
+                    errors=errors,
+                )
+            self._gateway = user_input
+            self._probe_task = self.hass.async_create_task(
+                async_probe_units(user_input[CONF_HOST], user_input[CONF_PORT])
+            )
+        elif self._probe_task.done():
+            return self._async_probe_done()
+        # Progress is shown at least once, as for discovery.
+        return self.async_show_progress(
+            step_id="probe",
+            progress_action="probe",
+            progress_task=self._probe_task,
+        )
+
+    @callback
+    def _async_probe_done(self) -> ConfigFlowResult:
+        try:
+            found = self._probe_task.result()
+        except (GatewayInUseError, OSError, TimeoutError) as error:
+            _LOGGER.debug("Unit probe failed: %s", error)
+            found = []
+        self._found_units = [
+            unit_id
+            for unit_id in found
+            if self.hass.config_entries.async_entry_for_domain_unique_id(
+                DOMAIN, entry_title({**self._gateway, CONF_UNIT_ID: unit_id})
+            )
+            is None
+        ]
+        return self.async_show_progress_done(next_step_id="units")
+
+    async def async_step_units(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Create one entry for every unit chosen among those found."""
+        if not self._found_units:
+            return self.async_abort(reason="no_units_found")
+        units = {str(unit_id): f"Unit {unit_id}" for unit_id in self._found_units}
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            chosen = sorted(int(unit_id) for unit_id in user_input["units"])
+            if chosen:
+                # This flow creates the first entry; every further unit gets
+                # a discovered flow the user confirms on its own.
+                for unit_id in chosen[1:]:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.flow.async_init(
+                            DOMAIN,
+                            context={"source": SOURCE_INTEGRATION_DISCOVERY},
+                            data={**self._gateway, CONF_UNIT_ID: unit_id},
+                        )
+                    )
+                data = {**self._gateway, CONF_UNIT_ID: chosen[0]}
+                title = entry_title(data)
+                await self.async_set_unique_id(title)
+                self._abort_if_unique_id_configured()
+                return self.async_create_entry(title=title, data=data)
+            errors["base"] = "no_units_selected"
+        return self.async_show_form(
+            step_id="units",
+            data_schema=vol.Schema(
+                {vol.Required("units", default=list(units)): cv.multi_select(units)}
+            ),
+            errors=errors,
+        )
+
+    async def async_step_integration_discovery(
+        self, discovery_info: dict[str, Any]
+    ) -> ConfigFlowResult:
+        """Handle a further unit found by a probe."""
+        await self.async_set_unique_id(entry_title(discovery_info))
+        self._abort_if_unique_id_configured()
+        self._input_data = discovery_info
+        self.context["title_placeholders"] = {
+            "host": discovery_info[CONF_HOST],
+            "unit_id": str(discovery_info[CONF_UNIT_ID]),
+        }
+        return await self.async_step_confirm()
+
+    async def async_step_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Create the entry of a discovered unit once the user confirms it."""
+        if user_input is not None:
+            return self.async_create_entry(
+                title=entry_title(self._input_data), data=self._input_data
+            )
+        return self.async_show_form(
+            step_id="confirm",
+            description_placeholders={
+                "host": self._input_data[CONF_HOST],
+                "unit_id": str(self._input_data[CONF_UNIT_ID]),
+            },
+        )
+
+    async def _async_step_connect(
+        self, step_id: str, schema: vol.Schema, user_input: dict[str, Any] | None
+    ) -> ConfigFlowResult:
+        """Validate a gateway and create its entry, or show the form again."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
@@ -94,9 +360,7 @@ class MadelonVentilationConfigFlow(ConfigFlow, domain=DOMAIN):
                 self._abort_if_unique_id_configured()
                 return self.async_create_entry(title=info["title"], data=user_input)
 
-        return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
-        )
+        return self.async_show_form(step_id=step_id, data_schema=schema, errors=errors)
 
     async def async_step_reconfigure(
         self, user_input: dict[str, Any] | None = None
@@ -108,9 +372,11 @@ class MadelonVentilationConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
         if user_input is not None:
+            # Validate the entry's own port and unit, so the reloaded entry
+            # claims the validated connection.
+            data = {**config_entry.data, **user_input}
             try:
-                user_input[CONF_HOST] = config_entry.data[CONF_HOST]
-                await validate_input(self.hass, user_input)
+                await validate_input(self.hass, data)
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
@@ -118,7 +384,7 @@ class MadelonVentilationConfigFlow(ConfigFlow, domain=DOMAIN):
                 return self.async_update_reload_and_abort(
                     config_entry,
                     unique_id=config_entry.unique_id,
-                    data={**config_entry.data, **user_input},
+                    data=data,
                     reason="reconfigure_successful",
                 )
         return self.async_show_form(
@@ -131,6 +397,8 @@ class MadelonVentilationConfigFlow(ConfigFlow, domain=DOMAIN):
 class MadelonVentilationOptionsFlowHandler(OptionsFlow):
     """Handles the options flow."""
 
+    _calibration_task: asyncio.Task | None = None
+
     def __init__(self, config_entry: ConfigEntry) -> None:
         """Initialize options flow."""
         self.config_entry = config_entry
@@ -138,9 +406,15 @@ class MadelonVentilationOptionsFlowHandler(OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Handle options flow."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            options = self.config_entry.options | user_input
-            return self.async_create_entry(title="", data=options)
+            calibrate = user_input.pop(CONF_CALIBRATE, False)
+            self.options = self.config_entry.options | user_input
+            if not calibrate:
+                return self.async_create_entry(title="", data=self.options)
+            if self._system is not None:
+                return await self.async_step_calibrate()
+            errors["base"] = "not_loaded"
 
         # It is recommended to prepopulate options fields with default values if available.
         # These will be the same default values you use on your coordinator for setting variable values
@@ -151,10 +425,147 @@ class MadelonVentilationOptionsFlowHandler(OptionsFlow):
                     CONF_SCAN_INTERVAL,
                     default=self.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
                 ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                # Temperature, humidity and actual fan speeds.
+                vol.Required(
+                    CONF_FAST_SCAN_INTERVAL,
+                    default=self.options.get(
+                        CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL
+                    ),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                # Filter usage time and reminder settings.
+                vol.Required(
+                    CONF_SLOW_SCAN_INTERVAL,
+                    default=self.options.get(
+                        CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL
+                    ),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                # Off: every tier keeps its fixed interval.
+                vol.Required(
+                    CONF_ADAPTIVE_POLLING,
+                    default=self.options.get(
+                        CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+                    ),
+                ): bool,
+                # Ceiling for idle tiers; slower configured tiers keep theirs.
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=self.options.get(
+                        CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                    ),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                # Deadband (sensor units), minimum publish interval and
+                # maximum silence (seconds); 0 disables each limit.
+                **{
+                    vol.Required(
+                        option, default=self.options.get(option, default)
+                    ): _NON_NEGATIVE
+                    for option, default in DEADBAND_OPTIONS
+                },
+                # Publish state and accept commands on <prefix>/state/* and
+                # <prefix>/ctrl/*, the topics of the former Node-RED flow.
+                vol.Required(
+                    CONF_MQTT_BRIDGE,
+                    default=self.options.get(CONF_MQTT_BRIDGE, DEFAULT_MQTT_BRIDGE),
+                ): bool,
+                vol.Required(
+                    CONF_MQTT_PREFIX,
+                    default=self.options.get(CONF_MQTT_PREFIX, DEFAULT_MQTT_PREFIX),
+                ): vol.All(str, vol.Strip, vol.Length(min=1)),
+                # Modbus TCP server for other clients of this unit; reads are
+                # answered from the cache while it is at most max age old.
+                vol.Required(
+                    CONF_MODBUS_PROXY,
+                    default=self.options.get(CONF_MODBUS_PROXY, DEFAULT_MODBUS_PROXY),
+                ): bool,
+                # Loopback by default; 0.0.0.0 opens unauthenticated writes
+                # to the whole network.
+                vol.Required(
+                    CONF_PROXY_HOST,
+                    default=self.options.get(CONF_PROXY_HOST, DEFAULT_PROXY_HOST),
+                ): vol.All(str, vol.Strip, vol.Length(min=1)),
+                vol.Required(
+                    CONF_PROXY_PORT,
+                    default=self.options.get(CONF_PROXY_PORT, DEFAULT_PROXY_PORT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
+                vol.Required(
+                    CONF_PROXY_MAX_AGE,
+                    default=self.options.get(CONF_PROXY_MAX_AGE, DEFAULT_PROXY_MAX_AGE),
+                ): _NON_NEGATIVE,
+                # Benchmark the gateway next and propose request timing.
+                vol.Optional(CONF_CALIBRATE, default=False): bool,
             }
         )
 
-        return self.async_show_form(step_id="init", data_schema=data_schema)
+        return self.async_show_form(
+            step_id="init", data_schema=data_schema, errors=errors
+        )
+
+    @property
+    def _system(self) -> FreshAirSystem | None:
+        """Return the running system of the entry, if it is loaded."""
+        entry_data = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        return entry_data["system"] if entry_data else None
+
+    async def async_step_calibrate(self, user_input=None):
+        """Benchmark the live gateway while showing progress."""
+        if self._calibration_task is None:
+            self._calibration_task = self.hass.async_create_task(
+                async_calibrate(self._system)
+            )
+        elif self._calibration_task.done():
+            return self.async_show_progress_done(next_step_id="transport")
+        return self.async_show_progress(
+            step_id="calibrate",
+            progress_action="calibrate",
+            progress_task=self._calibration_task,
+        )
+
+    async def async_step_transport(self, user_input=None):
+        """Confirm or edit the proposed transport profile."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=self.options | user_input)
+
+        errors: dict[str, str] = {}
+        try:
+            calibration = self._calibration_task.result()
+        except (CalibrationError, OSError) as error:
+            _LOGGER.warning("Transport calibration failed: %s", error)
+            errors["base"] = "calibration_failed"
+            profile = (
+                transport_profile(self.options) or self._system.modbus.gateway.profile
+            )
+            results = ""
+        else:
+            profile = calibration.profile
+            results = "; ".join(
+                f"{result.spacing:.2f} s: {result.errors} failed, "
+                f"slowest {max(result.rtts, default=0.0):.3f} s"
+                for result in calibration.results
+            )
+        data_schema = vol.Schema(
+            {
+                # Minimum seconds between two requests to the gateway.
+                vol.Required(
+                    CONF_REQUEST_SPACING, default=profile.spacing
+                ): _NON_NEGATIVE,
+                # Seconds to wait for a connection or a response.
+                vol.Required(CONF_REQUEST_TIMEOUT, default=profile.timeout): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.05)
+                ),
+                vol.Required(CONF_RETRY_COUNT, default=profile.retry_count): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+                vol.Required(
+                    CONF_RETRY_DELAY, default=profile.retry_delay
+                ): _NON_NEGATIVE,
+            }
+        )
+        return self.async_show_form(
+            step_id="transport",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={"results": results},
+        )
 
 
 class CannotConnect(HomeAssistantError):
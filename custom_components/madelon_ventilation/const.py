@@ -3,12 +3,61 @@
 DOMAIN = "madelon_ventilation"
 
 DEFAULT_SCAN_INTERVAL = 60
+DEFAULT_FAST_SCAN_INTERVAL = 20
+DEFAULT_SLOW_SCAN_INTERVAL = 900
+DEFAULT_MAX_SCAN_INTERVAL = 600
+DEFAULT_ADAPTIVE_POLLING = True
+DEFAULT_MQTT_BRIDGE = False
+DEFAULT_MQTT_PREFIX = "madelon"
+DEFAULT_MODBUS_PROXY = False
+DEFAULT_PROXY_PORT = 5020
+# Loopback only: the proxy accepts unauthenticated register writes.
+DEFAULT_PROXY_HOST = "127.0.0.1"
+DEFAULT_PROXY_MAX_AGE = 10
 MIN_SCAN_INTERVAL = 10
+# Span of the in-memory history behind the rolling statistics sensors.
+HISTORY_WINDOW = 24 * 3600
+
+# Registers have 0.1 resolution; these bands drop single-step flicker.
+DEFAULT_TEMPERATURE_DEADBAND = 0.2
+DEFAULT_HUMIDITY_DEADBAND = 1.0
+DEFAULT_MIN_PUBLISH_INTERVAL = 0
+DEFAULT_MAX_SILENCE = 900
 
 DEFAULT_PORT = 8899
 DEFAULT_UNIT_ID = 1
 
 CONF_UNIT_ID = "unit_id"
+# Deadband options of the temperature and humidity sensors.
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_TEMPERATURE_MIN_INTERVAL = "temperature_min_interval"
+CONF_TEMPERATURE_MAX_SILENCE = "temperature_max_silence"
+CONF_HUMIDITY_DEADBAND = "humidity_deadband"
+CONF_HUMIDITY_MIN_INTERVAL = "humidity_min_interval"
+CONF_HUMIDITY_MAX_SILENCE = "humidity_max_silence"
+# CONF_SCAN_INTERVAL sets the normal polling tier.
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+# Adaptive polling stretches idle tiers up to the maximum scan interval.
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+# Bridge to the MQTT topics of the former Node-RED flow.
+CONF_MQTT_BRIDGE = "mqtt_bridge"
+CONF_MQTT_PREFIX = "mqtt_prefix"
+# Local Modbus TCP server answering other clients from the register cache.
+CONF_MODBUS_PROXY = "modbus_proxy"
+CONF_PROXY_HOST = "proxy_host"
+CONF_PROXY_PORT = "proxy_port"
+CONF_PROXY_MAX_AGE = "proxy_max_age"
+# Transport profile of the gateway; absent until calibrated.
+CONF_REQUEST_SPACING = "request_spacing"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_RETRY_COUNT = "retry_count"
+CONF_RETRY_DELAY = "retry_delay"
+
+# State attributes of entities showing the snapshot persisted by the last run.
+ATTR_STALE = "stale"
+ATTR_SNAPSHOT_TIME = "snapshot_time"
 
 # Device information
 DEVICE_MANUFACTURER = "Madelon"
@@ -4,25 +4,57 @@ from __future__ import annotations
 
 # pyright: reportMissingImports=false
 import logging
-from datetime import timedelta
+import time
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from math import inf
 
 from homeassistant.config_entries import (
     ConfigEntry,  # pyright: ignore[reportMissingImports]
 )
-from homeassistant.core import HomeAssistant  # pyright: ignore[reportMissingImports]
+from homeassistant.core import (  # pyright: ignore[reportMissingImports]
+    CALLBACK_TYPE,
+    HomeAssistant,
+    callback,
+)
 from homeassistant.helpers.update_coordinator import (  # pyright: ignore[reportMissingImports]
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util  # pyright: ignore[reportMissingImports]
 
-from .const import DOMAIN
-from .fresh_air_controller import FreshAirSystem
+from .const import ATTR_SNAPSHOT_TIME, ATTR_STALE, DOMAIN
+from .fresh_air_controller import CircuitOpenError, FreshAirSystem
+from .history import HISTORY_TIER, SnapshotHistory
+from .planner import PollTier
+from .scheduler import RequestPriority
+from .snapshot_store import SnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class MadelonVentilationCoordinator(DataUpdateCoordinator[FreshAirSystem]):
-    """Coordinate a single batch register read for all entities."""
+    """Coordinate batched register reads for all entities.
+
+    Every polling tier has its own interval. Each cycle reads the tiers that
+    are due, plus those due within MERGE_WINDOW of the fastest interval, in
+    one plan so that they share transactions. The next cycle is scheduled
+    for the earliest tier that falls due afterwards.
+
+    With a max_interval the schedule adapts: after a write or a change to a
+    control register the fast and normal tiers are read every
+    CONFIRM_INTERVAL seconds for CONFIRM_WINDOW seconds. Afterwards every
+    unchanged cycle stretches the tier intervals by BACKOFF_FACTOR, up to
+    max_interval; any change snaps them back to the configured values.
+    """
+
+    MERGE_WINDOW = 0.25
+    CONFIRM_INTERVAL = 5.0
+    CONFIRM_WINDOW = 30.0
+    BACKOFF_FACTOR = 1.5
+    # Registers that drift on their own. Their changes end the backoff but
+    # do not open a confirmation window.
+    DRIFTING_REGISTERS = frozenset({"temperature", "humidity", "filter_usage_time"})
 
     def __init__(
         self,
@@ -30,22 +62,277 @@ class MadelonVentilationCoordinator(DataUpdateCoordinator[FreshAirSystem]):
         config_entry: ConfigEntry,
         system: FreshAirSystem,
         update_interval: timedelta,
+        poll_intervals: Mapping[PollTier, timedelta] | None = None,
+        max_interval: timedelta | None = None,
+        store: SnapshotStore | None = None,
+        history: SnapshotHistory | None = None,
     ) -> None:
-        """Initialize the coordinator."""
+        """Initialize the coordinator.
+
+        update_interval applies to every tier missing from poll_intervals.
+        Without max_interval every tier polls at its fixed interval. The
+        store, if any, keeps the last good snapshot for the next start; the
+        history, if any, records every read of its tier.
+        """
+        self.poll_intervals = {
+            tier: (poll_intervals or {}).get(tier, update_interval) for tier in PollTier
+        }
         super().__init__(
             hass,
             _LOGGER,
             config_entry=config_entry,
             name=DOMAIN,
-            update_interval=update_interval,
+            update_interval=min(self.poll_intervals.values()),
         )
         self.system = system
+        self._read_priority = RequestPriority.POLL
+        self._base_update_interval = self.update_interval
+        self.max_interval = max_interval
+        # Factor applied to the tier intervals while nothing changes.
+        self._stretch = 1.0
+        # Monotonic time until which writes are being confirmed.
+        self._confirm_until = 0.0
+        # Monotonic time of the last successful read of each tier.
+        self._tier_reads: dict[PollTier, float] = {}
+        # Age in seconds beyond which the next read includes a tier.
+        self._max_age: float | None = None
+        # (last_update_success, snapshot) as of the last listener update.
+        self._dispatched = None
+        self.store = store
+        self.history = history
+        # The history needs its registers read even with every sensor of
+        # them disabled.
+        self._unsubscribe_history = (
+            system.subscribe(history.registers, passive=True)
+            if history is not None
+            else None
+        )
+        # Read time of the persisted snapshot shown until the first live read.
+        self.restored_at: datetime | None = None
+
+    @property
+    def stale_attributes(self) -> dict[str, str | bool] | None:
+        """Return state attributes marking a restored snapshot, if shown."""
+        if self.restored_at is None:
+            return None
+        return {ATTR_STALE: True, ATTR_SNAPSHOT_TIME: self.restored_at.isoformat()}
+
+    async def async_restore(self) -> bool:
+        """Publish the persisted snapshot; return whether there was one."""
+        stored = await self.store.async_load() if self.store else None
+        if stored is None:
+            return False
+        registers, read_at = stored
+        try:
+            self.system.restore_registers(registers)
+        except ValueError as error:
+            _LOGGER.debug("Ignoring persisted snapshot: %s", error)
+            return False
+        self.restored_at = read_at
+        return True
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and release the history's registers."""
+        if self._unsubscribe_history is not None:
+            self._unsubscribe_history()
+            self._unsubscribe_history = None
+        await super().async_shutdown()
+
+    @callback
+    def async_set_poll_intervals(
+        self,
+        update_interval: timedelta,
+        poll_intervals: Mapping[PollTier, timedelta] | None = None,
+        max_interval: timedelta | None = None,
+    ) -> None:
+        """Replace the polling schedule and reschedule the next poll.
+
+        Arguments match the constructor. Tier read times are kept, so a tier
+        that is now overdue is read at once.
+        """
+        self.poll_intervals = {
+            tier: (poll_intervals or {}).get(tier, update_interval) for tier in PollTier
+        }
+        self._base_update_interval = min(self.poll_intervals.values())
+        self.max_interval = max_interval
+        self._stretch = 1.0
+        if max_interval is None:
+            self._confirm_until = 0.0
+        self.update_interval = self._next_poll_delay(time.monotonic())
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_set_validated_data(self, read_at: float) -> None:
+        """Publish a read of every register taken at monotonic read_at.
+
+        The config flow read them while validating the connection, so the
+        first poll waits for the tier intervals instead of reading again.
+        """
+        now = time.monotonic()
+        for tier in PollTier:
+            self._tier_reads[tier] = read_at
+        if self.history is not None:
+            self.history.append(read_at, self.system.registers)
+        if self.store is not None:
+            self.store.async_save(
+                self.system.registers,
+                dt_util.utcnow() - timedelta(seconds=now - read_at),
+            )
+        self.update_interval = self._next_poll_delay(now)
+        self.async_set_updated_data(self.system)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the listeners whose registers changed.
+
+        Entities pass the register names they read as their coordinator
+        context. Listeners without one, and every listener when availability
+        changes, are always notified.
+        """
+        changed = self._changed_registers()
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or not changed.isdisjoint(context):
+                update_callback()
+
+    def _changed_registers(self) -> frozenset[str] | None:
+        """Diff the snapshot against the last dispatched one; None means all."""
+        current = (self.last_update_success, self.system.snapshot)
+        previous, self._dispatched = self._dispatched, current
+        if previous is None or previous[0] != current[0]:
+            return None
+        if not current[0]:
+            # Still unavailable; entities already show it.
+            return frozenset()
+        return current[1].changed_registers(previous[1])
+
+    @callback
+    def async_subscribe_registers(self, register_names) -> CALLBACK_TYPE:
+        """Include registers in future reads until the returned callback runs."""
+        return self.system.subscribe(register_names)
+
+    def snapshot_age(self, register_names) -> float | None:
+        """Return seconds since the oldest tier of register_names was read.
+
+        None means one of them has not been read since startup.
+        """
+        now = time.monotonic()
+        reads = [
+            self._tier_reads.get(FreshAirSystem.REGISTER_TIERS[name])
+            for name in register_names
+        ]
+        if None in reads:
+            return None
+        return max((now - read for read in reads), default=0.0)
+
+    async def async_refresh_older_than(self, max_age: float) -> None:
+        """Read every tier last read more than max_age seconds ago now."""
+        self._max_age = max_age
+        await self.async_refresh()
+
+    async def async_request_refresh(self) -> None:
+        """Request a confirmation read that is served before periodic polls."""
+        self._read_priority = RequestPriority.CONFIRM
+        self._open_confirm_window(time.monotonic())
+        await super().async_request_refresh()
 
     async def _async_update_data(self) -> FreshAirSystem:
-        """Read the complete register snapshot exactly once."""
-        success = await self.hass.async_add_executor_job(
-            self.system.refresh_registers, True
-        )
+        """Read the registers of every due tier in one batch."""
+        priority, self._read_priority = self._read_priority, RequestPriority.POLL
+        now = time.monotonic()
+        due = self._due_tiers(now)
+        if self._max_age is not None:
+            due |= {
+                tier
+                for tier in PollTier
+                if now - self._tier_reads.get(tier, -inf) > self._max_age
+            }
+            self._max_age = None
+        if now < self._confirm_until:
+            # Follow the fan ramp and mode changes after a write.
+            due |= {PollTier.FAST, PollTier.NORMAL}
+        if (
+            not due
+            or priority is not RequestPriority.POLL
+            or not self.last_update_success
+        ):
+            # Explicit refreshes, confirmations and recoveries read everything.
+            due = set(PollTier)
+        tiers = None if due == set(PollTier) else frozenset(due)
+        previous = self.system.snapshot
+        try:
+            success = await self.system.refresh_registers(True, priority, tiers)
+        except CircuitOpenError as error:
+            self._apply_backoff()
+            raise UpdateFailed(str(error)) from error
         if not success:
+            self._apply_backoff()
             raise UpdateFailed("Unable to read ventilation registers")
+        for tier in due:
+            self._tier_reads[tier] = now
+        if self.history is not None and HISTORY_TIER in due:
+            self.history.append(now, self.system.registers)
+        if self.max_interval is not None and self.restored_at is None:
+            self._adapt(now, previous)
+        self.restored_at = None
+        if self.store is not None:
+            self.store.async_save(self.system.registers, dt_util.utcnow())
+        self.update_interval = self._next_poll_delay(now)
         return self.system
+
+    def _adapt(self, now: float, previous) -> None:
+        """Stretch or reset the schedule after a successful read."""
+        if not previous.version:
+            # The first read has nothing to compare against.
+            return
+        changed = self.system.snapshot.changed_registers(previous)
+        if changed - self.DRIFTING_REGISTERS:
+            self._open_confirm_window(now)
+        elif changed:
+            self._stretch = 1.0
+        elif now >= self._confirm_until:
+            self._stretch *= self.BACKOFF_FACTOR
+
+    def _open_confirm_window(self, now: float) -> None:
+        if self.max_interval is not None:
+            self._confirm_until = now + self.CONFIRM_WINDOW
+            self._stretch = 1.0
+
+    def _interval(self, tier: PollTier) -> float:
+        """Return the current interval of a tier in seconds."""
+        interval = self.poll_intervals[tier].total_seconds()
+        if self._stretch == 1.0:
+            return interval
+        ceiling = max(interval, self.max_interval.total_seconds())
+        return min(interval * self._stretch, ceiling)
+
+    def _due_tiers(self, now: float) -> set[PollTier]:
+        """Return the tiers that are due now or within the merge window."""
+        window = min(map(self._interval, PollTier)) * self.MERGE_WINDOW
+        due = {
+            tier
+            for tier in PollTier
+            if tier not in self._tier_reads
+            or now - self._tier_reads[tier] >= self._interval(tier) - window
+        }
+        if due and self._stretch > 1:
+            # Stretched tiers drift out of phase; faster tiers ride along so
+            # that an idle device settles into one read per cycle.
+            slowest = max(map(self._interval, due))
+            due |= {tier for tier in PollTier if self._interval(tier) <= slowest}
+        return due
+
+    def _next_poll_delay(self, now: float) -> timedelta:
+        """Return the time until the earliest tier falls due."""
+        delay = min(
+            self._tier_reads.get(tier, now) - now + self._interval(tier)
+            for tier in PollTier
+        )
+        if now < self._confirm_until:
+            delay = min(delay, self.CONFIRM_INTERVAL)
+        return timedelta(seconds=max(0.0, delay))
+
+    def _apply_backoff(self) -> None:
+        """Poll no faster than the circuit breaker allows new attempts."""
+        retry_after = timedelta(seconds=self.system.modbus.retry_after)
+        self.update_interval = max(self._base_update_interval, retry_after)
@@ -0,0 +1,51 @@
+"""Deadband filter that keeps measurement noise out of the state machine."""
+
+import time
+
+
+class Deadband:
+    """Absolute deadband with a minimum publish interval and a heartbeat.
+
+    A value is published once it has moved at least delta away from the
+    last published value and min_interval seconds have passed since that
+    publish. Comparing against the published value rather than the previous
+    reading is the hysteresis: flicker around a level is dropped, while a
+    slow drift still crosses the band and keeps the trend. After max_silence
+    seconds the current value is published regardless. Zero disables each
+    limit.
+    """
+
+    def __init__(
+        self, delta=0.0, min_interval=0.0, max_silence=0.0, clock=time.monotonic
+    ):
+        self.delta = delta
+        self.min_interval = min_interval
+        self.max_silence = max_silence
+        self._clock = clock
+        self._value = None
+        self._published_at = None
+
+    def evaluate(self, value) -> tuple[bool, float | None]:
+        """Return whether to publish value now and when to check again.
+
+        The second item is the number of seconds after which a suppressed
+        value should be evaluated again, or None when only a new reading can
+        change the outcome.
+        """
+        if self._published_at is None or value is None or self._value is None:
+            return True, None
+        elapsed = self._clock() - self._published_at
+        if self.max_silence and elapsed >= self.max_silence:
+            return True, None
+
+        moved = round(abs(value - self._value), 6)
+        if moved and moved >= self.delta:
+            if elapsed >= self.min_interval:
+                return True, None
+            return False, self.min_interval - elapsed
+        return False, self.max_silence - elapsed if self.max_silence else None
+
+    def published(self, value) -> None:
+        """Record that value was written to the state machine."""
+        self._value = value
+        self._published_at = self._clock()
@@ -0,0 +1,262 @@
+"""Find Modbus TCP gateways on the local network."""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import struct
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from pymodbus.client import (  # pyright: ignore[reportMissingImports]
+    AsyncModbusTcpClient,
+)
+
+from .const import DEFAULT_PORT, DEFAULT_UNIT_ID
+from .fresh_air_controller import ModbusGateway, RegisterSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+# A /24 takes ceil(254 / MAX_CONCURRENCY) rounds of at most PROBE_TIMEOUT.
+MAX_CONCURRENCY = 64
+PROBE_TIMEOUT = 0.3
+# An RS485 round trip at 9600 baud plus the gateway's own latency.
+CONFIRM_TIMEOUT = 1.0
+# Larger networks are narrowed to the /24 around the local address.
+MIN_PREFIX_LENGTH = 24
+
+# Modbus unit addresses; 0 is broadcast and 248-255 are reserved.
+UNIT_IDS = range(1, 248)
+# Requests a unit sweep keeps outstanding on the gateway.
+PIPELINE_DEPTH = 4
+# One RTU read of the register block takes about 70 ms at 9600 baud.
+UNIT_TIMEOUT = 0.15
+
+# MBAP header: transaction ID, protocol ID, length, unit ID.
+_MBAP = struct.Struct(">HHHB")
+_SIZE = RegisterSnapshot.SIZE
+# Read Holding Registers of the whole register block.
+_PROBE_PDU = struct.pack(">BHH", 0x03, RegisterSnapshot.START, _SIZE)
+_PROBE_RESPONSE_HEADER = bytes((0x03, 2 * _SIZE))
+
+
+@dataclass(frozen=True)
+class Discovery:
+    """Gateways found by a scan and known ones the scan did not contact."""
+
+    found: list[str]
+    known: list[str]
+
+
+def scan_networks(addresses: Iterable[tuple[str, int]]) -> list[ipaddress.IPv4Network]:
+    """Return the networks to scan for local (address, prefix length) pairs."""
+    networks = []
+    for address, prefix_length in addresses:
+        interface = ipaddress.IPv4Interface(
+            f"{address}/{max(prefix_length, MIN_PREFIX_LENGTH)}"
+        )
+        if interface.is_loopback or interface.is_link_local:
+            continue
+        if interface.network not in networks:
+            networks.append(interface.network)
+    return networks
+
+
+async def async_discover_gateways(
+    networks: Iterable[ipaddress.IPv4Network],
+    port: int = DEFAULT_PORT,
+    unit_id: int = DEFAULT_UNIT_ID,
+    known: Iterable[str] = (),
+) -> Discovery:
+    """Find the hosts of networks that answer a Modbus read on port.
+
+    Every host is probed with a TCP connect, MAX_CONCURRENCY at a time and
+    PROBE_TIMEOUT each. Hosts that accept the connection are confirmed with
+    one holding-register read; an exception response still proves a Modbus
+    gateway, only silence or garbage rules a host out.
+
+    Hosts in known and gateways a unit holds open are never contacted: many
+    RS485 gateways accept a single client, and a second one could drop the
+    entry's connection. They are reported as known instead.
+    """
+    known = set(known)
+    hosts = []
+    skipped = []
+    for network in networks:
+        for address in network.hosts():
+            host = str(address)
+            if host in known or ModbusGateway.is_in_use(host, port):
+                skipped.append(host)
+            else:
+                hosts.append(host)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def select(check, candidates):
+        async def bounded(host):
+            async with semaphore:
+                return host if await check(host) else None
+
+        results = await asyncio.gather(*(bounded(host) for host in candidates))
+        return [host for host in results if host is not None]
+
+    listening = await select(lambda host: _is_listening(host, port), hosts)
+    confirmed = await select(
+        lambda host: _answers_modbus(host, port, unit_id), listening
+    )
+    _LOGGER.debug(
+        "Scanned %s hosts; listening: %s, confirmed: %s, known: %s",
+        len(hosts),
+        listening,
+        confirmed,
+        skipped,
+    )
+    return Discovery(confirmed, skipped)
+
+
+async def _is_listening(host: str, port: int) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), PROBE_TIMEOUT
+        )
+    except (OSError, TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def _answers_modbus(host: str, port: int, unit_id: int) -> bool:
+    client = AsyncModbusTcpClient(
+        host=host, port=port, timeout=CONFIRM_TIMEOUT, retries=0, reconnect_delay=0
+    )
+    try:
+        if not await client.connect():
+            return False
+        await client.read_holding_registers(0, count=1, device_id=unit_id)
+    except Exception as error:  # pylint: disable=broad-except
+        _LOGGER.debug("%s:%s does not answer Modbus: %s", host, port, error)
+        return False
+    finally:
+        client.close()
+    return True
+
+
+class GatewayInUseError(Exception):
+    """A unit sweep was refused because an entry shares the gateway."""
+
+
+async def async_probe_units(
+    host: str,
+    port: int = DEFAULT_PORT,
+    unit_ids: Iterable[int] = UNIT_IDS,
+    *,
+    depth: int = PIPELINE_DEPTH,
+    timeout: float = UNIT_TIMEOUT,
+) -> list[int]:
+    """Return the unit IDs behind a gateway that answer with a register block.
+
+    One connection carries the whole sweep. Up to depth requests are sent
+    ahead, each with its own transaction ID, so the gateway can start on the
+    next unit as soon as one is done. The gateway serves them one at a time,
+    so each request's timeout starts when it becomes the oldest unanswered
+    one; answers arriving after their timeout still count. Gateways that
+    drop the connection when pipelined are swept again one request at a
+    time.
+
+    The sweep bypasses the shared gateway's scheduler and pacing, so it
+    refuses with GatewayInUseError while an entry is connected to it.
+    """
+    if ModbusGateway.is_in_use(host, port):
+        raise GatewayInUseError(f"{host}:{port} is in use by a config entry")
+    remaining = list(unit_ids)
+    found: set[int] = set()
+    while remaining:
+        unanswered = await _sweep(host, port, remaining, depth, timeout, found)
+        if unanswered is None or depth == 1:
+            break
+        _LOGGER.debug("%s:%s closed a pipelined sweep; probing one by one", host, port)
+        remaining, depth = unanswered, 1
+    return sorted(found)
+
+
+async def _sweep(host, port, unit_ids, depth, timeout, found) -> list[int] | None:
+    """Probe unit_ids into found; return the unanswered ones if disconnected."""
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), CONFIRM_TIMEOUT
+    )
+    loop = asyncio.get_running_loop()
+    frames: asyncio.Queue = asyncio.Queue()
+    receiver = asyncio.create_task(_receive(reader, frames))
+    sent: dict[int, int] = {}
+    # Transaction IDs in send order that are neither answered nor expired.
+    in_flight: deque[int] = deque()
+    answered: set[int] = set()
+    units = iter(unit_ids)
+    head_since = loop.time()
+    try:
+        while True:
+            while len(in_flight) < depth and (unit := next(units, None)) is not None:
+                transaction = len(sent) + 1
+                sent[transaction] = unit
+                in_flight.append(transaction)
+                writer.write(
+                    _MBAP.pack(transaction, 0, len(_PROBE_PDU) + 1, unit) + _PROBE_PDU
+                )
+            if not in_flight:
+                break
+            await writer.drain()
+            try:
+                frame = await asyncio.wait_for(
+                    frames.get(), head_since + timeout - loop.time()
+                )
+            except TimeoutError:
+                in_flight.popleft()
+                head_since = loop.time()
+                continue
+            if frame is None:
+                return [unit for unit in unit_ids if unit not in answered]
+            transaction, unit = frame
+            _record(sent, transaction, unit, found, answered)
+            if transaction in in_flight:
+                if in_flight[0] == transaction:
+                    head_since = loop.time()
+                in_flight.remove(transaction)
+
+        # Late answers to expired requests, for as long as they keep coming.
+        while len(answered) < len(sent):
+            try:
+                frame = await asyncio.wait_for(frames.get(), timeout)
+            except TimeoutError:
+                break
+            if frame is None:
+                break
+            _record(sent, *frame, found, answered)
+        return None
+    finally:
+        receiver.cancel()
+        writer.close()
+
+
+def _record(sent, transaction, unit, found, answered) -> None:
+    # unit is None for an exception or malformed response.
+    if unit is not None and sent.get(transaction) == unit:
+        found.add(unit)
+    answered.add(transaction)
+
+
+async def _receive(reader, frames: asyncio.Queue) -> None:
+    """Queue (transaction, unit or None) per response; None when closed."""
+    try:
+        while True:
+            header = await reader.readexactly(_MBAP.size)
+            transaction, _, length, unit = _MBAP.unpack(header)
+            if length < 2:
+                # Not a Modbus response; the stream cannot be resynchronised.
+                break
+            pdu = await reader.readexactly(length - 1)
+            valid = pdu[:2] == _PROBE_RESPONSE_HEADER and len(pdu) == 2 + 2 * _SIZE
+            await frames.put((transaction, unit if valid else None))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    await frames.put(None)
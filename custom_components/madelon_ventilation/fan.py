@@ -4,6 +4,7 @@ from __future__ import annotations
 
 # pyright: reportMissingImports=false
 import logging
+from collections.abc import Awaitable, Callable
 from typing import Any
 
 from homeassistant.components.fan import (  # pyright: ignore[reportMissingImports]
@@ -17,6 +18,9 @@ from homeassistant.core import (  # pyright: ignore[reportMissingImports]
     HomeAssistant,
     callback,
 )
+from homeassistant.exceptions import (  # pyright: ignore[reportMissingImports]
+    HomeAssistantError,
+)
 from homeassistant.helpers.device_registry import (  # pyright: ignore[reportMissingImports]
     DeviceInfo,
 )
@@ -35,7 +39,7 @@ from .const import DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_SW_VERSION, DOMAIN
 from .coordinator import (
     MadelonVentilationCoordinator,  # pyright: ignore[reportMissingImports]
 )
-from .fresh_air_controller import FreshAirSystem
+from .fresh_air_controller import CircuitOpenError, FreshAirSystem
 
 _LOGGER = logging.getLogger(__name__)
 ORDERED_NAMED_FAN_SPEEDS = ["low", "medium", "high"]
@@ -63,9 +67,12 @@ class FreshAirFan(CoordinatorEntity[MadelonVentilationCoordinator], FanEntity):
         self, coordinator: MadelonVentilationCoordinator, fan_type: str
     ) -> None:
         """Initialize a fan backed by the shared coordinator snapshot."""
-        super().__init__(coordinator)
-        self._system: FreshAirSystem = coordinator.system
         self._fan_type = fan_type.lower()
+        self._registers = ("power", f"{self._fan_type}_speed")
+        # The registers double as coordinator context, so the fan is only
+        # notified when one of them changes.
+        super().__init__(coordinator, frozenset(self._registers))
+        self._system: FreshAirSystem = coordinator.system
         self._attr_has_entity_name = True
         self._attr_name = f"{fan_type.capitalize()} Fan"
         self._attr_is_on = False
@@ -91,6 +98,18 @@ class FreshAirFan(CoordinatorEntity[MadelonVentilationCoordinator], FanEntity):
             sw_version=DEVICE_SW_VERSION,
         )
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark state restored from the previous run until a live read."""
+        return self.coordinator.stale_attributes
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the registers this entity reads."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_subscribe_registers(self._registers)
+        )
+
     @property
     def supported_features(self) -> FanEntityFeature:
         """Flag supported features."""
@@ -102,11 +121,12 @@ class FreshAirFan(CoordinatorEntity[MadelonVentilationCoordinator], FanEntity):
 
     def _update_from_snapshot(self) -> None:
         """Copy state from the latest successful shared snapshot."""
-        power = self._system.power
+        snapshot = self._system.snapshot
+        power = snapshot.power
         speed = (
-            self._system.supply_speed
+            snapshot.supply_speed
             if self._fan_type == "supply"
-            else self._system.exhaust_speed
+            else snapshot.exhaust_speed
         )
         if power is None or speed is None:
             return
@@ -138,6 +158,22 @@ class FreshAirFan(CoordinatorEntity[MadelonVentilationCoordinator], FanEntity):
         self._attr_percentage = percentage
         self.async_write_ha_state()
 
+    async def _async_write(
+        self,
+        write: Callable[[], Awaitable[bool]],
+        previous_state: tuple[bool, int],
+    ) -> None:
+        """Run a Modbus write behind the already published optimistic state."""
+        try:
+            success = await write()
+        except CircuitOpenError as error:
+            # The device is known to be offline; fail the service call fast.
+            self._optimistic_write_pending = False
+            self._attr_is_on, self._attr_percentage = previous_state
+            self.async_write_ha_state()
+            raise HomeAssistantError(str(error)) from error
+        await self._async_finish_write(success, previous_state)
+
     async def _async_finish_write(
         self, success: bool, previous_state: tuple[bool, int]
     ) -> None:
@@ -167,15 +203,13 @@ class FreshAirFan(CoordinatorEntity[MadelonVentilationCoordinator], FanEntity):
 
         previous_state = (bool(self._attr_is_on), self._attr_percentage or 0)
         self._async_publish_optimistic_state(True, previous_state[1])
-        success = await self.hass.async_add_executor_job(self._system.set_power, True)
-        await self._async_finish_write(success, previous_state)
+        await self._async_write(lambda: self._system.set_power(True), previous_state)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the fan off."""
         previous_state = (bool(self._attr_is_on), self._attr_percentage or 0)
         self._async_publish_optimistic_state(False, 0)
-        success = await self.hass.async_add_executor_job(self._system.set_power, False)
-        await self._async_finish_write(success, previous_state)
+        await self._async_write(lambda: self._system.set_power(False), previous_state)
 
     async def async_set_percentage(self, percentage: int) -> None:
         """Set the speed percentage of the fan."""
@@ -191,21 +225,15 @@ class FreshAirFan(CoordinatorEntity[MadelonVentilationCoordinator], FanEntity):
         already_on = self.coordinator.last_update_success and self._attr_is_on
         self._async_publish_optimistic_state(True, optimistic_percentage)
 
-        def write_speed_then_power() -> bool:
+        fields: dict[str, Any] = {f"{self._fan_type}_speed": speed}
+        if not already_on:
             # Speed and power are non-contiguous registers, so this sequence
-            # cannot be atomic. Never power on if selecting the speed failed.
-            if self._fan_type == "supply":
-                speed_success = self._system.set_supply_speed(speed)
-            else:
-                speed_success = self._system.set_exhaust_speed(speed)
-            if not speed_success:
-                return False
-            if already_on:
-                return True
-            return self._system.set_power(True)
-
-        success = await self.hass.async_add_executor_job(write_speed_then_power)
-        await self._async_finish_write(success, previous_state)
+            # cannot be atomic. apply_state writes in field order and stops
+            # at the first failure: never power on if the speed failed.
+            fields["power"] = True
+        await self._async_write(
+            lambda: self._system.apply_state(**fields), previous_state
+        )
 
     async def async_toggle(self, **kwargs: Any) -> None:
         """Toggle the fan."""
@@ -1,58 +1,245 @@
+import asyncio
 import logging
-import threading
 import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
 from enum import Enum
 
 from pymodbus import (  # pyright: ignore[reportMissingImports]
     ExceptionResponse,
     # pymodbus_apply_logging_config,
 )
-from pymodbus.client import ModbusTcpClient  # pyright: ignore[reportMissingImports]
+from pymodbus.client import (  # pyright: ignore[reportMissingImports]
+    AsyncModbusTcpClient,
+)
+from pymodbus.exceptions import (  # pyright: ignore[reportMissingImports]
+    ConnectionException,
+    ModbusIOException,
+)
 
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
 from .const import DEFAULT_PORT, DEFAULT_UNIT_ID
+from .planner import PollTier, ReadCostModel, plan_reads
+from .scheduler import BusScheduler, RequestPriority
+from .telemetry import BusTelemetry
 
 _LOGGER = logging.getLogger(__name__)
 
+# Exception codes a gateway answers with for a unit that does not respond.
+GATEWAY_PATH_UNAVAILABLE = 0x0A
+GATEWAY_TARGET_FAILED = 0x0B
+
+
+def _is_error_response(response) -> bool:
+    """Return whether pymodbus identifies a response as an error."""
+    if response is None or isinstance(response, ExceptionResponse):
+        return True
+    is_error = getattr(response, "isError", None)
+    if not callable(is_error):
+        return False
+    error_result = is_error()
+    return isinstance(error_result, bool) and error_result
+
+
+def _is_gateway_failure(error) -> bool:
+    """Return whether an error means the gateway itself is unreachable."""
+    if isinstance(error, TimeoutError):
+        # No response in time: the unit behind the gateway stayed silent.
+        return False
+    return isinstance(error, (OSError, ConnectionException))
+
+
+def _is_unit_silent(response) -> bool:
+    """Return whether the gateway reports that the unit did not answer."""
+    return isinstance(response, ExceptionResponse) and response.exception_code in (
+        GATEWAY_PATH_UNAVAILABLE,
+        GATEWAY_TARGET_FAILED,
+    )
+
+
+class _PendingWrite:
+    """A queued single-register write that later writers may overwrite."""
+
+    __slots__ = ("future", "value")
+
+    def __init__(self, value, future):
+        self.value = value
+        self.future = future
+
+
+class _PendingRead:
+    """A queued register read that later readers of the same block may join."""
+
+    __slots__ = ("future", "ticket")
+
+    def __init__(self, ticket, future):
+        self.ticket = ticket
+        self.future = future
+
+
+@dataclass(frozen=True)
+class TransportProfile:
+    """Timing of the requests to one gateway.
+
+    spacing is the minimum interval between requests, timeout bounds both
+    connecting and every response, and retry_count connection attempts
+    are made retry_delay seconds apart.
+    """
+
+    spacing: float
+    timeout: float
+    retry_count: int
+    retry_delay: float
+
+
+class ModbusGateway:
+    """One Modbus TCP connection shared by every unit behind a gateway.
+
+    RS485 gateways answer one transaction at a time, so pacing, scheduling,
+    telemetry and the circuit breaker for the link belong to the gateway
+    rather than to a single device; each unit keeps a breaker of its own
+    for not answering behind it. Config entries share gateways through acquire() and
+    release(); the connection closes when the last user releases it.
+    """
 
-class ModbusClient:
     MIN_COMMUNICATION_INTERVAL = 0.2
     CONNECTION_TIMEOUT = 1.0
     CONNECTION_BUDGET = 2.5
     RETRY_COUNT = 2
     RETRY_DELAY = 0.2
 
-    def __init__(self, host, port=DEFAULT_PORT, unit_id=DEFAULT_UNIT_ID):
+    # Process-wide gateways keyed by "host:port".
+    _registry = {}
+
+    def __init__(self, host, port=DEFAULT_PORT):
         self.host = host
         self.port = port
-        self.unit_id = unit_id
         self.client = None
         self.logger = _LOGGER
         self.retry_count = self.RETRY_COUNT
         self.retry_delay = self.RETRY_DELAY
         self.connection_timeout = self.CONNECTION_TIMEOUT
         self.connection_budget = self.CONNECTION_BUDGET
-        self._communication_lock = threading.Lock()
+        # Minimum seconds between requests; calibration may lower it.
+        self.spacing = self.MIN_COMMUNICATION_INTERVAL
+        # Timeout the current client was constructed with.
+        self._client_timeout = None
+        # User writes go first, confirmation reads second, polls last; units
+        # of equal priority take turns.
+        self.scheduler = BusScheduler()
         self._last_request_time = None
+        # Offline gateways fail fast instead of paying the connection budget.
+        self.breaker = CircuitBreaker(f"Modbus gateway {host}:{port}")
+        self.telemetry = BusTelemetry()
+        self._references = 0
+
+    @property
+    def key(self) -> str:
+        """Return the registry key of this gateway."""
+        return f"{self.host}:{self.port}"
+
+    @classmethod
+    def acquire(cls, host, port=DEFAULT_PORT):
+        """Return the shared gateway for host:port and count one more user."""
+        key = f"{host}:{port}"
+        gateway = cls._registry.get(key)
+        if gateway is None:
+            gateway = cls._registry[key] = cls(host, port)
+        gateway._references += 1
+        return gateway
+
+    @classmethod
+    def is_in_use(cls, host, port=DEFAULT_PORT) -> bool:
+        """Return whether a unit holds the shared gateway for host:port."""
+        return f"{host}:{port}" in cls._registry
+
+    async def release(self):
+        """Drop one user and close the connection after the last one."""
+        self._references = max(0, self._references - 1)
+        if self._references:
+            return
+        if self._registry.get(self.key) is self:
+            del self._registry[self.key]
+        await self.close()
+
+    @property
+    def profile(self) -> TransportProfile:
+        """Return the timing currently in use."""
+        return TransportProfile(
+            self.spacing,
+            self.connection_timeout,
+            self.retry_count,
+            self.retry_delay,
+        )
+
+    @classmethod
+    def default_profile(cls) -> TransportProfile:
+        """Return the timing of a gateway that was never calibrated."""
+        return TransportProfile(
+            cls.MIN_COMMUNICATION_INTERVAL,
+            cls.CONNECTION_TIMEOUT,
+            cls.RETRY_COUNT,
+            cls.RETRY_DELAY,
+        )
 
-    def _ensure_connected(self):
+    def apply_profile(self, profile: TransportProfile) -> None:
+        """Use profile from the next request on.
+
+        A new timeout takes a new client, which the next request connects
+        while it holds the bus.
+        """
+        self.spacing = profile.spacing
+        self.connection_timeout = profile.timeout
+        self.retry_count = profile.retry_count
+        self.retry_delay = profile.retry_delay
+
+    async def probe(self, request, spacing, unit_id=None):
+        """Send one request spacing seconds after the previous one.
+
+        Unlike execute(), failures neither count against the circuit breaker
+        nor trigger reconnect retries, so calibration can push the gateway
+        to its limits without taking entities offline.
+        """
+        async with self.scheduler.access(RequestPriority.POLL, unit_id):
+            if not await self._ensure_connected() or self.client is None:
+                raise ConnectionError(f"Cannot connect to {self.key}")
+            return await self._send_paced(request, spacing)
+
+    async def _ensure_connected(self):
         """Ensure a connection is established within a bounded retry budget."""
         start_time = time.monotonic()
         for attempt in range(self.retry_count):
             if time.monotonic() - start_time >= self.connection_budget:
                 self.logger.error("Connection attempt budget exhausted")
                 return False
+            if attempt:
+                self.telemetry.retries += 1
 
             try:
+                if (
+                    self.client is not None
+                    and self._client_timeout != self.connection_timeout
+                ):
+                    self.logger.debug("Reconnecting with the new timeout")
+                    self.client.close()
+                    self.client = None
                 if self.client is None:
-                    self.client = ModbusTcpClient(
+                    # Reconnects are driven by this retry budget, never by a
+                    # background task inside pymodbus.
+                    self.client = AsyncModbusTcpClient(
                         host=self.host,
                         port=self.port,
                         timeout=self.connection_timeout,
+                        reconnect_delay=0,
                     )
+                    self._client_timeout = self.connection_timeout
                 if self.client.connected:
                     return True
 
-                connected = self.client.connect()
+                connect_started = time.monotonic()
+                connected = await self.client.connect()
+                self.telemetry.connect.record(time.monotonic() - connect_started)
                 if connected and self.client.connected:
                     return True
                 self.logger.warning("Modbus connection attempt failed")
@@ -64,85 +251,305 @@ class ModbusClient:
 
             elapsed = time.monotonic() - start_time
             if attempt < self.retry_count - 1 and elapsed < self.connection_budget:
-                time.sleep(min(self.retry_delay, self.connection_budget - elapsed))
+                await asyncio.sleep(
+                    min(self.retry_delay, self.connection_budget - elapsed)
+                )
         return False
 
-    def _execute_request(self, request):
-        """Serialize a request and enforce the device communication interval."""
-        with self._communication_lock:
-            if not self._ensure_connected() or self.client is None:
-                return None
+    async def execute(
+        self, request, priority=RequestPriority.WRITE, unit_id=None, unit_breaker=None
+    ):
+        """Serialize a request by priority and enforce the communication interval.
+
+        Raises CircuitOpenError without touching the bus while the gateway,
+        or the unit guarded by unit_breaker, is known to be unreachable.
+        unit_id takes part in round-robin scheduling.
+
+        Only failures to reach the gateway count against its shared breaker.
+        A unit that does not answer behind a working gateway counts against
+        unit_breaker alone, so it cannot take the other units offline.
+        """
+        breakers = [self.breaker]
+        probing = [self.breaker.check()]
+        recorded = [False, False]
+        if unit_breaker is not None:
+            try:
+                probing.append(unit_breaker.check())
+            except CircuitOpenError:
+                if probing[0]:
+                    self.breaker.release_probe()
+                raise
+            breakers.append(unit_breaker)
+        queued = time.monotonic()
+        try:
+            async with self.scheduler.access(priority, unit_id):
+                self.telemetry.lock_wait.record(time.monotonic() - queued)
+                for breaker in breakers:
+                    if breaker.state is CircuitState.OPEN:
+                        # The circuit opened while this request was queued.
+                        raise CircuitOpenError(breaker.name, breaker.retry_after)
+                if not await self._ensure_connected() or self.client is None:
+                    self.breaker.record_failure()
+                    recorded[0] = True
+                    return None
+                try:
+                    response = await self._send_paced(request)
+                except Exception as error:
+                    if _is_gateway_failure(error):
+                        self.breaker.record_failure()
+                        recorded[0] = True
+                    elif unit_breaker is not None:
+                        unit_breaker.record_failure()
+                        recorded[1] = True
+                    raise
+                self.breaker.record_success()
+                recorded[0] = True
+                if unit_breaker is not None:
+                    if _is_unit_silent(response):
+                        unit_breaker.record_failure()
+                    else:
+                        unit_breaker.record_success()
+                    recorded[1] = True
+                return response
+        except CircuitOpenError:
+            raise
+        except Exception as error:
+            if isinstance(error, (TimeoutError, ModbusIOException)):
+                self.telemetry.timeouts += 1
+            if not any(recorded):
+                # Raised before the request reached the bus.
+                self.breaker.record_failure()
+                recorded[0] = True
+            raise
+        finally:
+            for breaker, was_probing, was_recorded in zip(breakers, probing, recorded):
+                if was_probing and not was_recorded:
+                    breaker.release_probe()
+
+    async def _send_paced(self, request, spacing=None):
+        """Send a request on the held bus after the communication interval."""
+        if spacing is None:
+            spacing = self.spacing
+        client = self.client
+        now = time.monotonic()
+        if self._last_request_time is not None:
+            remaining = spacing - (now - self._last_request_time)
+            if remaining > 0:
+                self.telemetry.pacing.record(remaining)
+                await asyncio.sleep(remaining)
+                now = time.monotonic()
+
+        self._last_request_time = now
+        self.telemetry.requests += 1
+        response = await request(client)
+        self.telemetry.rtt.record(time.monotonic() - now)
+        if response is not None and _is_error_response(response):
+            self.telemetry.exception_responses += 1
+        return response
+
+    async def close(self):
+        """Close the current connection and allow a later reconnect."""
+        async with self.scheduler.access(RequestPriority.WRITE):
             client = self.client
+            self.client = None
+            self._last_request_time = None
+            if client is not None:
+                try:
+                    client.close()
+                except Exception as error:
+                    self.logger.warning("Error closing Modbus connection: %s", error)
 
-            now = time.monotonic()
-            if self._last_request_time is not None:
-                remaining = self.MIN_COMMUNICATION_INTERVAL - (
-                    now - self._last_request_time
-                )
-                if remaining > 0:
-                    time.sleep(remaining)
-                    now = time.monotonic()
 
-            self._last_request_time = now
-            return request(client)
+class ModbusClient:
+    """Read and write registers of one unit behind a Modbus gateway."""
 
-    @staticmethod
-    def _is_error_response(response) -> bool:
-        """Return whether pymodbus identifies a response as an error."""
-        if response is None or isinstance(response, ExceptionResponse):
-            return True
-        is_error = getattr(response, "isError", None)
-        if not callable(is_error):
-            return False
-        error_result = is_error()
-        return isinstance(error_result, bool) and error_result
+    def __init__(self, host, port=DEFAULT_PORT, unit_id=DEFAULT_UNIT_ID, gateway=None):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.logger = _LOGGER
+        # Without a shared gateway the client owns a private connection.
+        self._owns_gateway = gateway is None
+        self.gateway = gateway if gateway is not None else ModbusGateway(host, port)
+        self._released = False
+        # Writes waiting for the bus, keyed by register address. Only the
+        # newest value of each entry is sent once the bus becomes free.
+        self._pending_writes = {}
+        # Reads waiting for the bus, keyed by (start address, count).
+        self._pending_reads = {}
+        # A unit that stops answering fails fast without affecting the other
+        # units on the gateway, which keeps its own breaker for the link.
+        self.breaker = CircuitBreaker(f"Modbus unit {unit_id} at {host}:{port}")
 
-    def read_registers(self, start_address, count):
-        """Read multiple holding registers."""
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds until this unit may be contacted again."""
+        return max(self.gateway.breaker.retry_after, self.breaker.retry_after)
+
+    @property
+    def circuit_state(self) -> CircuitState:
+        """Return the state of the gateway circuit, or of the unit's if closed."""
+        state = self.gateway.breaker.state
+        return self.breaker.state if state is CircuitState.CLOSED else state
+
+    async def read_registers(self, start_address, count, priority=RequestPriority.POLL):
+        """Read multiple holding registers.
+
+        A read of a block that is already queued joins the queued request
+        instead of adding another transaction, raising its priority if the
+        new caller is more urgent.
+        """
+        key = (start_address, count)
+        pending = self._pending_reads.get(key)
+        if pending is not None:
+            pending.ticket.promote(priority)
+            return self._outcome(await asyncio.shield(pending.future))
+
+        ticket = self.gateway.scheduler.ticket(priority, self.unit_id)
+        pending = _PendingRead(ticket, asyncio.get_running_loop().create_future())
+        self._pending_reads[key] = pending
+
+        async def send(client):
+            # Later readers must not join a response that is already in flight.
+            if self._pending_reads.get(key) is pending:
+                del self._pending_reads[key]
+            return await client.read_holding_registers(
+                address=start_address, count=count, device_id=self.unit_id
+            )
+
+        result = None
         try:
-            response = self._execute_request(
-                lambda client: client.read_holding_registers(
-                    address=start_address, count=count, device_id=self.unit_id
-                )
+            response = await self.gateway.execute(
+                send, ticket, unit_breaker=self.breaker
             )
-            if self._is_error_response(response):
+            if _is_error_response(response):
                 self.logger.error("Error reading registers: %s", response)
-                return None
-            return response
+            else:
+                result = response
+        except CircuitOpenError as error:
+            self.logger.debug("Skipping register read: %s", error)
+            result = error
         except Exception as error:
             self.logger.error("Error reading registers: %s", error)
-            return None
+        finally:
+            if self._pending_reads.get(key) is pending:
+                del self._pending_reads[key]
+            if not pending.future.done():
+                pending.future.set_result(result)
+        return self._outcome(result)
+
+    @staticmethod
+    def _outcome(result):
+        """Re-raise a shared CircuitOpenError for every merged caller."""
+        if isinstance(result, CircuitOpenError):
+            raise result
+        return result
+
+    async def write_single_register(self, address, value):
+        """Write a single register and report whether value reached the device.
 
-    def write_single_register(self, address, value):
-        """Write a single register."""
+        A value a later write replaced while both were queued did not.
+
+        An open circuit counts as a failed write; use submit_write() to
+        fail fast with CircuitOpenError instead.
+        """
         try:
-            response = self._execute_request(
-                lambda client: client.write_register(
-                    address=address, value=value, device_id=self.unit_id
-                )
+            return await self.submit_write(address, value) == value
+        except CircuitOpenError as error:
+            self.logger.debug("Write to register %s skipped: %s", address, error)
+            return False
+
+    async def submit_write(self, address, value):
+        """Queue a register write and return the value that reached the device.
+
+        Writes to an address that is still waiting for the bus are merged:
+        the newest value wins and every merged caller receives the outcome of
+        the single transaction that was actually sent. None means failure;
+        a caller whose value was replaced receives the newer value.
+        """
+        pending = self._pending_writes.get(address)
+        if pending is not None:
+            self.logger.debug(
+                "Coalescing write to register %s: %s -> %s",
+                address,
+                pending.value,
+                value,
+            )
+            pending.value = value
+            return self._outcome(await asyncio.shield(pending.future))
+
+        pending = _PendingWrite(value, asyncio.get_running_loop().create_future())
+        self._pending_writes[address] = pending
+
+        async def send(client):
+            # From here on the value is fixed; later writers queue a new entry.
+            if self._pending_writes.get(address) is pending:
+                del self._pending_writes[address]
+            return await client.write_register(
+                address=address, value=pending.value, device_id=self.unit_id
             )
-            if self._is_error_response(response):
+
+        written = None
+        try:
+            response = await self.gateway.execute(
+                send, RequestPriority.WRITE, self.unit_id, self.breaker
+            )
+            if _is_error_response(response):
                 self.logger.error("Error writing register: %s", response)
+            else:
+                written = pending.value
+        except CircuitOpenError as error:
+            self.logger.debug("Skipping register write: %s", error)
+            written = error
+        except Exception as error:
+            self.logger.error("Error writing register: %s", error)
+        finally:
+            if self._pending_writes.get(address) is pending:
+                del self._pending_writes[address]
+            if not pending.future.done():
+                pending.future.set_result(written)
+        return self._outcome(written)
+
+    async def write_multiple_registers(self, address, values):
+        """Write a contiguous block of registers in one transaction (FC16)."""
+        values = list(values)
+        try:
+            response = await self.gateway.execute(
+                lambda client: client.write_registers(
+                    address=address, values=values, device_id=self.unit_id
+                ),
+                RequestPriority.WRITE,
+                self.unit_id,
+                self.breaker,
+            )
+            if _is_error_response(response):
+                self.logger.error("Error writing registers: %s", response)
                 return False
             return True
+        except CircuitOpenError:
+            raise
         except Exception as error:
-            self.logger.error("Error writing register: %s", error)
+            self.logger.error("Error writing registers: %s", error)
             return False
 
-    def close(self):
-        """Close the current connection and allow a later reconnect."""
-        with self._communication_lock:
-            client = self.client
-            self.client = None
-            self._last_request_time = None
-            if client is not None:
-                try:
-                    client.close()
-                except Exception as error:
-                    self.logger.warning("Error closing Modbus connection: %s", error)
+    async def close(self):
+        """Close a private connection or release this unit's share of a gateway."""
+        if self._owns_gateway:
+            await self.gateway.close()
+        elif not self._released:
+            self._released = True
+            await self.gateway.release()
 
 
-__all__ = ["FreshAirSystem", "OperationMode"]
+__all__ = [
+    "CircuitOpenError",
+    "FreshAirSystem",
+    "ModbusGateway",
+    "OperationMode",
+    "RegisterSnapshot",
+    "RequestPriority",
+    "TransportProfile",
+]
 
 
 class OperationMode(Enum):
@@ -181,30 +588,159 @@ class FreshAirSystem:
         "humidity": 17,  # 湿度
     }
 
+    # Polling tier of every register: live measurements, user settings, and
+    # filter bookkeeping that changes about once an hour.
+    REGISTER_TIERS = {
+        "power": PollTier.NORMAL,
+        "filter_usage_time": PollTier.SLOW,
+        "filter_reminder_setting": PollTier.SLOW,
+        "filter_reminder": PollTier.SLOW,
+        "mode": PollTier.NORMAL,
+        "supply_speed": PollTier.NORMAL,
+        "exhaust_speed": PollTier.NORMAL,
+        "bypass": PollTier.NORMAL,
+        "actual_supply": PollTier.FAST,
+        "actual_exhaust": PollTier.FAST,
+        "temperature": PollTier.FAST,
+        "humidity": PollTier.FAST,
+    }
+
+    # Registers that may be written back verbatim. Read-only registers and
+    # filter_usage_time (writing 1 resets it) are never used to fill gaps.
+    WRITABLE_REGISTERS = frozenset(
+        {
+            "power",
+            "filter_reminder_setting",
+            "mode",
+            "supply_speed",
+            "exhaust_speed",
+            "bypass",
+        }
+    )
+
     def __init__(self, host, port=DEFAULT_PORT, unit_id=DEFAULT_UNIT_ID):
-        self.modbus = ModbusClient(host=host, port=port, unit_id=unit_id)
-        self._registers_cache = None
-        self.unique_identifier = (
-            f"{host}:{port}"  # Use host and port as a unique identifier
+        # Units behind the same gateway share one connection and bus queue.
+        self.modbus = ModbusClient(
+            host=host,
+            port=port,
+            unit_id=unit_id,
+            gateway=ModbusGateway.acquire(host, port),
         )
+        self._registers_cache = None
+        # Host and port identify the default unit, so existing entity IDs stay
+        # stable; further units on the same gateway append their unit ID.
+        self.unique_identifier = f"{host}:{port}"
+        if unit_id != DEFAULT_UNIT_ID:
+            self.unique_identifier += f":{unit_id}"
         self.logger = _LOGGER
         self.logger.debug(f"Initialized FreshAirSystem with host: {host}, port: {port}")
-        self._coordinator_managed = False
         self._cache_timestamp = None
         self._cache_ttl = 30  # 缓存有效期（秒）
-        self._is_reading = False  # 添加读取锁
         # Availability represents the latest real register read, not whether a
         # last-known value happens to remain in the cache.
         self._available = False
+        # Register names in use by entities; without any, every register is
+        # read. Plans are cached per set of polling tiers and pacing.
+        self._subscriptions = Counter()
+        self._passive_subscriptions = Counter()
+        self._read_plans = {}
+        # Published after every refresh and acknowledged write; entities only
+        # read attributes of the current snapshot.
+        self._snapshot = RegisterSnapshot.empty()
 
     @property
     def available(self) -> bool:
         """Return whether the most recent register read succeeded."""
         return self._available
 
-    def enable_coordinator_mode(self):
-        """Make register properties consume only coordinator-managed snapshots."""
-        self._coordinator_managed = True
+    @property
+    def snapshot(self) -> "RegisterSnapshot":
+        """Return the latest decoded register snapshot."""
+        return self._snapshot
+
+    def _publish_snapshot(self):
+        """Decode the register cache into a new snapshot."""
+        if self._registers_cache is not None:
+            self._snapshot = RegisterSnapshot(
+                self._registers_cache, self._snapshot.version + 1
+            )
+
+    @property
+    def registers(self) -> list | None:
+        """Return a copy of the last read registers, None for unread ones."""
+        if self._registers_cache is None:
+            return None
+        return list(self._registers_cache)
+
+    def restore_registers(self, registers) -> None:
+        """Publish registers persisted by an earlier run as the snapshot.
+
+        The system stays unavailable, and the cache never counts as fresh,
+        until a live read succeeds.
+        """
+        span = max(self.REGISTERS.values()) - min(self.REGISTERS.values()) + 1
+        if len(registers) != span:
+            raise ValueError(f"Expected {span} registers, got {len(registers)}")
+        self._registers_cache = list(registers)
+        self._publish_snapshot()
+
+    def stats(self) -> dict:
+        """Return a snapshot of bus latency histograms and counters."""
+        return {
+            **self.modbus.gateway.telemetry.snapshot(),
+            "circuit_state": self.modbus.circuit_state.value,
+        }
+
+    def subscribe(self, register_names, passive=False):
+        """Mark registers as in use and return a callable that releases them.
+
+        The read plan is recomputed on the next refresh after any change.
+        Without any subscriber every known register is read. Passive
+        subscriptions join the reads of the others but do not count as
+        subscribers, so they never narrow that full read.
+        """
+        register_names = tuple(register_names)
+        for name in register_names:
+            if name not in self.REGISTERS:
+                raise ValueError(f"Unknown register '{name}'")
+        attribute = "_passive_subscriptions" if passive else "_subscriptions"
+        getattr(self, attribute).update(register_names)
+        self._read_plans.clear()
+
+        def unsubscribe():
+            subscriptions = getattr(self, attribute)
+            subscriptions.subtract(register_names)
+            # Unary plus drops names whose count reached zero.
+            setattr(self, attribute, +subscriptions)
+            self._read_plans.clear()
+
+        return unsubscribe
+
+    def read_plan(self, tiers=None) -> tuple[tuple[int, int], ...]:
+        """Return the (start, count) windows that cover the given tiers.
+
+        None covers every tier. Registers of tiers that fall due together
+        are planned jointly, so they share transactions.
+        """
+        key = None if tiers is None else frozenset(tiers)
+        pacing = self.modbus.gateway.spacing
+        # The pacing changes when the gateway is calibrated.
+        plan = self._read_plans.get((key, pacing))
+        if plan is None:
+            names = [
+                name
+                for name in (
+                    self._subscriptions | self._passive_subscriptions
+                    if self._subscriptions
+                    else self.REGISTERS
+                )
+                if key is None or self.REGISTER_TIERS[name] in key
+            ]
+            model = ReadCostModel(pacing=pacing)
+            plan = plan_reads((self.REGISTERS[name] for name in names), model)
+            self._read_plans[key, pacing] = plan
+            self.logger.debug(f"Register read plan for {key}: {plan}")
+        return plan
 
     def _is_cache_valid(self):
         """检查缓存是否有效"""
@@ -216,88 +752,73 @@ class FreshAirSystem:
             return False
         return (time.time() - self._cache_timestamp) < self._cache_ttl
 
-    def refresh_registers(self, force_refresh=False):
-        """Refresh the complete register snapshot."""
+    async def refresh_registers(
+        self, force_refresh=False, priority=RequestPriority.POLL, tiers=None
+    ):
+        """Refresh the register snapshot along the current read plan.
+
+        With tiers, only registers of those polling tiers are read and the
+        others keep their last value. Registers outside the plan are None in
+        the new snapshot.
+        """
         if not force_refresh and self._is_cache_valid():
             return True
 
-        # 防止重复读取
-        if self._is_reading:
-            self.logger.debug("Already reading registers, skipping duplicate read")
-            return self._available
-
+        # Concurrent refreshes of the same block are merged by ModbusClient.
         try:
-            self._is_reading = True
-            start_address = min(self.REGISTERS.values())
-            count = max(self.REGISTERS.values()) - start_address + 1
-            self.logger.debug(
-                f"Reading all registers from {start_address} to {start_address + count - 1}"
-            )
-            response = self.modbus.read_registers(start_address, count)
-            registers = getattr(response, "registers", None) if response else None
-            if registers is not None and len(registers) >= count:
-                self._registers_cache = registers
-                self._cache_timestamp = time.time()
-                self._available = True
-                self.logger.debug(f"Registers read: {self._registers_cache}")
-                return True
-
+            span_start = min(self.REGISTERS.values())
+            snapshot = [None] * (max(self.REGISTERS.values()) - span_start + 1)
+            windows = self.read_plan(tiers)
+            if tiers is not None:
+                if not windows:
+                    return self._available
+                if self._registers_cache is not None:
+                    for start_address, count in self.read_plan():
+                        index = start_address - span_start
+                        snapshot[index : index + count] = self._registers_cache[
+                            index : index + count
+                        ]
+            for start_address, count in windows:
+                self.logger.debug(
+                    f"Reading registers from {start_address} to {start_address + count - 1}"
+                )
+                response = await self.modbus.read_registers(
+                    start_address, count, priority
+                )
+                registers = getattr(response, "registers", None) if response else None
+                if registers is None or len(registers) < count:
+                    self._available = False
+                    self.logger.warning(
+                        "Register read failed or returned incomplete data"
+                    )
+                    return False
+                index = start_address - span_start
+                snapshot[index : index + count] = registers[:count]
+
+            self._registers_cache = snapshot
+            self._publish_snapshot()
+            self._cache_timestamp = time.time()
+            self._available = True
+            self.logger.debug(f"Registers read: {self._registers_cache}")
+            return True
+        except CircuitOpenError:
             self._available = False
-            self.logger.warning("Register read failed or returned incomplete data")
-            return False
+            raise
         except Exception as e:
             self.logger.error(f"Error reading registers: {e}")
             # Keep the last-known cache for a later successful recovery, but
             # never let it imply that communication is healthy.
             self._available = False
             return False
-        finally:
-            self._is_reading = False
-
-    def _get_register_value(self, register_name):
-        """获取寄存器值"""
-        # Standalone controller users retain the historical lazy-read behavior.
-        # Coordinator-managed entities must never start their own Modbus reads.
-        if not self._coordinator_managed:
-            self.refresh_registers(force_refresh=False)
 
+    def _field(self, name):
+        """Return a decoded field of the current snapshot while available."""
         if not self._available:
             self.logger.warning(
-                f"Cannot get register value for '{register_name}': device is unavailable."
-            )
-            return None
-
-        if self._registers_cache is None:
-            self.logger.warning(
-                f"Cannot get register value for '{register_name}': register cache is empty after attempting refresh."
-            )
-            return None
-
-        try:
-            register_address = self.REGISTERS[register_name]
-            # The start_address for the cache array is the minimum address in REGISTERS
-            start_address_in_cache = min(self.REGISTERS.values())
-            # Calculate the index in the _registers_cache array
-            index_in_cache = register_address - start_address_in_cache
-
-            if 0 <= index_in_cache < len(self._registers_cache):
-                return self._registers_cache[index_in_cache]
-            else:
-                self.logger.error(
-                    f"Calculated index {index_in_cache} for register '{register_name}' is out of bounds "
-                    f"for cache of size {len(self._registers_cache)}."
-                )
-                return None
-        except KeyError:
-            self.logger.error(
-                f"Register name '{register_name}' not found in REGISTERS definition."
-            )
-            return None
-        except Exception as e:  # Catch any other unexpected errors during cache access
-            self.logger.error(
-                f"Unexpected error retrieving '{register_name}' from cache: {e}"
+                f"Cannot get register value for '{name}': device is unavailable."
             )
             return None
+        return getattr(self._snapshot, name)
 
     def _validate_speed(self, speed):
         """Validate speed value (1-3)."""
@@ -322,6 +843,130 @@ class FreshAirSystem:
         self.logger.debug(f"Validated speed: {speed}")
         return speed
 
+    async def _write_register(self, register_name, value) -> bool:
+        """Write a register and cache the value that actually reached the device.
+
+        Returns False when a later write to the register replaced value while
+        both were queued, so the caller does not keep showing it.
+        """
+        written = await self.modbus.submit_write(self.REGISTERS[register_name], value)
+        if written is None:
+            return False
+        self._update_cache_value(register_name, written)
+        if written != value:
+            self.logger.debug(
+                f"Write of {value} to {register_name} was replaced by {written}"
+            )
+            return False
+        return True
+
+    async def apply_state(self, **fields) -> bool:
+        """Write several fields with as few bus transactions as possible.
+
+        Adjacent registers share one Write Multiple Registers request. A gap
+        between requested registers is filled from the current snapshot when
+        every register in it is writable and cached. Transactions run in the
+        order their first field was given and stop at the first failure; the
+        cache is updated one acknowledged block at a time.
+        """
+        values = {}
+        for name, value in fields.items():
+            values[self.REGISTERS[name]] = self._encode_field(name, value)
+
+        for start, block in self._plan_writes(values):
+            self.logger.debug(f"Writing registers {start}-{start + len(block) - 1}")
+            if len(block) == 1:
+                written = await self.modbus.submit_write(start, block[0])
+                if written is None:
+                    return False
+                block = [written]
+            elif not await self.modbus.write_multiple_registers(start, block):
+                return False
+            self._update_cache_block(start, block)
+        return True
+
+    async def write_registers(self, address, values) -> bool:
+        """Write raw register values as a Modbus client sent them.
+
+        Every address must hold a writable register; writing 1 to
+        filter_usage_time alone resets the filter counter. A single value
+        goes through the coalescing write queue, several share one Write
+        Multiple Registers request. The cache is updated once acknowledged.
+        """
+        values = list(values)
+        by_address = {register: name for name, register in self.REGISTERS.items()}
+        names = [by_address.get(address + offset) for offset in range(len(values))]
+        if names == ["filter_usage_time"] and values == [1]:
+            return await self.reset_filter_usage_time()
+        if not values or not self.WRITABLE_REGISTERS.issuperset(names):
+            raise ValueError(
+                f"Registers {address}-{address + len(values) - 1} are not writable"
+            )
+        if len(values) == 1:
+            return await self._write_register(names[0], values[0])
+        if not await self.modbus.write_multiple_registers(address, values):
+            return False
+        self._update_cache_block(address, values)
+        return True
+
+    def _encode_field(self, register_name, value) -> int:
+        """Convert a writable field value to its raw register value."""
+        if register_name not in self.WRITABLE_REGISTERS:
+            raise ValueError(f"Register '{register_name}' is not writable")
+        if register_name in ("power", "bypass"):
+            return 1 if value else 0
+        if register_name == "mode":
+            if isinstance(value, str):
+                value = OperationMode.from_string(value)
+            return self._convert_mode_string(value)
+        if register_name in ("supply_speed", "exhaust_speed"):
+            return self._validate_speed(value)
+        return self._validate_filter_reminder_setting(value)
+
+    def _plan_writes(self, values):
+        """Group raw register values into contiguous write blocks."""
+        writable = {self.REGISTERS[name] for name in self.WRITABLE_REGISTERS}
+        start_address = min(self.REGISTERS.values())
+        cache = self._registers_cache if self._available else None
+
+        def cached(address):
+            index = address - start_address
+            if address not in writable or cache is None or index >= len(cache):
+                return None
+            return cache[index]
+
+        blocks = []
+        for address in sorted(values):
+            if blocks:
+                block_start, block = blocks[-1]
+                gap = range(block_start + len(block), address)
+                fill = [cached(gap_address) for gap_address in gap]
+                if None not in fill:
+                    block.extend(fill)
+                    block.append(values[address])
+                    continue
+            blocks.append((address, [values[address]]))
+
+        order = list(values)
+
+        def first_requested(item):
+            block_start, block = item
+            return min(
+                order.index(address)
+                for address in range(block_start, block_start + len(block))
+                if address in values
+            )
+
+        return sorted(blocks, key=first_requested)
+
+    def _update_cache_block(self, start_register, values):
+        """Replace a contiguous run of cached registers in one step."""
+        if self._registers_cache is not None:
+            index = start_register - min(self.REGISTERS.values())
+            self._registers_cache[index : index + len(values)] = values
+            self.logger.debug(f"Updated cache from register {start_register}: {values}")
+            self._publish_snapshot()
+
     def _update_cache_value(self, register_name, value):
         """更新缓存中的值"""
         if self._registers_cache is not None:
@@ -329,68 +974,28 @@ class FreshAirSystem:
             start_address = min(self.REGISTERS.values())
             self._registers_cache[register_address - start_address] = value
             self.logger.debug(f"Updated cache for {register_name}: {value}")
+            self._publish_snapshot()
 
     @property
     def power(self):
         """获取电源状态"""
-        value = self._get_register_value("power")
-        return bool(value) if value is not None else None
-
-    @power.setter
-    def power(self, state: bool):
-        """设置电源状态"""
-        self.set_power(state)
+        return self._field("power")
 
-    def set_power(self, state: bool) -> bool:
+    async def set_power(self, state: bool) -> bool:
         """Set power and report whether the write succeeded."""
         self.logger.debug(f"Setting power to: {state}")
-        value = 1 if state else 0
-        result = self.modbus.write_single_register(self.REGISTERS["power"], value)
-        if result:
-            self._update_cache_value("power", value)
-        return result
+        return await self._write_register("power", 1 if state else 0)
 
     @property
     def mode(self):
         """获取运行模式"""
-        value = self._get_register_value("mode")
-        self.logger.debug(f"Raw mode register value: {value}")
-        if value is None:
-            return None
-
-        # 确保值在有效范围内
-        if not 0 <= value <= 5:
-            self.logger.warning(f"Invalid mode value: {value}, defaulting to MANUAL")
-            return OperationMode.MANUAL
+        return self._field("mode")
 
-        converted_mode = self._convert_mode_value(value)
-        self.logger.debug(
-            f"Mode property returning: {converted_mode} (from value: {value})"
-        )
-        return converted_mode
-
-    @mode.setter
-    def mode(self, mode: OperationMode):
-        """设置运行模式"""
-        self.set_mode(mode)
-
-    def set_mode(self, mode: OperationMode) -> bool:
+    async def set_mode(self, mode: OperationMode) -> bool:
         """Set operation mode and report whether the write succeeded."""
         value = self._convert_mode_string(mode)
         self.logger.debug(f"Setting mode to: {mode.value} (register value: {value})")
-        result = self.modbus.write_single_register(self.REGISTERS["mode"], value)
-        if result:
-            self._update_cache_value("mode", value)
-        return result
-
-    def _convert_mode_value(self, value: int) -> OperationMode:
-        """Convert mode register value to OperationMode."""
-        mode_map = {
-            0: OperationMode.MANUAL,
-            1: OperationMode.AUTO,
-            2: OperationMode.TIMER,
-        }
-        return mode_map.get(value, OperationMode.MANUAL)
+        return await self._write_register("mode", value)
 
     def _convert_mode_string(self, mode: OperationMode) -> int:
         """Convert OperationMode to register value."""
@@ -404,128 +1009,92 @@ class FreshAirSystem:
     @property
     def supply_speed(self):
         """Get supply speed setting as string."""
-        value = self._get_register_value("supply_speed")
-        speed_map = {1: "low", 2: "medium", 3: "high"}
-        return speed_map.get(value) if value is not None else None
+        return self._field("supply_speed")
 
-    @supply_speed.setter
-    def supply_speed(self, speed):
-        """Set supply speed using either string or integer value."""
-        self.set_supply_speed(speed)
-
-    def set_supply_speed(self, speed) -> bool:
+    async def set_supply_speed(self, speed) -> bool:
         """Set supply speed and report whether the write succeeded."""
         validated_speed = self._validate_speed(speed)
         self.logger.debug(f"Setting supply speed to: {validated_speed}")
-        result = self.modbus.write_single_register(
-            self.REGISTERS["supply_speed"], validated_speed
-        )
-        if result:
-            self._update_cache_value("supply_speed", validated_speed)
-        return result
+        return await self._write_register("supply_speed", validated_speed)
 
     @property
     def exhaust_speed(self):
         """Get exhaust speed setting as string."""
-        value = self._get_register_value("exhaust_speed")
-        speed_map = {1: "low", 2: "medium", 3: "high"}
-        return speed_map.get(value) if value is not None else None
-
-    @exhaust_speed.setter
-    def exhaust_speed(self, speed):
-        """Set exhaust speed using either string or integer value."""
-        self.set_exhaust_speed(speed)
+        return self._field("exhaust_speed")
 
-    def set_exhaust_speed(self, speed) -> bool:
+    async def set_exhaust_speed(self, speed) -> bool:
         """Set exhaust speed and report whether the write succeeded."""
         validated_speed = self._validate_speed(speed)
         self.logger.debug(f"Setting exhaust speed to: {validated_speed}")
-        result = self.modbus.write_single_register(
-            self.REGISTERS["exhaust_speed"], validated_speed
-        )
-        if result:
-            self._update_cache_value("exhaust_speed", validated_speed)
-        return result
+        return await self._write_register("exhaust_speed", validated_speed)
 
     @property
     def bypass(self):
         """获取旁通状态"""
-        value = self._get_register_value("bypass")
-        return bool(value) if value is not None else None
+        return self._field("bypass")
 
-    @bypass.setter
-    def bypass(self, state: bool):
-        """设置旁通状态"""
-        self.set_bypass(state)
-
-    def set_bypass(self, state: bool) -> bool:
+    async def set_bypass(self, state: bool) -> bool:
         """Set bypass and report whether the write succeeded."""
         self.logger.debug(f"Setting bypass to: {state}")
-        value = 1 if state else 0
-        result = self.modbus.write_single_register(self.REGISTERS["bypass"], value)
-        if result:
-            self._update_cache_value("bypass", value)
-        return result
+        return await self._write_register("bypass", 1 if state else 0)
 
     @property
     def actual_supply_speed(self):
         """获取实际送风速度"""
-        return self._get_register_value("actual_supply")
+        return self._field("actual_supply_speed")
 
     @property
     def actual_exhaust_speed(self):
         """获取实际排风速度"""
-        return self._get_register_value("actual_exhaust")
+        return self._field("actual_exhaust_speed")
 
     @property
     def temperature(self):
         """获取温度（°C）"""
-        value = self._get_register_value("temperature")
-        return value / 10 if value is not None else None
+        return self._field("temperature")
 
     @property
     def humidity(self):
         """获取湿度（%）"""
-        value = self._get_register_value("humidity")
-        return value / 10 if value is not None else None
+        return self._field("humidity")
 
     @property
     def filter_usage_time(self):
         """获取滤网使用时间（小时）"""
-        return self._get_register_value("filter_usage_time")
+        return self._field("filter_usage_time")
 
     @property
     def filter_reminder_setting(self):
         """获取滤网提醒设置时间（小时）"""
-        return self._get_register_value("filter_reminder_setting")
+        return self._field("filter_reminder_setting")
 
-    @filter_reminder_setting.setter
-    def filter_reminder_setting(self, hours: int):
-        """设置滤网提醒时间（小时）"""
+    def _validate_filter_reminder_setting(self, hours):
+        """Validate the filter reminder setting (0-6000 hours)."""
         if not isinstance(hours, int) or not 0 <= hours <= 6000:
             self.logger.error(
                 f"Invalid filter reminder setting: {hours}. Must be between 0-6000 hours."
             )
             raise ValueError("Filter reminder setting must be between 0-6000 hours")
+        return hours
 
+    async def set_filter_reminder_setting(self, hours: int) -> bool:
+        """设置滤网提醒时间（小时）"""
+        self._validate_filter_reminder_setting(hours)
         self.logger.debug(f"Setting filter reminder to: {hours} hours")
-        result = self.modbus.write_single_register(
-            self.REGISTERS["filter_reminder_setting"], hours
-        )
-        if result:
-            self._update_cache_value("filter_reminder_setting", hours)
+        return await self._write_register("filter_reminder_setting", hours)
 
     @property
     def filter_reminder(self):
         """获取滤网提醒状态（0无提醒，1提醒）"""
-        value = self._get_register_value("filter_reminder")
-        return bool(value) if value is not None else None
+        return self._field("filter_reminder")
 
-    def reset_filter_usage_time(self):
+    async def reset_filter_usage_time(self):
         """重置滤网使用时间（写入1清除提醒）"""
         self.logger.debug("Resetting filter usage time")
-        result = self.modbus.write_single_register(
-            self.REGISTERS["filter_usage_time"], 1
+        # Like the setters, raise CircuitOpenError while the unit is offline.
+        result = (
+            await self.modbus.submit_write(self.REGISTERS["filter_usage_time"], 1)
+            is not None
         )
         if result:
             # The coordinator refreshes the complete snapshot after this write.
@@ -533,15 +1102,95 @@ class FreshAirSystem:
         return result
 
 
+_SNAPSHOT_START = min(FreshAirSystem.REGISTERS.values())
+_SPEED_NAMES = {1: "low", 2: "medium", 3: "high"}
+_MODES = {0: OperationMode.MANUAL, 1: OperationMode.AUTO, 2: OperationMode.TIMER}
+
+
+def _decode_mode(value):
+    if not 0 <= value <= 5:
+        _LOGGER.warning(f"Invalid mode value: {value}, defaulting to MANUAL")
+    return _MODES.get(value, OperationMode.MANUAL)
+
+
+class RegisterSnapshot:
+    """Registers of one refresh, decoded once and never modified.
+
+    raw spans every known register; registers the refresh did not cover are
+    0 in raw and None in the decoded fields. version increases with every
+    snapshot a FreshAirSystem publishes.
+    """
+
+    START = _SNAPSHOT_START
+    SIZE = max(FreshAirSystem.REGISTERS.values()) - START + 1
+
+    # (field, register, offset into raw, decoder) computed once.
+    _DECODERS = tuple(
+        (
+            field,
+            register,
+            FreshAirSystem.REGISTERS[register] - _SNAPSHOT_START,
+            decode,
+        )
+        for field, register, decode in (
+            ("power", "power", bool),
+            ("mode", "mode", _decode_mode),
+            ("supply_speed", "supply_speed", _SPEED_NAMES.get),
+            ("exhaust_speed", "exhaust_speed", _SPEED_NAMES.get),
+            ("bypass", "bypass", bool),
+            ("actual_supply_speed", "actual_supply", int),
+            ("actual_exhaust_speed", "actual_exhaust", int),
+            ("temperature", "temperature", lambda value: value / 10),
+            ("humidity", "humidity", lambda value: value / 10),
+            ("filter_usage_time", "filter_usage_time", int),
+            ("filter_reminder_setting", "filter_reminder_setting", int),
+            ("filter_reminder", "filter_reminder", bool),
+        )
+    )
+
+    __slots__ = ("raw", "version", *(decoder[0] for decoder in _DECODERS))
+
+    def __init__(self, registers, version):
+        """Decode registers from START onwards, with None for unread ones."""
+        set_field = object.__setattr__
+        set_field(self, "raw", array("H", [value or 0 for value in registers]))
+        set_field(self, "version", version)
+        for field, _, offset, decode in self._DECODERS:
+            value = registers[offset] if offset < len(registers) else None
+            set_field(self, field, None if value is None else decode(value))
+
+    @classmethod
+    def empty(cls):
+        """Return the snapshot that precedes the first successful read."""
+        return cls([None] * cls.SIZE, 0)
+
+    def changed_registers(self, previous) -> frozenset[str]:
+        """Return the names of registers whose decoded value differs."""
+        if previous is self:
+            return frozenset()
+        return frozenset(
+            register
+            for field, register, _, _ in self._DECODERS
+            if getattr(self, field) != getattr(previous, field)
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
 # 只在直接运行此文件时执行测试代码
 if __name__ == "__main__":
 
-    def test_fresh_air_system():
+    async def test_fresh_air_system():
         host = "192.168.6.137"
         # host="127.0.0.1"
         system = FreshAirSystem(host, 8899, 1)
 
         # 读取所有状态
+        await system.refresh_registers(force_refresh=True)
         print(f"电源状态: {system.power}")
         print(f"运行模式: {system.mode}")
         print(f"送风速度设置: {system.supply_speed}")
@@ -552,13 +1201,15 @@ if __name__ == "__main__":
         print(f"温度: {system.temperature}°C")
         print(f"湿度: {system.humidity}%")
 
-        # system.power = True
-        system.exhaust_speed = 1
-        system.supply_speed = 1
+        # await system.set_power(True)
+        await system.set_exhaust_speed(1)
+        await system.set_supply_speed(1)
+        await system.refresh_registers(force_refresh=True)
         # print(f"电源状态: {system.power}")
         print(f"实际送风速度: {system.actual_supply_speed}")
         print(f"实际排风速度: {system.actual_exhaust_speed}")
         print(f"温度: {system.temperature}°C")
         print(f"湿度: {system.humidity}%")
+        await system.modbus.close()
 
-    test_fresh_air_system()
+    asyncio.run(test_fresh_air_system())
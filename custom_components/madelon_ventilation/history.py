@@ -0,0 +1,168 @@
+"""Ring buffer of recent register readings with rolling statistics."""
+
+from array import array
+from collections import deque
+
+from .fresh_air_controller import FreshAirSystem, RegisterSnapshot
+from .planner import PollTier
+
+# Registers with trend sensors. All of them are in the fast tier, so every
+# read of that tier adds one reading.
+HISTORY_REGISTERS = ("temperature", "humidity")
+HISTORY_TIER = PollTier.FAST
+
+
+class _Column:
+    """Running sums and min/max candidates of one register in the window."""
+
+    __slots__ = ("maxima", "minima", "sum", "sum_tv", "values")
+
+    def __init__(self, capacity):
+        self.values = array("H", bytes(2 * capacity))
+        self.sum = 0
+        # Sum of time times value, for the regression slope.
+        self.sum_tv = 0
+        # (sequence, value) pairs with increasing and decreasing values: the
+        # head is the minimum or maximum of the window.
+        self.minima = deque()
+        self.maxima = deque()
+
+
+class SnapshotHistory:
+    """Timestamped raw values of some registers over a sliding time window.
+
+    Readings live in fixed-size array('H') columns with an array('q') of
+    millisecond timestamps. A reading leaves the window when it is older
+    than window seconds or when capacity newer readings arrived. Every
+    statistic is kept up to date as readings enter and leave, so appending
+    and querying cost O(1) (amortised for min and max): mean and slope from
+    exact integer running sums, min and max from monotonic deques.
+
+    Values are raw register values; slopes are per hour.
+    """
+
+    def __init__(self, registers, capacity, window):
+        self.registers = tuple(registers)
+        self.capacity = capacity
+        self.window = window
+        self._times = array("q", bytes(8 * capacity))
+        self._columns = {name: _Column(capacity) for name in self.registers}
+        self._offsets = {
+            name: FreshAirSystem.REGISTERS[name] - RegisterSnapshot.START
+            for name in self.registers
+        }
+        self._origin = None
+        # Ring position of the oldest reading, readings held, and readings
+        # ever appended (the sequence number of the next one).
+        self._start = 0
+        self._count = 0
+        self._appended = 0
+        self._sum_t = 0
+        self._sum_tt = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp, registers) -> None:
+        """Add the readings of a snapshot's raw registers taken at timestamp."""
+        if self._origin is None:
+            self._origin = timestamp
+        # Integer milliseconds keep the running sums exact forever.
+        time_ms = round((timestamp - self._origin) * 1000)
+        oldest_allowed = time_ms - self.window * 1000
+        while self._count and (
+            self._count == self.capacity or self._times[self._start] < oldest_allowed
+        ):
+            self._evict()
+
+        self._append(
+            time_ms,
+            {name: registers[offset] for name, offset in self._offsets.items()},
+        )
+
+    def resize(self, capacity) -> None:
+        """Hold up to capacity readings from now on, keeping the newest ones."""
+        readings = [
+            (
+                self._times[index],
+                {name: column.values[index] for name, column in self._columns.items()},
+            )
+            for index in (
+                (self._start + position) % self.capacity
+                for position in range(self._count)
+            )
+        ][-capacity:]
+        self.capacity = capacity
+        self._times = array("q", bytes(8 * capacity))
+        self._columns = {name: _Column(capacity) for name in self.registers}
+        self._start = self._count = self._appended = 0
+        self._sum_t = self._sum_tt = 0
+        for time_ms, values in readings:
+            self._append(time_ms, values)
+
+    def _append(self, time_ms, values) -> None:
+        if None in values.values():
+            # Registers left out of the read; a partial reading would skew
+            # the window.
+            return
+        index = (self._start + self._count) % self.capacity
+        sequence = self._appended
+        self._times[index] = time_ms
+        self._sum_t += time_ms
+        self._sum_tt += time_ms * time_ms
+        for name, column in self._columns.items():
+            value = values[name]
+            column.values[index] = value
+            column.sum += value
+            column.sum_tv += time_ms * value
+            while column.minima and column.minima[-1][1] >= value:
+                column.minima.pop()
+            column.minima.append((sequence, value))
+            while column.maxima and column.maxima[-1][1] <= value:
+                column.maxima.pop()
+            column.maxima.append((sequence, value))
+        self._count += 1
+        self._appended += 1
+
+    def _evict(self) -> None:
+        index = self._start
+        sequence = self._appended - self._count
+        time_ms = self._times[index]
+        self._sum_t -= time_ms
+        self._sum_tt -= time_ms * time_ms
+        for column in self._columns.values():
+            value = column.values[index]
+            column.sum -= value
+            column.sum_tv -= time_ms * value
+            if column.minima[0][0] == sequence:
+                column.minima.popleft()
+            if column.maxima[0][0] == sequence:
+                column.maxima.popleft()
+        self._start = (index + 1) % self.capacity
+        self._count -= 1
+
+    def mean(self, register) -> float | None:
+        """Return the mean of the readings in the window."""
+        if not self._count:
+            return None
+        return self._columns[register].sum / self._count
+
+    def minimum(self, register) -> int | None:
+        """Return the smallest reading in the window."""
+        minima = self._columns[register].minima
+        return minima[0][1] if minima else None
+
+    def maximum(self, register) -> int | None:
+        """Return the largest reading in the window."""
+        maxima = self._columns[register].maxima
+        return maxima[0][1] if maxima else None
+
+    def slope(self, register) -> float | None:
+        """Return the least-squares trend of the window per hour."""
+        count = self._count
+        spread = count * self._sum_tt - self._sum_t * self._sum_t
+        if count < 2 or not spread:
+            return None
+        column = self._columns[register]
+        covariance = count * column.sum_tv - self._sum_t * column.sum
+        return covariance / spread * 3_600_000
@@ -0,0 +1,186 @@
+"""Local Modbus TCP server that shares one unit with other Modbus clients."""
+
+from __future__ import annotations
+
+# pyright: reportMissingImports=false
+import asyncio
+import logging
+import struct
+
+from homeassistant.core import CALLBACK_TYPE  # pyright: ignore[reportMissingImports]
+
+from .circuit_breaker import CircuitOpenError
+from .const import DEFAULT_PROXY_HOST
+from .coordinator import MadelonVentilationCoordinator
+from .fresh_air_controller import FreshAirSystem, RegisterSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+MAX_READ_COUNT = 125
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+GATEWAY_TARGET_FAILED = 0x0B
+
+# MBAP header: transaction ID, protocol ID, length, unit ID.
+_MBAP = struct.Struct(">HHHB")
+_REGISTER_NAMES = {
+    register: name for name, register in FreshAirSystem.REGISTERS.items()
+}
+
+
+class ModbusProxy:
+    """Answer Modbus TCP clients from the coordinator instead of the bus.
+
+    Reads of holding registers inside the snapshot span are served from the
+    register cache. When the tiers holding the requested registers were
+    last read more than max_age seconds ago, those tiers are read first;
+    concurrent clients wait for that one read. Writes are forwarded through
+    the integration's write queue, so the gateway only ever sees the
+    integration's connection.
+
+    Requests for another unit ID, and reads while the unit is unreachable,
+    answer Gateway Target Device Failed To Respond like the RS485 gateway.
+    """
+
+    def __init__(
+        self,
+        coordinator: MadelonVentilationCoordinator,
+        port: int,
+        max_age: float,
+        host: str = DEFAULT_PROXY_HOST,
+    ) -> None:
+        self._coordinator = coordinator
+        self._system = coordinator.system
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self._refresh_lock = asyncio.Lock()
+        self._unsubscribe: CALLBACK_TYPE | None = None
+
+    async def async_start(self) -> None:
+        """Start listening; port 0 picks a free port."""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        # Clients may read any register, so keep all of them in the plan.
+        self._unsubscribe = self._coordinator.async_subscribe_registers(
+            FreshAirSystem.REGISTERS
+        )
+        _LOGGER.info("Serving Modbus TCP clients on %s:%s", self.host, self.port)
+
+    async def async_stop(self) -> None:
+        """Close the listener and every client connection."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader, writer) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction, protocol, length, unit_id = _MBAP.unpack(header)
+                if length < 2:
+                    # No function code: the stream cannot be resynchronised.
+                    break
+                pdu = await reader.readexactly(length - 1)
+                if protocol != 0:
+                    continue
+                response = await self._respond(unit_id, pdu)
+                writer.write(
+                    _MBAP.pack(transaction, 0, len(response) + 1, unit_id) + response
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, unit_id: int, pdu: bytes) -> bytes:
+        """Return the response PDU to one request."""
+        function = pdu[0]
+        if unit_id != self._system.modbus.unit_id:
+            return _exception(function, GATEWAY_TARGET_FAILED)
+        try:
+            if function == READ_HOLDING_REGISTERS:
+                address, count = struct.unpack(">HH", pdu[1:5])
+                values = await self._read(address, count)
+                return struct.pack(f">BB{count}H", function, 2 * count, *values)
+            if function == WRITE_SINGLE_REGISTER:
+                address, value = struct.unpack(">HH", pdu[1:5])
+                await self._write(address, [value])
+                return pdu[:5]
+            if function == WRITE_MULTIPLE_REGISTERS:
+                address, count, _ = struct.unpack(">HHB", pdu[1:6])
+                values = struct.unpack(f">{count}H", pdu[6 : 6 + 2 * count])
+                await self._write(address, values)
+                return pdu[:5]
+        except ModbusException as error:
+            return _exception(function, error.code)
+        except struct.error:
+            return _exception(function, ILLEGAL_DATA_VALUE)
+        return _exception(function, ILLEGAL_FUNCTION)
+
+    async def _read(self, address: int, count: int) -> list[int]:
+        start = address - RegisterSnapshot.START
+        if not 1 <= count <= MAX_READ_COUNT or start < 0:
+            raise ModbusException(ILLEGAL_DATA_ADDRESS)
+        if start + count > RegisterSnapshot.SIZE:
+            raise ModbusException(ILLEGAL_DATA_ADDRESS)
+        names = [
+            _REGISTER_NAMES[register]
+            for register in range(address, address + count)
+            if register in _REGISTER_NAMES
+        ]
+        if not self._is_fresh(names):
+            async with self._refresh_lock:
+                # Another client may have refreshed while this one waited.
+                if not self._is_fresh(names):
+                    await self._coordinator.async_refresh_older_than(self.max_age)
+        registers = self._system.registers
+        if not self._system.available or registers is None:
+            raise ModbusException(GATEWAY_TARGET_FAILED)
+        return registers[start : start + count]
+
+    def _is_fresh(self, names) -> bool:
+        age = self._coordinator.snapshot_age(names)
+        return age is not None and age <= self.max_age
+
+    async def _write(self, address: int, values) -> None:
+        try:
+            success = await self._system.write_registers(address, values)
+        except ValueError as error:
+            raise ModbusException(ILLEGAL_DATA_ADDRESS) from error
+        except CircuitOpenError as error:
+            raise ModbusException(GATEWAY_TARGET_FAILED) from error
+        if not success:
+            raise ModbusException(GATEWAY_TARGET_FAILED)
+        # Entities show the written values without waiting for the next poll.
+        self._coordinator.async_set_updated_data(self._system)
+
+
+class ModbusException(Exception):
+    """A request that is answered with a Modbus exception code."""
+
+    def __init__(self, code: int) -> None:
+        super().__init__(code)
+        self.code = code
+
+
+def _exception(function: int, code: int) -> bytes:
+    return bytes((function | 0x80, code))
@@ -0,0 +1,193 @@
+"""Mirror the coordinator on the MQTT topics of the former Node-RED flow."""
+
+from __future__ import annotations
+
+# pyright: reportMissingImports=false
+import json
+import logging
+
+from homeassistant.components import mqtt  # pyright: ignore[reportMissingImports]
+from homeassistant.config_entries import (
+    ConfigEntry,  # pyright: ignore[reportMissingImports]
+)
+from homeassistant.core import (  # pyright: ignore[reportMissingImports]
+    CALLBACK_TYPE,
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers.event import (  # pyright: ignore[reportMissingImports]
+    async_call_later,
+)
+
+from .coordinator import MadelonVentilationCoordinator
+from .fresh_air_controller import CircuitOpenError, OperationMode
+
+_LOGGER = logging.getLogger(__name__)
+
+# Registers the published state is made of.
+STATE_REGISTERS = frozenset(
+    {"power", "mode", "bypass", "supply_speed", "temperature", "humidity"}
+)
+SPEEDS = ("low", "medium", "high")
+
+
+class MqttBridge:
+    """Publish snapshots to <prefix>/state/* and apply <prefix>/ctrl/* commands.
+
+    State topics match mqtt_solution/ventilation.yaml and are published
+    retained, and only when their payload changes:
+
+    - environment: JSON with temperature and humidity;
+    - mode: "off" while powered off, otherwise the operation mode with a
+      "_bypass" suffix while the bypass is open;
+    - speed: the supply speed, low, medium or high.
+
+    Commands arriving within COALESCE_DELAY seconds of each other are merged
+    into one FreshAirSystem.apply_state call; a later command for the same
+    register replaces an earlier one.
+    """
+
+    COALESCE_DELAY = 0.2
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        coordinator: MadelonVentilationCoordinator,
+        prefix: str,
+    ) -> None:
+        self._hass = hass
+        self._entry = config_entry
+        self._coordinator = coordinator
+        self._prefix = prefix.strip("/")
+        self._published: dict[str, str] = {}
+        self._pending: dict[str, object] = {}
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._unsubscribe: list[CALLBACK_TYPE] = []
+
+    async def async_start(self) -> None:
+        """Wait for the MQTT client, then subscribe and publish the state."""
+        if not await mqtt.async_wait_for_mqtt_client(self._hass):
+            _LOGGER.warning("MQTT is not available; the MQTT bridge stays off")
+            return
+        self._unsubscribe.append(
+            self._coordinator.async_subscribe_registers(STATE_REGISTERS)
+        )
+        self._unsubscribe.append(
+            await mqtt.async_subscribe(
+                self._hass, f"{self._prefix}/ctrl/+", self._async_command
+            )
+        )
+        self._unsubscribe.append(
+            self._coordinator.async_add_listener(
+                self._async_publish_state, STATE_REGISTERS
+            )
+        )
+        self._async_publish_state()
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe and drop commands that were not written yet."""
+        while self._unsubscribe:
+            self._unsubscribe.pop()()
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        self._pending.clear()
+
+    @callback
+    def _async_publish_state(self) -> None:
+        system = self._coordinator.system
+        if not system.available:
+            # Retained messages keep the last known state.
+            return
+        for name, payload in self._state_payloads(system.snapshot).items():
+            topic = f"{self._prefix}/state/{name}"
+            if payload is None or self._published.get(topic) == payload:
+                continue
+            self._published[topic] = payload
+            self._entry.async_create_background_task(
+                self._hass,
+                mqtt.async_publish(self._hass, topic, payload, retain=True),
+                f"{topic} publish",
+            )
+
+    @staticmethod
+    def _state_payloads(snapshot) -> dict[str, str | None]:
+        """Return the payload of every state topic; None if not read yet."""
+        environment = mode = None
+        if snapshot.temperature is not None and snapshot.humidity is not None:
+            environment = json.dumps(
+                {"temperature": snapshot.temperature, "humidity": snapshot.humidity}
+            )
+        if snapshot.power is False:
+            mode = "off"
+        elif snapshot.power and snapshot.mode is not None:
+            mode = snapshot.mode.value + ("_bypass" if snapshot.bypass else "")
+        return {
+            "environment": environment,
+            "mode": mode,
+            "speed": snapshot.supply_speed,
+        }
+
+    @callback
+    def _async_command(self, message) -> None:
+        command = message.topic.rsplit("/", 1)[-1]
+        payload = message.payload.strip().lower()
+        fields = self._command_fields(command, payload)
+        if fields is None:
+            _LOGGER.warning(
+                "Ignoring MQTT command %s with payload %r", command, message.payload
+            )
+            return
+        for name, value in fields.items():
+            # Re-insert so that the latest command decides the write order.
+            self._pending.pop(name, None)
+            self._pending[name] = value
+        if self._cancel_flush is None:
+            self._cancel_flush = async_call_later(
+                self._hass, self.COALESCE_DELAY, self._async_schedule_flush
+            )
+
+    @staticmethod
+    def _command_fields(command: str, payload: str) -> dict[str, object] | None:
+        """Translate a ctrl command into FreshAirSystem fields, None if invalid."""
+        if command == "power" and payload in ("on", "off"):
+            return {"power": payload == "on"}
+        if command == "speed":
+            if payload == "off":
+                return {"power": False}
+            if payload in SPEEDS:
+                # Speed before power: never power on at the previous speed.
+                return {
+                    "supply_speed": payload,
+                    "exhaust_speed": payload,
+                    "power": True,
+                }
+        if command == "mode":
+            mode, _, bypass = payload.partition("_")
+            modes = {operation_mode.value for operation_mode in OperationMode}
+            if mode in modes and bypass in ("", "bypass"):
+                return {"mode": mode, "bypass": bool(bypass)}
+        return None
+
+    @callback
+    def _async_schedule_flush(self, _now) -> None:
+        self._cancel_flush = None
+        fields, self._pending = self._pending, {}
+        self._entry.async_create_background_task(
+            self._hass, self._async_write(fields), "MQTT bridge write"
+        )
+
+    async def _async_write(self, fields: dict[str, object]) -> None:
+        try:
+            success = await self._coordinator.system.apply_state(**fields)
+        except CircuitOpenError as error:
+            _LOGGER.warning("MQTT command not written: %s", error)
+            return
+        if success:
+            # The cache holds the written values; publish them right away.
+            self._coordinator.async_set_updated_data(self._coordinator.system)
+            return
+        _LOGGER.warning("MQTT command did not complete successfully")
+        await self._coordinator.async_request_refresh()
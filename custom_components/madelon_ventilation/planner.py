@@ -0,0 +1,84 @@
+"""Plan holding-register reads that cover only the registers in use."""
+
+from dataclasses import dataclass
+from enum import Enum
+
+# Modbus limits a single Read Holding Registers request to 125 registers.
+MAX_READ_COUNT = 125
+
+# Start, eight data bits and two parity/stop bits per byte on the RS485 line.
+BITS_PER_BYTE = 11
+# RTU request frame (8 bytes) plus response address, function, length and CRC.
+FRAME_BYTES = 13
+# 3.5 character silent intervals before the request and before the response.
+SILENT_CHARS = 7
+
+
+class PollTier(Enum):
+    """How often a register is worth reading."""
+
+    FAST = "fast"
+    NORMAL = "normal"
+    SLOW = "slow"
+
+
+@dataclass(frozen=True)
+class ReadCostModel:
+    """Estimated bus time of one read, in seconds.
+
+    Every read pays a fixed cost (the pacing interval enforced between
+    requests plus framing) and two bytes per register. Reading a gap of
+    unused registers is worth it whenever it costs less than the fixed cost
+    of one more round trip.
+    """
+
+    baud_rate: int = 9600
+    pacing: float = 0.2
+
+    @property
+    def register_cost(self) -> float:
+        """Return the transfer time of one register."""
+        return 2 * BITS_PER_BYTE / self.baud_rate
+
+    @property
+    def request_cost(self) -> float:
+        """Return the fixed cost of one read round trip."""
+        return (
+            self.pacing + (FRAME_BYTES + SILENT_CHARS) * BITS_PER_BYTE / self.baud_rate
+        )
+
+    def cost(self, count: int) -> float:
+        """Return the estimated duration of a read of count registers."""
+        return self.request_cost + count * self.register_cost
+
+
+def plan_reads(
+    addresses, model: ReadCostModel | None = None, max_count: int = MAX_READ_COUNT
+) -> tuple[tuple[int, int], ...]:
+    """Return the cheapest (start, count) windows covering every address.
+
+    Windows never overlap, so an optimal plan splits the sorted addresses
+    into consecutive runs. A dynamic program over split points finds it in
+    O(n^2) for n distinct addresses.
+    """
+    model = model or ReadCostModel()
+    points = sorted(set(addresses))
+    best = [0.0] + [float("inf")] * len(points)
+    split = [0] * (len(points) + 1)
+    for end in range(1, len(points) + 1):
+        for begin in range(end - 1, -1, -1):
+            count = points[end - 1] - points[begin] + 1
+            if count > max_count:
+                break
+            cost = best[begin] + model.cost(count)
+            if cost < best[end]:
+                best[end] = cost
+                split[end] = begin
+
+    windows = []
+    end = len(points)
+    while end:
+        begin = split[end]
+        windows.append((points[begin], points[end - 1] - points[begin] + 1))
+        end = begin
+    return tuple(reversed(windows))
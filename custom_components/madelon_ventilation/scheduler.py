@@ -0,0 +1,106 @@
+"""Priority-ordered access to a shared Modbus bus."""
+
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+
+class RequestPriority(IntEnum):
+    """Bus priorities; lower values are served first."""
+
+    WRITE = 0
+    CONFIRM = 1
+    POLL = 2
+
+
+class BusTicket:
+    """A caller's place in the bus queue."""
+
+    __slots__ = ("future", "owner", "priority", "sequence")
+
+    def __init__(self, priority, sequence, owner=None):
+        self.priority = priority
+        self.sequence = sequence
+        self.owner = owner
+        self.future = None
+
+    def promote(self, priority):
+        """Raise the priority of a ticket that is still waiting."""
+        if priority < self.priority:
+            self.priority = priority
+
+
+class BusScheduler:
+    """Grant exclusive bus access to the most urgent waiter first.
+
+    Among waiters with equal priority the owner (a Modbus unit ID) that was
+    served least recently goes first, so units sharing a gateway take turns;
+    one owner's requests keep their arrival order. A request that already
+    holds the bus is never interrupted; priorities only decide who goes next.
+    Queues are a handful of entries long, so a linear scan on release keeps
+    promotion of queued tickets trivial.
+    """
+
+    def __init__(self):
+        self._busy = False
+        self._queue = []
+        self._sequence = itertools.count()
+        # Owner -> number of its most recent grant.
+        self._grants = itertools.count()
+        self._last_served = {}
+
+    def locked(self):
+        """Return whether a request currently holds the bus."""
+        return self._busy
+
+    def ticket(self, priority, owner=None):
+        """Create a ticket that can be promoted before it is granted."""
+        return BusTicket(priority, next(self._sequence), owner)
+
+    @asynccontextmanager
+    async def access(self, ticket, owner=None):
+        """Hold the bus for the duration of the block."""
+        if not isinstance(ticket, BusTicket):
+            ticket = self.ticket(ticket, owner)
+        await self._acquire(ticket)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, ticket):
+        if not self._busy and not self._queue:
+            self._busy = True
+            self._last_served[ticket.owner] = next(self._grants)
+            return
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._queue.append(ticket)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            elif ticket.future.done() and not ticket.future.cancelled():
+                # Ownership was handed over just before the cancellation.
+                self._release()
+            raise
+
+    def _release(self):
+        while self._queue:
+            ticket = min(self._queue, key=self._turn)
+            self._queue.remove(ticket)
+            if not ticket.future.done():
+                # The bus stays busy; ownership moves to the next ticket.
+                self._last_served[ticket.owner] = next(self._grants)
+                ticket.future.set_result(None)
+                return
+        self._busy = False
+
+    def _turn(self, ticket):
+        return (
+            ticket.priority,
+            self._last_served.get(ticket.owner, -1),
+            ticket.sequence,
+        )
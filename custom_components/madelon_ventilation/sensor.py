@@ -4,9 +4,14 @@ from __future__ import annotations
 
 # pyright: reportMissingImports=false
 
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
 from homeassistant.components.sensor import (  # pyright: ignore[reportMissingImports]
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import (
@@ -14,10 +19,12 @@ from homeassistant.config_entries import (
 )
 from homeassistant.const import (  # pyright: ignore[reportMissingImports]
     PERCENTAGE,
+    EntityCategory,
     UnitOfTemperature,
     UnitOfTime,
 )
 from homeassistant.core import (  # pyright: ignore[reportMissingImports]
+    CALLBACK_TYPE,
     HomeAssistant,
     callback,
 )
@@ -27,13 +34,23 @@ from homeassistant.helpers.device_registry import (  # pyright: ignore[reportMis
 from homeassistant.helpers.entity_platform import (  # pyright: ignore[reportMissingImports]
     AddEntitiesCallback,
 )
+from homeassistant.helpers.event import (  # pyright: ignore[reportMissingImports]
+    async_call_later,
+)
 from homeassistant.helpers.update_coordinator import (  # pyright: ignore[reportMissingImports]
     CoordinatorEntity,
 )
 
-from .const import DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_SW_VERSION, DOMAIN
+from .const import (
+    DEVICE_MANUFACTURER,
+    DEVICE_MODEL,
+    DEVICE_SW_VERSION,
+    DOMAIN,
+)
 from .coordinator import MadelonVentilationCoordinator  # pyright: ignore[reportMissingImports]
+from .deadband import Deadband
 from .fresh_air_controller import FreshAirSystem
+from .history import SnapshotHistory
 
 
 async def async_setup_entry(
@@ -42,12 +59,22 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Fresh Air System sensors."""
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = entry_data["coordinator"]
+    deadbands = entry_data["deadbands"]
     async_add_entities(
         [
-            FreshAirTemperatureSensor(coordinator),
-            FreshAirHumiditySensor(coordinator),
+            FreshAirTemperatureSensor(coordinator, deadbands["temperature"]),
+            FreshAirHumiditySensor(coordinator, deadbands["humidity"]),
             FreshAirFilterUsageSensor(coordinator),
+            *(
+                FreshAirBusStatsSensor(coordinator, description)
+                for description in BUS_STATS_SENSORS
+            ),
+            *(
+                FreshAirTrendSensor(coordinator, description)
+                for description in TREND_SENSORS
+            ),
         ]
     )
 
@@ -57,9 +84,14 @@ class FreshAirSensorEntity(
 ):
     """Base class for sensors using the shared register snapshot."""
 
+    # Register names read by _update_from_snapshot; also the coordinator
+    # context, so that only changes to them notify the entity.
+    _registers: tuple[str, ...] = ()
+
     def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        # Entities without registers are notified on every update.
+        super().__init__(coordinator, frozenset(self._registers) or None)
         self._system: FreshAirSystem = coordinator.system
         self._attr_native_value = None
         if coordinator.last_update_success:
@@ -76,10 +108,22 @@ class FreshAirSensorEntity(
             sw_version=DEVICE_SW_VERSION,
         )
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark state restored from the previous run until a live read."""
+        return self.coordinator.stale_attributes
+
     def _update_from_snapshot(self) -> None:
         """Copy state from the latest successful shared snapshot."""
         raise NotImplementedError
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the registers this entity reads."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_subscribe_registers(self._registers)
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle a shared register snapshot update."""
@@ -88,7 +132,84 @@ class FreshAirSensorEntity(
         super()._handle_coordinator_update()
 
 
-class FreshAirTemperatureSensor(FreshAirSensorEntity):
+class FreshAirMeasurementSensor(FreshAirSensorEntity):
+    """Sensor that publishes a noisy measurement through a deadband."""
+
+    # Snapshot field holding the measurement.
+    _field: str
+
+    def __init__(
+        self,
+        coordinator: MadelonVentilationCoordinator,
+        deadband: Deadband | None = None,
+    ) -> None:
+        """Initialize the sensor; without a deadband every change is published."""
+        self._deadband = deadband or Deadband()
+        self._unsub_recheck: CALLBACK_TYPE | None = None
+        self._published_available = False
+        self._published_stale = False
+        super().__init__(coordinator)
+
+    def _update_from_snapshot(self) -> None:
+        self._attr_native_value = getattr(self._system.snapshot, self._field)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending deadband re-evaluation."""
+        self._cancel_recheck()
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write state and remember the published value."""
+        self._published_available = self.available
+        self._published_stale = self.coordinator.restored_at is not None
+        if self.available:
+            self._deadband.published(self._attr_native_value)
+            if self._deadband.max_silence:
+                # Unchanged registers notify nobody; the heartbeat needs a timer.
+                self._schedule_recheck(self._deadband.max_silence)
+        super().async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Publish the measurement when it leaves the deadband."""
+        if (
+            not self.coordinator.last_update_success
+            or not self._published_available
+            or self._published_stale
+        ):
+            # Availability changes and the first live value are always
+            # published.
+            self._cancel_recheck()
+            super()._handle_coordinator_update()
+            return
+
+        value = getattr(self._system.snapshot, self._field)
+        publish, recheck_after = self._deadband.evaluate(value)
+        if publish:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+        elif recheck_after is not None:
+            # A value held back by min_interval must not wait for the next
+            # register change.
+            self._schedule_recheck(recheck_after)
+
+    @callback
+    def _async_recheck(self, _now) -> None:
+        self._unsub_recheck = None
+        self._handle_coordinator_update()
+
+    def _schedule_recheck(self, delay: float) -> None:
+        self._cancel_recheck()
+        self._unsub_recheck = async_call_later(self.hass, delay, self._async_recheck)
+
+    def _cancel_recheck(self) -> None:
+        if self._unsub_recheck is not None:
+            self._unsub_recheck()
+            self._unsub_recheck = None
+
+
+class FreshAirTemperatureSensor(FreshAirMeasurementSensor):
     """Fresh Air System temperature sensor."""
 
     _attr_has_entity_name = True
@@ -96,19 +217,22 @@ class FreshAirTemperatureSensor(FreshAirSensorEntity):
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _registers = ("temperature",)
+    _field = "temperature"
 
-    def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
+    def __init__(
+        self,
+        coordinator: MadelonVentilationCoordinator,
+        deadband: Deadband | None = None,
+    ) -> None:
         """Initialize the temperature sensor."""
         self._attr_unique_id = (
             f"{DOMAIN}_{coordinator.system.unique_identifier}_temperature"
         )
-        super().__init__(coordinator)
-
-    def _update_from_snapshot(self) -> None:
-        self._attr_native_value = self._system.temperature
+        super().__init__(coordinator, deadband)
 
 
-class FreshAirHumiditySensor(FreshAirSensorEntity):
+class FreshAirHumiditySensor(FreshAirMeasurementSensor):
     """Fresh Air System humidity sensor."""
 
     _attr_has_entity_name = True
@@ -116,16 +240,19 @@ class FreshAirHumiditySensor(FreshAirSensorEntity):
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.HUMIDITY
+    _registers = ("humidity",)
+    _field = "humidity"
 
-    def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
+    def __init__(
+        self,
+        coordinator: MadelonVentilationCoordinator,
+        deadband: Deadband | None = None,
+    ) -> None:
         """Initialize the humidity sensor."""
         self._attr_unique_id = (
             f"{DOMAIN}_{coordinator.system.unique_identifier}_humidity"
         )
-        super().__init__(coordinator)
-
-    def _update_from_snapshot(self) -> None:
-        self._attr_native_value = self._system.humidity
+        super().__init__(coordinator, deadband)
 
 
 class FreshAirFilterUsageSensor(FreshAirSensorEntity):
@@ -136,6 +263,7 @@ class FreshAirFilterUsageSensor(FreshAirSensorEntity):
     _attr_native_unit_of_measurement = UnitOfTime.HOURS
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_icon = "mdi:air-filter"
+    _registers = ("filter_usage_time",)
 
     def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
         """Initialize the filter usage sensor."""
@@ -145,4 +273,181 @@ class FreshAirFilterUsageSensor(FreshAirSensorEntity):
         super().__init__(coordinator)
 
     def _update_from_snapshot(self) -> None:
-        self._attr_native_value = self._system.filter_usage_time
+        self._attr_native_value = self._system.snapshot.filter_usage_time
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+@dataclass(frozen=True, kw_only=True)
+class BusStatsSensorEntityDescription(SensorEntityDescription):
+    """Describe a diagnostic sensor backed by FreshAirSystem.stats()."""
+
+    value_fn: Callable[[dict[str, Any]], Any]
+    histogram: str | None = None
+
+
+def _latency_sensor(key: str, name: str) -> BusStatsSensorEntityDescription:
+    return BusStatsSensorEntityDescription(
+        key=key,
+        name=f"{name} p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats[key]["p95"]),
+        histogram=key,
+    )
+
+
+def _counter_sensor(key: str, name: str) -> BusStatsSensorEntityDescription:
+    return BusStatsSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats[key],
+    )
+
+
+BUS_STATS_SENSORS: tuple[BusStatsSensorEntityDescription, ...] = (
+    _latency_sensor("rtt", "Request round trip"),
+    _latency_sensor("lock_wait", "Bus wait"),
+    _latency_sensor("pacing", "Pacing delay"),
+    _latency_sensor("connect", "Connect time"),
+    _counter_sensor("retries", "Connection retries"),
+    _counter_sensor("timeouts", "Request timeouts"),
+    _counter_sensor("exception_responses", "Exception responses"),
+)
+
+
+class FreshAirBusStatsSensor(FreshAirSensorEntity):
+    """Diagnostic sensor exposing Modbus bus telemetry."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    entity_description: BusStatsSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: MadelonVentilationCoordinator,
+        description: BusStatsSensorEntityDescription,
+    ) -> None:
+        """Initialize the diagnostic sensor."""
+        self.entity_description = description
+        self._attr_unique_id = (
+            f"{DOMAIN}_{coordinator.system.unique_identifier}_bus_{description.key}"
+        )
+        self._histogram_attributes: dict[str, Any] | None = None
+        super().__init__(coordinator)
+
+    @property
+    def available(self) -> bool:
+        """Telemetry stays readable while the device itself is offline."""
+        return True
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return histogram details; telemetry is never restored."""
+        return self._histogram_attributes
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Refresh telemetry after every poll, including failed ones."""
+        self._update_from_snapshot()
+        self.async_write_ha_state()
+
+    def _update_from_snapshot(self) -> None:
+        stats = self._system.stats()
+        self._attr_native_value = self.entity_description.value_fn(stats)
+        histogram = self.entity_description.histogram
+        if histogram is not None:
+            summary = stats[histogram]
+            self._histogram_attributes = {
+                "count": summary["count"],
+                "p50_ms": _milliseconds(summary["p50"]),
+                "p99_ms": _milliseconds(summary["p99"]),
+                "max_ms": _milliseconds(summary["max"]),
+            }
+
+
+@dataclass(frozen=True, kw_only=True)
+class TrendSensorEntityDescription(SensorEntityDescription):
+    """Describe a rolling statistic of one register over the history window."""
+
+    register: str
+    value_fn: Callable[[SnapshotHistory, str], float | None]
+    # Raw register units per native unit.
+    scale: float = 0.1
+
+
+def _trend_sensors(
+    register: str, name: str, unit: str, device_class: SensorDeviceClass
+) -> tuple[TrendSensorEntityDescription, ...]:
+    statistics = (
+        ("mean", "24 h mean", SnapshotHistory.mean),
+        ("min", "24 h min", SnapshotHistory.minimum),
+        ("max", "24 h max", SnapshotHistory.maximum),
+    )
+    return (
+        *(
+            TrendSensorEntityDescription(
+                key=f"{register}_{key}",
+                name=f"{name} {label}",
+                native_unit_of_measurement=unit,
+                device_class=device_class,
+                state_class=SensorStateClass.MEASUREMENT,
+                register=register,
+                value_fn=value_fn,
+            )
+            for key, label, value_fn in statistics
+        ),
+        TrendSensorEntityDescription(
+            key=f"{register}_trend",
+            name=f"{name} 24 h trend",
+            native_unit_of_measurement=f"{unit}/h",
+            state_class=SensorStateClass.MEASUREMENT,
+            register=register,
+            value_fn=SnapshotHistory.slope,
+        ),
+    )
+
+
+TREND_SENSORS: tuple[TrendSensorEntityDescription, ...] = (
+    *_trend_sensors(
+        "temperature",
+        "Temperature",
+        UnitOfTemperature.CELSIUS,
+        SensorDeviceClass.TEMPERATURE,
+    ),
+    *_trend_sensors("humidity", "Humidity", PERCENTAGE, SensorDeviceClass.HUMIDITY),
+)
+
+
+class FreshAirTrendSensor(FreshAirSensorEntity):
+    """Rolling statistic computed from the coordinator's in-memory history."""
+
+    _attr_has_entity_name = True
+    _attr_entity_registry_enabled_default = False
+    entity_description: TrendSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: MadelonVentilationCoordinator,
+        description: TrendSensorEntityDescription,
+    ) -> None:
+        """Initialize the statistics sensor."""
+        self.entity_description = description
+        self._attr_unique_id = (
+            f"{DOMAIN}_{coordinator.system.unique_identifier}_{description.key}"
+        )
+        # No registers: the window moves on every read, changed or not. The
+        # coordinator keeps the history's registers in the reads itself.
+        super().__init__(coordinator)
+
+    def _update_from_snapshot(self) -> None:
+        description = self.entity_description
+        value = description.value_fn(self.coordinator.history, description.register)
+        self._attr_native_value = (
+            None if value is None else round(value * description.scale, 2)
+        )
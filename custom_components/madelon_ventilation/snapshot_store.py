@@ -0,0 +1,61 @@
+"""Persist the last good register snapshot across restarts."""
+
+from __future__ import annotations
+
+# pyright: reportMissingImports=false
+from datetime import datetime
+
+from homeassistant.core import (  # pyright: ignore[reportMissingImports]
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers.storage import Store  # pyright: ignore[reportMissingImports]
+from homeassistant.util import dt as dt_util  # pyright: ignore[reportMissingImports]
+
+from .const import DOMAIN
+
+
+class SnapshotStore:
+    """Raw registers of one config entry's last good read and its time.
+
+    Saves are debounced: the first save schedules a write SAVE_DELAY seconds
+    later and further saves only replace the data that write will store, so
+    polling causes at most one disk write per SAVE_DELAY. A pending write is
+    flushed when Home Assistant stops.
+    """
+
+    VERSION = 1
+    SAVE_DELAY = 300
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = Store(hass, self.VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+        self._data: dict | None = None
+
+    async def async_load(self) -> tuple[list, datetime] | None:
+        """Return the persisted registers and read time, if any."""
+        data = await self._store.async_load()
+        if not isinstance(data, dict):
+            return None
+        registers = data.get("registers")
+        read_at = dt_util.parse_datetime(data.get("read_at") or "")
+        if not isinstance(registers, list) or read_at is None:
+            return None
+        return registers, read_at
+
+    @callback
+    def async_save(self, registers: list, read_at: datetime) -> None:
+        """Schedule persisting registers read at read_at."""
+        pending = self._data is not None
+        self._data = {"registers": registers, "read_at": read_at.isoformat()}
+        if not pending:
+            self._store.async_delay_save(self._data_to_save, self.SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        data, self._data = self._data, None
+        return data
+
+    async def async_remove(self) -> None:
+        """Delete the persisted snapshot."""
+        self._data = None
+        await self._store.async_remove()
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 # pyright: reportMissingImports=false
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 import logging
 from typing import Any
 
@@ -18,6 +18,9 @@ from homeassistant.core import (  # pyright: ignore[reportMissingImports]
     HomeAssistant,
     callback,
 )
+from homeassistant.exceptions import (  # pyright: ignore[reportMissingImports]
+    HomeAssistantError,
+)
 from homeassistant.helpers.device_registry import (  # pyright: ignore[reportMissingImports]
     DeviceInfo,
 )
@@ -30,7 +33,7 @@ from homeassistant.helpers.update_coordinator import (  # pyright: ignore[report
 
 from .const import DEVICE_MANUFACTURER, DEVICE_MODEL, DEVICE_SW_VERSION, DOMAIN
 from .coordinator import MadelonVentilationCoordinator  # pyright: ignore[reportMissingImports]
-from .fresh_air_controller import FreshAirSystem, OperationMode
+from .fresh_air_controller import CircuitOpenError, FreshAirSystem, OperationMode
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -55,9 +58,14 @@ class MadelonSwitchEntity(
 ):
     """Base class for switches using the shared register snapshot."""
 
+    # Register names read by _update_from_snapshot; also the coordinator
+    # context, so that only changes to them notify the entity.
+    _registers: tuple[str, ...] = ()
+
     def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator)
+        # Entities without registers are notified on every update.
+        super().__init__(coordinator, frozenset(self._registers) or None)
         self._system: FreshAirSystem = coordinator.system
         self._attr_has_entity_name = True
         self._attr_is_on = False
@@ -76,10 +84,22 @@ class MadelonSwitchEntity(
             sw_version=DEVICE_SW_VERSION,
         )
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark state restored from the previous run until a live read."""
+        return self.coordinator.stale_attributes
+
     def _update_from_snapshot(self) -> None:
         """Copy state from the latest successful shared snapshot."""
         raise NotImplementedError
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the registers this entity reads."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_subscribe_registers(self._registers)
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle a shared register snapshot update."""
@@ -90,7 +110,7 @@ class MadelonSwitchEntity(
     async def _async_write_state(
         self,
         target_state: bool,
-        write: Callable[[], bool],
+        write: Callable[[], Awaitable[bool]],
         failure_message: str,
     ) -> None:
         """Publish a requested state immediately and roll back failed writes."""
@@ -99,7 +119,14 @@ class MadelonSwitchEntity(
         self._attr_is_on = target_state
         self.async_write_ha_state()
 
-        success = await self.hass.async_add_executor_job(write)
+        try:
+            success = await write()
+        except CircuitOpenError as error:
+            # The device is known to be offline; fail the service call fast.
+            self._optimistic_write_pending = False
+            self._attr_is_on = previous_state
+            self.async_write_ha_state()
+            raise HomeAssistantError(str(error)) from error
         self._optimistic_write_pending = False
         if success:
             # The controller cache contains the acknowledged write. Publish it
@@ -116,6 +143,8 @@ class MadelonSwitchEntity(
 class MadelonAutoModeSwitch(MadelonSwitchEntity):
     """Representation of a Madelon Ventilation auto/manual mode switch."""
 
+    _registers = ("mode",)
+
     def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
         """Initialize the switch."""
         self._attr_name = "Auto Mode"
@@ -125,7 +154,7 @@ class MadelonAutoModeSwitch(MadelonSwitchEntity):
         super().__init__(coordinator)
 
     def _update_from_snapshot(self) -> None:
-        current_mode = self._system.mode
+        current_mode = self._system.snapshot.mode
         if current_mode is not None:
             self._attr_is_on = current_mode == OperationMode.AUTO
 
@@ -149,6 +178,8 @@ class MadelonAutoModeSwitch(MadelonSwitchEntity):
 class MadelonBypassSwitch(MadelonSwitchEntity):
     """Representation of a Madelon Ventilation bypass switch."""
 
+    _registers = ("bypass",)
+
     def __init__(self, coordinator: MadelonVentilationCoordinator) -> None:
         """Initialize the bypass switch."""
         self._attr_name = "Bypass"
@@ -156,7 +187,7 @@ class MadelonBypassSwitch(MadelonSwitchEntity):
         super().__init__(coordinator)
 
     def _update_from_snapshot(self) -> None:
-        bypass = self._system.bypass
+        bypass = self._system.snapshot.bypass
         if bypass is not None:
             self._attr_is_on = bypass
 
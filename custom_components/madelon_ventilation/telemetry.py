@@ -0,0 +1,91 @@
+"""Low-overhead Modbus bus telemetry."""
+
+from array import array
+from bisect import bisect_left
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds.
+
+    Recording is a bisect and two additions, so it is cheap enough to run on
+    every request. Quantiles are approximated by bucket upper bounds.
+    """
+
+    BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    __slots__ = ("counts", "maximum", "total")
+
+    def __init__(self):
+        # One extra bucket collects everything above the last bound.
+        self.counts = array("L", [0] * (len(self.BOUNDS) + 1))
+        self.total = 0.0
+        self.maximum = 0.0
+
+    @property
+    def count(self) -> int:
+        """Return the number of recorded samples."""
+        return sum(self.counts)
+
+    def record(self, seconds: float) -> None:
+        """Add one sample."""
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return the bucket bound that covers the given fraction of samples."""
+        count = self.count
+        if not count:
+            return None
+        threshold = fraction * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold and bucket_count:
+                if index < len(self.BOUNDS):
+                    return min(self.BOUNDS[index], self.maximum)
+                return self.maximum
+        return self.maximum
+
+    def summary(self) -> dict:
+        """Return count, mean, quantiles and raw buckets."""
+        count = self.count
+        return {
+            "count": count,
+            "mean": self.total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.maximum if count else None,
+            "buckets": {
+                **{
+                    f"le_{bound}": self.counts[i] for i, bound in enumerate(self.BOUNDS)
+                },
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class BusTelemetry:
+    """Histograms and counters describing one Modbus connection."""
+
+    HISTOGRAMS = ("connect", "lock_wait", "pacing", "rtt")
+    COUNTERS = ("requests", "retries", "timeouts", "exception_responses")
+
+    def __init__(self):
+        self.connect = Histogram()
+        self.lock_wait = Histogram()
+        self.pacing = Histogram()
+        self.rtt = Histogram()
+        self.requests = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.exception_responses = 0
+
+    def snapshot(self) -> dict:
+        """Return a point-in-time copy of every histogram and counter."""
+        return {
+            **{name: getattr(self, name) for name in self.COUNTERS},
+            **{name: getattr(self, name).summary() for name in self.HISTOGRAMS},
+        }
@@ -0,0 +1,89 @@
+"""Validated connections waiting for the config entry that was created for them."""
+
+from __future__ import annotations
+
+# pyright: reportMissingImports=false
+import logging
+from functools import partial
+
+from homeassistant.const import (  # pyright: ignore[reportMissingImports]
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import (  # pyright: ignore[reportMissingImports]
+    Event,
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers.event import (  # pyright: ignore[reportMissingImports]
+    async_call_later,
+)
+
+from .const import DOMAIN
+from .fresh_air_controller import FreshAirSystem
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TRANSPORT_CACHE = f"{DOMAIN}_transport_cache"
+# Seconds between validation and setup; the flow creates the entry at once.
+CLAIM_TIMEOUT = 30
+
+
+class TransportCache:
+    """Hand the system a config flow validated to the entry it creates.
+
+    A validated FreshAirSystem keeps its gateway connection and the register
+    block it just read. Setting up an entry for the same host, port and unit
+    claims it instead of opening another connection, which many RS485 WiFi
+    modules would refuse. Systems not claimed within CLAIM_TIMEOUT seconds,
+    or by shutdown, are closed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        # (host, port, unit ID) -> (system, monotonic read time, cancel timer)
+        self._parked: dict[tuple, tuple] = {}
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_close_all)
+
+    @classmethod
+    @callback
+    def async_get(cls, hass: HomeAssistant) -> TransportCache:
+        """Return the cache of this Home Assistant instance."""
+        if (cache := hass.data.get(DATA_TRANSPORT_CACHE)) is None:
+            cache = hass.data[DATA_TRANSPORT_CACHE] = cls(hass)
+        return cache
+
+    @callback
+    def async_park(self, system: FreshAirSystem, read_at: float) -> None:
+        """Keep a system whose registers were read at monotonic read_at."""
+        modbus = system.modbus
+        key = (modbus.host, modbus.port, modbus.unit_id)
+        if (parked := self._parked.pop(key, None)) is not None:
+            # A second validation of the same unit replaces the first.
+            parked[2]()
+            self._hass.async_create_task(parked[0].modbus.close())
+        cancel = async_call_later(
+            self._hass, CLAIM_TIMEOUT, partial(self._async_expire, key)
+        )
+        self._parked[key] = (system, read_at, cancel)
+
+    @callback
+    def async_claim(
+        self, host: str, port: int, unit_id: int
+    ) -> tuple[FreshAirSystem, float] | None:
+        """Take the parked system of a unit and its read time, if any."""
+        if (parked := self._parked.pop((host, port, unit_id), None)) is None:
+            return None
+        system, read_at, cancel = parked
+        cancel()
+        return system, read_at
+
+    async def _async_expire(self, key, _now) -> None:
+        if (parked := self._parked.pop(key, None)) is not None:
+            _LOGGER.debug("Closing unclaimed connection to %s:%s unit %s", *key)
+            await parked[0].modbus.close()
+
+    async def _async_close_all(self, _event: Event) -> None:
+        while self._parked:
+            _, (system, _, cancel) = self._parked.popitem()
+            cancel()
+            await system.modbus.close()
@@ -0,0 +1,12 @@
+"""Simulated Madelon units behind a Modbus TCP to RS485 gateway.
+
+Used for development, performance and soak testing without hardware:
+
+    python -m simulator --units 1,2 --drop-rate 0.01
+"""
+
+from .device import MadelonDevice
+from .faults import Fault, FaultProfile
+from .gateway import SimulatedGateway
+
+__all__ = ["Fault", "FaultProfile", "MadelonDevice", "SimulatedGateway"]
@@ -0,0 +1,78 @@
+"""Run the simulated gateway from the command line."""
+
+import argparse
+import asyncio
+import logging
+import random
+
+from . import FaultProfile, MadelonDevice, SimulatedGateway
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m simulator", description=__doc__.strip()
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument(
+        "--units", default="1", help="comma-separated unit IDs (default: 1)"
+    )
+    parser.add_argument(
+        "--baud", type=int, default=9600, help="RS485 baud rate; 0 disables timing"
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="simulated seconds per real second",
+    )
+    parser.add_argument("--seed", type=int, help="seed for drift and faults")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--lost-response-rate", type=float, default=0.0)
+    parser.add_argument("--exception-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-delay", type=float, default=2.0)
+    parser.add_argument("--half-open-rate", type=float, default=0.0)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args()
+
+
+async def _run(args):
+    rng = random.Random(args.seed)
+    devices = {
+        int(unit_id): MadelonDevice(
+            time_scale=args.time_scale, rng=random.Random(rng.random())
+        )
+        for unit_id in args.units.split(",")
+    }
+    faults = FaultProfile(
+        drop_rate=args.drop_rate,
+        lost_response_rate=args.lost_response_rate,
+        exception_rate=args.exception_rate,
+        slow_rate=args.slow_rate,
+        slow_delay=args.slow_delay,
+        half_open_rate=args.half_open_rate,
+    )
+    gateway = SimulatedGateway(
+        devices,
+        host=args.host,
+        port=args.port,
+        baud_rate=args.baud or None,
+        faults=faults,
+        rng=rng,
+    )
+    async with gateway:
+        await gateway.serve_forever()
+
+
+def main():
+    args = _parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Register-level model of one Madelon ventilation unit."""
+
+import math
+import random
+import time
+
+from custom_components.madelon_ventilation.fresh_air_controller import FreshAirSystem
+
+REGISTERS = FreshAirSystem.REGISTERS
+# The unit answers for every address from 0 up to the last mapped register;
+# unmapped addresses inside that span read as 0.
+REGISTER_COUNT = max(REGISTERS.values()) + 1
+
+
+class IllegalAddress(Exception):
+    """A request touched an address the unit does not implement."""
+
+
+class IllegalValue(Exception):
+    """A write carried a value the unit rejects."""
+
+
+class MadelonDevice:
+    """One unit behind the RS485 gateway.
+
+    Writes take effect immediately; everything else evolves with the clock
+    and is brought up to date before each request:
+
+    - actual_supply and actual_exhaust ramp toward the output of the speed
+      setting (percent, 0 while powered off) at RAMP_RATE percent per second;
+    - temperature and humidity wander around their ambient values as an
+      Ornstein-Uhlenbeck process: they relax toward them with time constant
+      DRIFT_TIME while noise keeps a standard deviation of *_NOISE;
+    - filter_usage_time counts powered hours and filter_reminder is raised
+      once it reaches filter_reminder_setting.
+
+    time_scale speeds up the clock for soak tests, so that filter hours pass
+    in seconds.
+    """
+
+    RAMP_RATE = 20.0
+    SPEED_OUTPUT = {1: 40, 2: 70, 3: 100}
+    DRIFT_TIME = 600.0
+    TEMPERATURE_NOISE = 0.3
+    HUMIDITY_NOISE = 1.5
+
+    # Inclusive bounds of every writable register.
+    LIMITS = {
+        "power": (0, 1),
+        "filter_reminder_setting": (0, 6000),
+        "mode": (0, 5),
+        "supply_speed": (1, 3),
+        "exhaust_speed": (1, 3),
+        "bypass": (0, 1),
+    }
+
+    def __init__(
+        self,
+        *,
+        temperature=21.0,
+        humidity=45.0,
+        ambient_temperature=None,
+        ambient_humidity=None,
+        filter_hours=0.0,
+        filter_reminder_setting=2000,
+        time_scale=1.0,
+        clock=time.monotonic,
+        rng=None,
+    ):
+        self.power = 1
+        self.mode = 0
+        self.supply_speed = 1
+        self.exhaust_speed = 1
+        self.bypass = 0
+        self.filter_reminder_setting = filter_reminder_setting
+        self.filter_hours = filter_hours
+        self.actual_supply = 0.0
+        self.actual_exhaust = 0.0
+        self.temperature = temperature
+        self.humidity = humidity
+        self.ambient_temperature = (
+            temperature if ambient_temperature is None else ambient_temperature
+        )
+        self.ambient_humidity = (
+            humidity if ambient_humidity is None else ambient_humidity
+        )
+        self.time_scale = time_scale
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._updated_at = clock()
+
+    def registers(self) -> list[int]:
+        """Return every register as the unit would report it now."""
+        self.advance()
+        values = [0] * REGISTER_COUNT
+        values[REGISTERS["power"]] = self.power
+        values[REGISTERS["filter_usage_time"]] = int(self.filter_hours)
+        values[REGISTERS["filter_reminder_setting"]] = self.filter_reminder_setting
+        values[REGISTERS["filter_reminder"]] = int(
+            bool(self.filter_reminder_setting)
+            and self.filter_hours >= self.filter_reminder_setting
+        )
+        values[REGISTERS["mode"]] = self.mode
+        values[REGISTERS["supply_speed"]] = self.supply_speed
+        values[REGISTERS["exhaust_speed"]] = self.exhaust_speed
+        values[REGISTERS["bypass"]] = self.bypass
+        values[REGISTERS["actual_supply"]] = round(self.actual_supply)
+        values[REGISTERS["actual_exhaust"]] = round(self.actual_exhaust)
+        values[REGISTERS["temperature"]] = round(self.temperature * 10) & 0xFFFF
+        values[REGISTERS["humidity"]] = round(self.humidity * 10)
+        return values
+
+    def read(self, address, count) -> list[int]:
+        """Return count registers starting at address."""
+        if count < 1 or address < 0 or address + count > REGISTER_COUNT:
+            raise IllegalAddress(address)
+        return self.registers()[address : address + count]
+
+    def write(self, address, values) -> None:
+        """Write consecutive registers starting at address, all or nothing."""
+        names = {register: name for name, register in REGISTERS.items()}
+        updates = []
+        for offset, value in enumerate(values):
+            name = names.get(address + offset)
+            if name == "filter_usage_time":
+                # Writing 1 resets the counter; nothing else is accepted.
+                if value != 1:
+                    raise IllegalValue(value)
+                updates.append(("filter_hours", 0.0))
+                continue
+            if name not in self.LIMITS:
+                raise IllegalAddress(address + offset)
+            low, high = self.LIMITS[name]
+            if not low <= value <= high:
+                raise IllegalValue(value)
+            updates.append((name, value))
+        self.advance()
+        for name, value in updates:
+            setattr(self, name, value)
+
+    def advance(self) -> None:
+        """Bring the simulated physics up to the current time."""
+        now = self._clock()
+        elapsed = (now - self._updated_at) * self.time_scale
+        self._updated_at = now
+        if elapsed <= 0:
+            return
+
+        step = self.RAMP_RATE * elapsed
+        self.actual_supply = _approach(
+            self.actual_supply, self._output(self.supply_speed), step
+        )
+        self.actual_exhaust = _approach(
+            self.actual_exhaust, self._output(self.exhaust_speed), step
+        )
+
+        # Exact discretisation, so the result does not depend on how often
+        # the unit is polled.
+        decay = math.exp(-elapsed / self.DRIFT_TIME)
+        spread = math.sqrt(1 - decay * decay)
+        self.temperature += (self.ambient_temperature - self.temperature) * (1 - decay)
+        self.temperature += self._rng.gauss(0, self.TEMPERATURE_NOISE * spread)
+        self.humidity += (self.ambient_humidity - self.humidity) * (1 - decay)
+        self.humidity += self._rng.gauss(0, self.HUMIDITY_NOISE * spread)
+        self.humidity = min(100.0, max(0.0, self.humidity))
+
+        if self.power:
+            self.filter_hours += elapsed / 3600
+
+    def _output(self, speed) -> int:
+        return self.SPEED_OUTPUT.get(speed, 0) if self.power else 0
+
+
+def _approach(value, target, step):
+    if value < target:
+        return min(target, value + step)
+    return max(target, value - step)
@@ -0,0 +1,53 @@
+"""Faults the simulated gateway can inject into Modbus transactions."""
+
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+
+
+class Fault(Enum):
+    """What goes wrong with one request."""
+
+    # The request frame is lost on the bus; the unit never sees it.
+    DROP = "drop"
+    # The unit acts on the request but its response frame is lost.
+    LOST_RESPONSE = "lost_response"
+    # The unit answers with a Slave Device Busy exception.
+    EXCEPTION = "exception"
+    # The unit answers after slow_delay seconds, holding the bus meanwhile.
+    SLOW = "slow"
+    # The gateway keeps the TCP connection open but never answers on it again.
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class FaultProfile:
+    """Per-request fault probabilities plus explicitly scheduled faults.
+
+    Scheduled faults are consumed first, one per request, in order. Rates
+    are checked in Fault declaration order and are independent of each
+    other, so their sum may exceed 1.
+    """
+
+    drop_rate: float = 0.0
+    lost_response_rate: float = 0.0
+    exception_rate: float = 0.0
+    slow_rate: float = 0.0
+    half_open_rate: float = 0.0
+    slow_delay: float = 2.0
+    scheduled: deque = field(default_factory=deque)
+
+    def schedule(self, fault: Fault, times: int = 1) -> None:
+        """Inject fault into the next times requests."""
+        self.scheduled.extend([fault] * times)
+
+    def draw(self, rng: random.Random) -> Fault | None:
+        """Return the fault for the next request, if any."""
+        if self.scheduled:
+            return self.scheduled.popleft()
+        for fault in Fault:
+            rate = getattr(self, f"{fault.value}_rate")
+            if rate and rng.random() < rate:
+                return fault
+        return None
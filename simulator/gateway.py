@@ -0,0 +1,184 @@
+"""Modbus TCP to RS485 gateway serving simulated Madelon units."""
+
+import asyncio
+import logging
+import random
+import struct
+from collections import Counter
+
+from custom_components.madelon_ventilation.planner import BITS_PER_BYTE, SILENT_CHARS
+
+from .device import IllegalAddress, IllegalValue, MadelonDevice
+from .faults import Fault, FaultProfile
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SLAVE_DEVICE_BUSY = 0x06
+GATEWAY_TARGET_FAILED = 0x0B
+
+# MBAP header: transaction ID, protocol ID, length, unit ID.
+_MBAP = struct.Struct(">HHHB")
+# Slave address and CRC that an RTU frame adds to a PDU on the RS485 side.
+_RTU_OVERHEAD = 3
+
+
+class SimulatedGateway:
+    """Serve Modbus TCP and forward each request to a unit on one RS485 bus.
+
+    Like the real gateway, requests from every connection share the bus one
+    at a time, and each occupies it for the RTU frame time at baud_rate
+    (None disables the timing). Unknown unit IDs answer Gateway Target
+    Device Failed To Respond after unit_timeout seconds. Faults are drawn
+    from faults for every request; stats counts requests and faults.
+    """
+
+    def __init__(
+        self,
+        devices=None,
+        *,
+        host="127.0.0.1",
+        port=0,
+        baud_rate=9600,
+        unit_timeout=0.1,
+        faults=None,
+        rng=None,
+    ):
+        self.devices = devices if devices is not None else {1: MadelonDevice()}
+        self.host = host
+        self.port = port
+        self.baud_rate = baud_rate
+        self.unit_timeout = unit_timeout
+        self.faults = faults or FaultProfile()
+        self.stats = Counter()
+        self._rng = rng or random.Random()
+        self._bus = asyncio.Lock()
+        self._server = None
+        self._connections = set()
+
+    async def start(self):
+        """Start listening; port 0 picks a free port."""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info(
+            "Simulating units %s on %s:%s", sorted(self.devices), self.host, self.port
+        )
+        return self
+
+    async def stop(self):
+        """Close the listener and every open connection."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        """Serve until cancelled."""
+        await self._server.serve_forever()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def frame_time(self, request_pdu_bytes, response_pdu_bytes) -> float:
+        """Return the RS485 time of one request and its response."""
+        if not self.baud_rate:
+            return 0.0
+        frame_bytes = request_pdu_bytes + response_pdu_bytes + 2 * _RTU_OVERHEAD
+        return (frame_bytes + SILENT_CHARS) * BITS_PER_BYTE / self.baud_rate
+
+    async def _serve_connection(self, reader, writer):
+        self._connections.add(writer)
+        self.stats["connections"] += 1
+        half_open = False
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction, protocol, length, unit_id = _MBAP.unpack(header)
+                if length < 2:
+                    # No function code: the stream cannot be resynchronised.
+                    self.stats["malformed"] += 1
+                    break
+                pdu = await reader.readexactly(length - 1)
+                if half_open or protocol != 0:
+                    continue
+                self.stats["requests"] += 1
+                fault = self.faults.draw(self._rng)
+                if fault is not None:
+                    self.stats[fault.value] += 1
+                if fault is Fault.HALF_OPEN:
+                    half_open = True
+                    continue
+                response = await self._transact(unit_id, pdu, fault)
+                if response is None:
+                    continue
+                writer.write(
+                    _MBAP.pack(transaction, 0, len(response) + 1, unit_id) + response
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _transact(self, unit_id, pdu, fault):
+        """Run one request on the bus and return the response PDU, if any."""
+        async with self._bus:
+            device = self.devices.get(unit_id)
+            if device is None:
+                await asyncio.sleep(self.unit_timeout)
+                return _exception(pdu[0], GATEWAY_TARGET_FAILED)
+            if fault is Fault.DROP:
+                # The unit never answers; the bus idles until the client gives up.
+                await asyncio.sleep(self.frame_time(len(pdu), 0))
+                return None
+            if fault is Fault.EXCEPTION:
+                response = _exception(pdu[0], SLAVE_DEVICE_BUSY)
+            else:
+                response = _execute(device, pdu)
+            await asyncio.sleep(self.frame_time(len(pdu), len(response)))
+            if fault is Fault.SLOW:
+                await asyncio.sleep(self.faults.slow_delay)
+            if fault is Fault.LOST_RESPONSE:
+                return None
+            return response
+
+
+def _execute(device, pdu):
+    function = pdu[0]
+    try:
+        if function == READ_HOLDING_REGISTERS:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            values = device.read(address, count)
+            return struct.pack(f">BB{count}H", function, 2 * count, *values)
+        if function == WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            device.write(address, [value])
+            return pdu[:5]
+        if function == WRITE_MULTIPLE_REGISTERS:
+            address, count, _ = struct.unpack(">HHB", pdu[1:6])
+            values = struct.unpack(f">{count}H", pdu[6 : 6 + 2 * count])
+            device.write(address, values)
+            return pdu[:5]
+    except IllegalAddress:
+        return _exception(function, ILLEGAL_DATA_ADDRESS)
+    except (IllegalValue, struct.error):
+        return _exception(function, ILLEGAL_DATA_VALUE)
+    return _exception(function, ILLEGAL_FUNCTION)
+
+
+def _exception(function, code):
+    return bytes((function | 0x80, code))
@@ -0,0 +1,137 @@
+"""Fixtures that record benchmark metrics and compare them with a baseline."""
+
+import json
+import platform
+import re
+import statistics
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.madelon_ventilation.fresh_air_controller import ModbusGateway
+from simulator import MadelonDevice, SimulatedGateway
+
+BASELINE = Path(__file__).with_name("baseline.json")
+# Metrics named scale_<entries>_<metric> form the scaling report.
+SCALE_METRIC = re.compile(r"scale_(\d+)_(\w+)")
+
+
+def percentiles(samples) -> dict[str, float]:
+    """Return p50, p95 and p99 of samples."""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+class Benchmark:
+    """Metrics of one benchmark test and their regression check.
+
+    A metric regresses when it is worse than its baseline value by more than
+    the baseline tolerance (a fraction). Metrics without a baseline only get
+    reported.
+    """
+
+    def __init__(self, results, baseline):
+        self._results = results
+        self._baseline = baseline
+        self._recorded = []
+
+    def record(self, name, value, unit, higher_is_better=False):
+        """Report one metric."""
+        self._results[name] = {
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+        self._recorded.append(name)
+
+    def regressions(self) -> list[str]:
+        """Describe the metrics of this test that regressed."""
+        tolerance = self._baseline.get("tolerance", 0.5)
+        failures = []
+        for name in self._recorded:
+            expected = self._baseline.get("metrics", {}).get(name)
+            if expected is None:
+                continue
+            result = self._results[name]
+            if result["higher_is_better"]:
+                limit = expected["value"] * (1 - tolerance)
+                regressed = result["value"] < limit
+            else:
+                limit = expected["value"] * (1 + tolerance)
+                regressed = result["value"] > limit
+            if regressed:
+                failures.append(
+                    f"{name}: {result['value']:.4g} {result['unit']} "
+                    f"(baseline {expected['value']:.4g}, limit {limit:.4g})"
+                )
+        return failures
+
+
+def scaling_report(results) -> dict[str, dict]:
+    """Tabulate scaling metrics by name and number of config entries."""
+    report = {}
+    for name, result in sorted(results.items()):
+        match = SCALE_METRIC.fullmatch(name)
+        if match is not None:
+            row = report.setdefault(
+                match[2], {"unit": result["unit"], "by_entries": {}}
+            )
+            row["by_entries"][int(match[1])] = result["value"]
+    for row in report.values():
+        row["by_entries"] = dict(sorted(row["by_entries"].items()))
+    return report
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(request):
+    """Collect metrics of every benchmark and write them out at the end."""
+    results = {}
+    yield results
+    if not results:
+        return
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": dict(sorted(results.items())),
+        "scaling": scaling_report(results),
+    }
+    path = Path(request.config.getoption("--benchmark-json"))
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    if request.config.getoption("--benchmark-save-baseline"):
+        baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        baseline.setdefault("tolerance", 0.5)
+        baseline["metrics"] = {
+            name: {"value": result["value"], "unit": result["unit"]}
+            for name, result in report["metrics"].items()
+        }
+        BASELINE.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+@pytest.fixture
+def benchmark(request, benchmark_results):
+    """Record metrics; fail the test when one regresses past the baseline."""
+    saving = request.config.getoption("--benchmark-save-baseline")
+    baseline = {}
+    if BASELINE.exists() and not saving:
+        baseline = json.loads(BASELINE.read_text())
+    bench = Benchmark(benchmark_results, baseline)
+    yield bench
+    failures = bench.regressions()
+    if failures:
+        pytest.fail("Benchmark regression:\n" + "\n".join(failures))
+
+
+@pytest.fixture
+async def simulated_gateway(socket_enabled):
+    """Run two simulated units without bus timing or client pacing.
+
+    The benchmarks measure the integration's own overhead; bus time is a
+    property of the hardware.
+    """
+    devices = {1: MadelonDevice(), 2: MadelonDevice()}
+    with patch.object(ModbusGateway, "MIN_COMMUNICATION_INTERVAL", 0):
+        async with SimulatedGateway(devices, baud_rate=None) as gateway:
+            yield gateway
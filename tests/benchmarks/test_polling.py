@@ -0,0 +1,123 @@
+"""Benchmarks of the polling and command paths against the simulator."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.fresh_air_controller import FreshAirSystem
+
+from .conftest import percentiles
+
+pytestmark = pytest.mark.benchmark
+
+WARMUP = 20
+POLLS = 300
+WRITES = 200
+CYCLES = 100
+FAN_OUTS = 500
+LAG_INTERVAL = 0.001
+
+
+@asynccontextmanager
+async def measure_loop_lag(samples):
+    """Record how late a periodic timer fires while the block runs."""
+
+    async def tick():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            samples.append(time.perf_counter() - started - LAG_INTERVAL)
+
+    task = asyncio.create_task(tick())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+def _record_latency(benchmark, name, samples):
+    for quantile, seconds in percentiles(samples).items():
+        benchmark.record(f"{name}_{quantile}", seconds * 1000, "ms")
+
+
+async def test_poll_throughput_and_read_latency(benchmark, simulated_gateway):
+    system = FreshAirSystem("127.0.0.1", simulated_gateway.port)
+    try:
+        for _ in range(WARMUP):
+            assert await system.refresh_registers(force_refresh=True)
+
+        latencies = []
+        lag = []
+        async with measure_loop_lag(lag):
+            cpu_started = time.process_time()
+            started = time.perf_counter()
+            for _ in range(POLLS):
+                poll_started = time.perf_counter()
+                assert await system.refresh_registers(force_refresh=True)
+                latencies.append(time.perf_counter() - poll_started)
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+    finally:
+        await system.modbus.close()
+
+    benchmark.record("polls_per_second", POLLS / elapsed, "1/s", True)
+    benchmark.record("cpu_per_poll", cpu / POLLS * 1000, "ms")
+    _record_latency(benchmark, "read_latency", latencies)
+    # Shared with the simulator running in the same loop.
+    benchmark.record("loop_lag_p99", percentiles(lag)["p99"] * 1000, "ms")
+
+
+async def test_write_latency(benchmark, simulated_gateway):
+    system = FreshAirSystem("127.0.0.1", simulated_gateway.port)
+    address = FreshAirSystem.REGISTERS["supply_speed"]
+    try:
+        for index in range(WARMUP):
+            assert await system.modbus.write_single_register(address, index % 3 + 1)
+
+        latencies = []
+        for index in range(WRITES):
+            started = time.perf_counter()
+            assert await system.modbus.write_single_register(address, index % 3 + 1)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await system.modbus.close()
+
+    _record_latency(benchmark, "write_latency", latencies)
+
+
+async def test_coordinator_cycle_and_entity_fan_out(hass, benchmark, simulated_gateway):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": simulated_gateway.port, "unit_id": 1},
+        entry_id="benchmark",
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+    for _ in range(WARMUP):
+        await coordinator.async_refresh()
+    cpu_started = time.process_time()
+    for _ in range(CYCLES):
+        await coordinator.async_refresh()
+    cycle_cpu = (time.process_time() - cpu_started) / CYCLES
+
+    # Forget the last dispatch so that every entity writes its state.
+    listeners = len(coordinator._listeners)
+    started = time.perf_counter()
+    for _ in range(FAN_OUTS):
+        coordinator._dispatched = None
+        coordinator.async_update_listeners()
+    fan_out = (time.perf_counter() - started) / FAN_OUTS
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    benchmark.record("cpu_per_coordinator_cycle", cycle_cpu * 1000, "ms")
+    benchmark.record("fan_out_per_update", fan_out * 1000, "ms")
+    benchmark.record("fan_out_per_entity", fan_out / listeners * 1e6, "us")
@@ -0,0 +1,164 @@
+"""Scaling benchmark: many config entries against simulated gateways."""
+
+import asyncio
+import time
+import tracemalloc
+from contextlib import AsyncExitStack, asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_SCAN_INTERVAL
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.madelon_ventilation.const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DOMAIN,
+)
+from custom_components.madelon_ventilation.fresh_air_controller import ModbusGateway
+from simulator import MadelonDevice, SimulatedGateway
+
+from .conftest import percentiles
+
+pytestmark = pytest.mark.benchmark
+
+# Units behind each simulated RS485 gateway.
+UNITS_PER_GATEWAY = 8
+POLL_INTERVAL = 1
+JITTER_SECONDS = 3.0
+SAMPLE_INTERVAL = 0.005
+
+
+class LoadSampler:
+    """Sample event-loop lag and default executor backlog while running."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self.lag = []
+        self.executor_queue = 0
+        self.executor_threads = 0
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            self.lag.append(time.perf_counter() - started - SAMPLE_INTERVAL)
+            executor = getattr(self._loop, "_default_executor", None)
+            if executor is not None:
+                self.executor_queue = max(
+                    self.executor_queue, executor._work_queue.qsize()
+                )
+                self.executor_threads = max(
+                    self.executor_threads, len(executor._threads)
+                )
+
+    @asynccontextmanager
+    async def sampling(self):
+        task = asyncio.create_task(self._run())
+        try:
+            yield self
+        finally:
+            task.cancel()
+
+
+async def _set_up(hass, entries):
+    # Setting up the integration first loads every entry of the domain at
+    # once; later passes load the unloaded entries one by one.
+    for entry in entries:
+        if entry.state is ConfigEntryState.NOT_LOADED:
+            assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert all(entry.state is ConfigEntryState.LOADED for entry in entries)
+
+
+async def _unload(hass, entries):
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize("entry_count", [10, 50, 200])
+async def test_scaling_with_config_entries(
+    hass, benchmark, socket_enabled, entry_count
+):
+    async with AsyncExitStack() as stack:
+        stack.enter_context(
+            patch.object(ModbusGateway, "MIN_COMMUNICATION_INTERVAL", 0)
+        )
+        entries = []
+        for first in range(0, entry_count, UNITS_PER_GATEWAY):
+            units = range(1, min(UNITS_PER_GATEWAY, entry_count - first) + 1)
+            gateway = await stack.enter_async_context(
+                SimulatedGateway(
+                    {unit: MadelonDevice() for unit in units}, baud_rate=None
+                )
+            )
+            for unit in units:
+                entry = MockConfigEntry(
+                    domain=DOMAIN,
+                    data={"host": "127.0.0.1", "port": gateway.port, "unit_id": unit},
+                    options={
+                        CONF_SCAN_INTERVAL: POLL_INTERVAL,
+                        CONF_FAST_SCAN_INTERVAL: POLL_INTERVAL,
+                        CONF_SLOW_SCAN_INTERVAL: POLL_INTERVAL,
+                        CONF_ADAPTIVE_POLLING: False,
+                    },
+                    entry_id=f"unit_{first + unit}",
+                )
+                entry.add_to_hass(hass)
+                entries.append(entry)
+
+        sampler = LoadSampler(hass.loop)
+        async with sampler.sampling():
+            started = time.perf_counter()
+            await _set_up(hass, entries)
+            setup_time = time.perf_counter() - started
+
+            # Let every coordinator poll on its own schedule.
+            updates = {entry.entry_id: [] for entry in entries}
+            for entry in entries:
+                coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+                entry.async_on_unload(
+                    coordinator.async_add_listener(
+                        lambda times=updates[entry.entry_id]: times.append(
+                            time.monotonic()
+                        )
+                    )
+                )
+            await asyncio.sleep(JITTER_SECONDS)
+        await _unload(hass, entries)
+
+        jitter = [
+            abs(later - earlier - POLL_INTERVAL)
+            for times in updates.values()
+            for earlier, later in zip(times, times[1:])
+        ]
+
+        # A second pass traces allocations; tracing would distort the timings.
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            await _set_up(hass, entries)
+            memory = (tracemalloc.get_traced_memory()[0] - before) / entry_count
+        finally:
+            tracemalloc.stop()
+        await _unload(hass, entries)
+
+    prefix = f"scale_{entry_count}_"
+    benchmark.record(prefix + "setup_time", setup_time * 1000, "ms")
+    benchmark.record(
+        prefix + "setup_time_per_entry", setup_time / entry_count * 1000, "ms"
+    )
+    benchmark.record(prefix + "memory_per_entry", memory / 1024, "KiB")
+    benchmark.record(
+        prefix + "loop_lag_p99", percentiles(sampler.lag)["p99"] * 1000, "ms"
+    )
+    benchmark.record(prefix + "loop_lag_max", max(sampler.lag) * 1000, "ms")
+    benchmark.record(prefix + "executor_queue_max", sampler.executor_queue, "jobs")
+    benchmark.record(prefix + "executor_threads", sampler.executor_threads, "threads")
+    benchmark.record(
+        prefix + "coordinator_jitter_p95", percentiles(jitter)["p95"] * 1000, "ms"
+    )
+    benchmark.record(prefix + "coordinator_jitter_max", max(jitter) * 1000, "ms")
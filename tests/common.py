@@ -0,0 +1,19 @@
+"""Shared helpers for Madelon Ventilation tests."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+MODBUS_CLIENT = (
+    "custom_components.madelon_ventilation.fresh_air_controller.AsyncModbusTcpClient"
+)
+
+
+def patch_modbus_client():
+    """Patch the pymodbus client class with awaitable request methods."""
+    mock_class = MagicMock()
+    client = mock_class.return_value
+    client.connected = True
+    client.connect = AsyncMock(return_value=True)
+    client.read_holding_registers = AsyncMock()
+    client.write_register = AsyncMock()
+    client.write_registers = AsyncMock()
+    return patch(MODBUS_CLIENT, mock_class)
@@ -1,6 +1,43 @@
 import pytest
 
+from custom_components.madelon_ventilation.fresh_air_controller import ModbusGateway
+
 
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     yield
+
+
+@pytest.fixture(autouse=True)
+def reset_gateway_registry():
+    """Keep shared gateways, and their mocked transports, per test."""
+    yield
+    ModbusGateway._registry.clear()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark",
+        action="store_true",
+        help="run tests marked benchmark and compare them with the baseline",
+    )
+    group.addoption(
+        "--benchmark-json",
+        default="benchmark-results.json",
+        help="file to write benchmark metrics to",
+    )
+    group.addoption(
+        "--benchmark-save-baseline",
+        action="store_true",
+        help="store benchmark metrics as the new baseline instead of comparing",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
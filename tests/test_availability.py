@@ -2,7 +2,7 @@
 
 # pyright: reportMissingImports=false
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from pytest_homeassistant_custom_component.common import (  # pyright: ignore[reportMissingImports]
@@ -12,6 +12,8 @@ from pytest_homeassistant_custom_component.common import (  # pyright: ignore[re
 from custom_components.madelon_ventilation.const import DOMAIN
 from custom_components.madelon_ventilation.fresh_air_controller import FreshAirSystem
 
+from .common import patch_modbus_client
+
 ENTITY_IDS = (
     "fan.fresh_air_system_supply_fan",
     "switch.fresh_air_system_bypass",
@@ -51,12 +53,10 @@ async def test_initial_setup_offline_creates_unavailable_entities(hass):
     with (
         patch(
             "custom_components.madelon_ventilation.fresh_air_controller."
-            "ModbusClient.MIN_COMMUNICATION_INTERVAL",
+            "ModbusGateway.MIN_COMMUNICATION_INTERVAL",
             0,
         ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-        ) as mock_modbus,
+        patch_modbus_client() as mock_modbus,
     ):
         client = mock_modbus.return_value
         client.connected = True
@@ -85,12 +85,10 @@ async def test_coordinator_failure_and_recovery_use_one_read_per_cycle(hass):
     with (
         patch(
             "custom_components.madelon_ventilation.fresh_air_controller."
-            "ModbusClient.MIN_COMMUNICATION_INTERVAL",
+            "ModbusGateway.MIN_COMMUNICATION_INTERVAL",
             0,
         ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-        ) as mock_modbus,
+        patch_modbus_client() as mock_modbus,
     ):
         client = mock_modbus.return_value
         client.connected = True
@@ -134,21 +132,23 @@ async def test_coordinator_failure_and_recovery_use_one_read_per_cycle(hass):
         await hass.async_block_till_done()
 
 
-def test_failed_forced_refresh_does_not_revalidate_ttl_cache():
+async def test_failed_forced_refresh_does_not_revalidate_ttl_cache():
     """A fresh-by-time cache cannot recover availability after a failed read."""
     system = FreshAirSystem("127.0.0.1")
-    system.modbus.read_registers = MagicMock(
+    system.modbus.read_registers = AsyncMock(
         side_effect=[_response(_registers(temperature=255)), None, None]
     )
 
-    assert system.refresh_registers(force_refresh=True) is True
+    assert await system.refresh_registers(force_refresh=True) is True
     assert system.temperature == 25.5
-    assert system.refresh_registers(force_refresh=True) is False
+    assert await system.refresh_registers(force_refresh=True) is False
     assert system.available is False
     assert system.temperature is None
-    assert system.modbus.read_registers.call_count == 3
+    assert await system.refresh_registers(force_refresh=False) is False
+    assert system.modbus.read_registers.await_count == 3
 
     system.modbus.read_registers.return_value = _response(_registers(temperature=201))
     system.modbus.read_registers.side_effect = None
+    assert await system.refresh_registers(force_refresh=False) is True
     assert system.temperature == 20.1
     assert system.available is True
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
 from homeassistant.components.button import (
@@ -12,6 +12,8 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.madelon_ventilation.const import DOMAIN
 
+from .common import patch_modbus_client
+
 
 @pytest.mark.asyncio
 async def test_button_entities(hass):
@@ -29,9 +31,7 @@ async def test_button_entities(hass):
     )
     entry.add_to_hass(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connect.return_value = True
         client.connected = True
@@ -0,0 +1,46 @@
+"""Tests for transport calibration against the simulator."""
+
+import pytest
+
+from custom_components.madelon_ventilation.calibration import (
+    CalibrationError,
+    async_calibrate,
+)
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+)
+from simulator import Fault, FaultProfile, MadelonDevice, SimulatedGateway
+
+
+async def test_calibration_takes_the_tightest_reliable_spacing(socket_enabled):
+    # A read fails once the spacing drops to 0.01 s.
+    faults = FaultProfile()
+    faults.scheduled.extend([None] * 7 + [Fault.EXCEPTION])
+    async with SimulatedGateway(
+        {1: MadelonDevice()}, baud_rate=None, faults=faults
+    ) as gateway:
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        try:
+            calibration = await async_calibrate(
+                system, samples=3, spacings=(0.1, 0.05, 0.01, 0.0)
+            )
+        finally:
+            await system.modbus.close()
+
+    assert [result.spacing for result in calibration.results] == [0.1, 0.05, 0.01]
+    assert calibration.results[-1].error_rate == pytest.approx(1 / 3)
+    assert calibration.profile.spacing == 0.05
+    # Local reads take milliseconds; the smallest timeout step covers them.
+    assert calibration.profile.timeout == 0.25
+    assert calibration.profile.retry_count == system.modbus.gateway.RETRY_COUNT
+
+
+async def test_calibration_fails_when_nothing_is_reliable(socket_enabled):
+    faults = FaultProfile(exception_rate=1.0)
+    async with SimulatedGateway({1: MadelonDevice()}, faults=faults) as gateway:
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        try:
+            with pytest.raises(CalibrationError):
+                await async_calibrate(system, samples=2, spacings=(0.0,))
+        finally:
+            await system.modbus.close()
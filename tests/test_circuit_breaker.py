@@ -0,0 +1,211 @@
+"""Tests for the offline-device circuit breaker."""
+
+# pyright: reportMissingImports=false
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from pymodbus.exceptions import ModbusIOException
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.madelon_ventilation.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+)
+from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.coordinator import (
+    MadelonVentilationCoordinator,
+)
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+    ModbusClient,
+    ModbusGateway,
+)
+from custom_components.madelon_ventilation.switch import MadelonBypassSwitch
+
+from .common import patch_modbus_client
+
+
+class FakeClock:
+    def __init__(self):
+        self.current = 100.0
+
+    def __call__(self):
+        return self.current
+
+
+def _breaker(clock, jitter=0.5):
+    return CircuitBreaker("device", clock=clock, jitter_source=lambda: jitter)
+
+
+def test_breaker_opens_after_threshold_and_backs_off_exponentially():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+
+    for _ in range(breaker.FAILURE_THRESHOLD - 1):
+        assert breaker.check() is False
+        breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.retry_after == pytest.approx(5.0)
+    with pytest.raises(CircuitOpenError, match="next connection attempt in 5s"):
+        breaker.check()
+
+    clock.current += 5.0
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.check() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_failure()
+    assert breaker.retry_after == pytest.approx(10.0)
+
+    for _ in range(10):
+        clock.current += breaker.retry_after
+        breaker.check()
+        breaker.record_failure()
+    assert breaker.retry_after == pytest.approx(breaker.MAX_BACKOFF)
+
+
+def test_breaker_applies_jitter_and_closes_after_successful_probe():
+    clock = FakeClock()
+    breaker = _breaker(clock, jitter=1.0)
+    for _ in range(breaker.FAILURE_THRESHOLD):
+        breaker.record_failure()
+    assert breaker.retry_after == pytest.approx(5.0 * 1.2)
+
+    clock.current += breaker.retry_after
+    assert breaker.check() is True
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.check() is False
+
+
+def test_abandoned_probe_allows_another_probe():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(breaker.FAILURE_THRESHOLD):
+        breaker.record_failure()
+    clock.current += breaker.retry_after
+
+    assert breaker.check() is True
+    breaker.release_probe()
+    assert breaker.check() is True
+
+
+async def test_open_circuit_fails_fast_without_connecting():
+    with patch_modbus_client() as mock_modbus:
+        transport = mock_modbus.return_value
+        transport.connected = False
+        transport.connect.return_value = False
+        client = ModbusClient("127.0.0.1")
+        client.gateway.retry_count = 1
+
+        for _ in range(client.gateway.breaker.FAILURE_THRESHOLD):
+            assert await client.read_registers(0, 18) is None
+        attempts = transport.connect.await_count
+
+        with pytest.raises(CircuitOpenError):
+            await client.read_registers(0, 18)
+        # The bool write API reports the open circuit as a failed write.
+        assert await client.write_single_register(9, 1) is False
+        with pytest.raises(CircuitOpenError):
+            await client.submit_write(9, 1)
+        with pytest.raises(CircuitOpenError):
+            await client.write_multiple_registers(7, [1, 1])
+
+    assert transport.connect.await_count == attempts
+
+
+async def test_silent_unit_does_not_open_the_gateway_circuit():
+    def read(address, count, device_id):
+        if device_id == 2:
+            raise ModbusIOException("No response received")
+        return MagicMock(registers=[0] * count)
+
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.side_effect = read
+        gateway = ModbusGateway("127.0.0.1")
+        gateway.spacing = 0
+        healthy = ModbusClient("127.0.0.1", unit_id=1, gateway=gateway)
+        silent = ModbusClient("127.0.0.1", unit_id=2, gateway=gateway)
+
+        for _ in range(2 * silent.breaker.FAILURE_THRESHOLD):
+            try:
+                assert await silent.read_registers(0, 18) is None
+            except CircuitOpenError:
+                pass
+        with pytest.raises(CircuitOpenError, match="unit 2"):
+            await silent.read_registers(0, 18)
+
+        assert gateway.breaker.state is CircuitState.CLOSED
+        assert silent.circuit_state is CircuitState.OPEN
+        assert healthy.circuit_state is CircuitState.CLOSED
+        response = await healthy.read_registers(0, 18)
+        assert response.registers == [0] * 18
+
+
+async def test_unreachable_gateway_opens_the_circuit_of_every_unit():
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.side_effect = (
+            ConnectionResetError()
+        )
+        gateway = ModbusGateway("127.0.0.1")
+        gateway.spacing = 0
+        first = ModbusClient("127.0.0.1", unit_id=1, gateway=gateway)
+        second = ModbusClient("127.0.0.1", unit_id=2, gateway=gateway)
+
+        for _ in range(gateway.breaker.FAILURE_THRESHOLD):
+            assert await first.read_registers(0, 18) is None
+
+        with pytest.raises(CircuitOpenError, match="gateway"):
+            await second.read_registers(0, 18)
+        assert second.retry_after == pytest.approx(gateway.breaker.retry_after, abs=0.1)
+
+
+async def test_coordinator_stretches_interval_while_circuit_is_open(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+    system = FreshAirSystem("127.0.0.1")
+    system.refresh_registers = AsyncMock(
+        side_effect=CircuitOpenError("Modbus device 127.0.0.1:8899", 240)
+    )
+    system.modbus.gateway.breaker = MagicMock(retry_after=240)
+    base = timedelta(seconds=60)
+    coordinator = MadelonVentilationCoordinator(hass, entry, system, base)
+
+    with pytest.raises(UpdateFailed, match="unreachable"):
+        await coordinator._async_update_data()
+    assert coordinator.update_interval == timedelta(seconds=240)
+
+    system.refresh_registers.side_effect = None
+    system.refresh_registers.return_value = True
+    await coordinator._async_update_data()
+    assert coordinator.update_interval == base
+
+
+async def test_switch_reports_open_circuit_and_rolls_back(hass):
+    system = MagicMock(spec=FreshAirSystem, unique_identifier="127.0.0.1:8899")
+    system.set_bypass.side_effect = CircuitOpenError("Modbus device", 30)
+    coordinator = MagicMock(system=system, last_update_success=False)
+    coordinator.async_request_refresh = AsyncMock()
+    bypass = MadelonBypassSwitch(coordinator)
+    bypass.hass = hass
+    bypass.async_write_ha_state = MagicMock()
+    bypass._attr_is_on = True
+
+    with pytest.raises(HomeAssistantError, match="unreachable"):
+        await bypass.async_turn_off()
+
+    assert bypass.is_on
+    assert bypass.async_write_ha_state.call_count == 2
+    coordinator.async_request_refresh.assert_not_awaited()
@@ -1,9 +1,39 @@
+import ipaddress
 from unittest.mock import MagicMock, patch
 
 import pytest
 from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_SCAN_INTERVAL
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.const import (
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MODBUS_PROXY,
+    CONF_MQTT_BRIDGE,
+    CONF_MQTT_PREFIX,
+    CONF_REQUEST_SPACING,
+    CONF_RETRY_COUNT,
+    CONF_TEMPERATURE_DEADBAND,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DOMAIN,
+    MIN_SCAN_INTERVAL,
+)
+from custom_components.madelon_ventilation.calibration import (
+    TRANSPORT_OPTIONS,
+    Calibration,
+    SpacingResult,
+)
+from custom_components.madelon_ventilation.discovery import Discovery
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    ModbusGateway,
+    TransportProfile,
+)
+
+from .common import patch_modbus_client
 
 
 @pytest.mark.asyncio
@@ -12,12 +42,14 @@ async def test_config_flow_user(hass):
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
+    assert result["type"] == data_entry_flow.FlowResultType.MENU
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "manual"}
+    )
     assert result["type"] == data_entry_flow.FlowResultType.FORM
-    assert result["step_id"] == "user"
+    assert result["step_id"] == "manual"
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         mock_modbus.return_value.connect.return_value = True
         mock_modbus.return_value.connected = True
         mock_response = MagicMock()
@@ -49,10 +81,11 @@ async def test_config_flow_cannot_connect(hass):
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "manual"}
+    )
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         mock_modbus.return_value.connect.return_value = False
         mock_modbus.return_value.connected = False
         mock_modbus.return_value.read_holding_registers.return_value = None
@@ -69,3 +102,224 @@ async def test_config_flow_cannot_connect(hass):
 
     assert result2["type"] == data_entry_flow.FlowResultType.FORM
     assert result2["errors"] == {"base": "cannot_connect"}
+
+
+@pytest.mark.asyncio
+async def test_options_flow_sets_polling_tiers(hass):
+    """The options flow stores one interval per polling tier."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"host": "127.0.0.1"})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    with patch(
+        "custom_components.madelon_ventilation.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            user_input={
+                CONF_FAST_SCAN_INTERVAL: 1,
+                CONF_SCAN_INTERVAL: 30,
+                CONF_SLOW_SCAN_INTERVAL: 1800,
+            },
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_FAST_SCAN_INTERVAL] == MIN_SCAN_INTERVAL
+    assert entry.options[CONF_SCAN_INTERVAL] == 30
+    assert entry.options[CONF_SLOW_SCAN_INTERVAL] == 1800
+    # Untouched fields keep their defaults.
+    assert entry.options[CONF_TEMPERATURE_DEADBAND] == DEFAULT_TEMPERATURE_DEADBAND
+    assert entry.options[CONF_ADAPTIVE_POLLING] is True
+    assert entry.options[CONF_MAX_SCAN_INTERVAL] == DEFAULT_MAX_SCAN_INTERVAL
+    assert entry.options[CONF_MQTT_BRIDGE] is False
+    assert entry.options[CONF_MQTT_PREFIX] == "madelon"
+    assert entry.options[CONF_MODBUS_PROXY] is False
+    assert "calibrate" not in entry.options
+
+
+@pytest.mark.asyncio
+async def test_options_flow_calibrates_the_running_gateway(hass):
+    """A calibrated profile is stored and applied without a reload."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"host": "127.0.0.1"})
+    entry.add_to_hass(hass)
+    profile = TransportProfile(0.05, 0.25, 2, 0.2)
+    calibration = Calibration(
+        profile, (SpacingResult(0.1, (0.07,), 0), SpacingResult(0.05, (0.08,), 0))
+    )
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.return_value = MagicMock(
+            registers=[0] * 18
+        )
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        # Saving the defaults once stores every option.
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        await hass.config_entries.options.async_configure(result["flow_id"], {})
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        with patch(
+            "custom_components.madelon_ventilation.config_flow.async_calibrate",
+            return_value=calibration,
+        ):
+            result = await hass.config_entries.options.async_configure(
+                result["flow_id"], {"calibrate": True}
+            )
+            assert result["type"] == data_entry_flow.FlowResultType.SHOW_PROGRESS
+            await hass.async_block_till_done()
+            result = await hass.config_entries.options.async_configure(
+                result["flow_id"]
+            )
+        assert result["step_id"] == "transport"
+        assert result["description_placeholders"]["results"] == (
+            "0.10 s: 0 failed, slowest 0.070 s; 0.05 s: 0 failed, slowest 0.080 s"
+        )
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], {CONF_RETRY_COUNT: 3}
+        )
+        await hass.async_block_till_done()
+
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        assert entry.options[CONF_REQUEST_SPACING] == 0.05
+        assert entry.options[CONF_RETRY_COUNT] == 3
+        assert hass.data[DOMAIN][entry.entry_id]["coordinator"] is coordinator
+        gateway = coordinator.system.modbus.gateway
+        assert gateway.profile == TransportProfile(0.05, 0.25, 3, 0.2)
+        # The next request reconnects with the new timeout.
+        await coordinator.async_refresh()
+        assert mock_modbus.call_args.kwargs["timeout"] == 0.25
+
+        # Dropping the calibrated options restores the default profile.
+        hass.config_entries.async_update_entry(
+            entry,
+            options={
+                key: value
+                for key, value in entry.options.items()
+                if key not in TRANSPORT_OPTIONS
+            },
+        )
+        await hass.async_block_till_done()
+        assert gateway.profile == ModbusGateway.default_profile()
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_config_flow_discovery_offers_found_gateways(hass):
+    """Discovered gateways that are not configured yet are offered in a picker."""
+    MockConfigEntry(domain=DOMAIN, data={"host": "192.168.1.60"}).add_to_hass(hass)
+    adapters = [
+        {
+            "enabled": True,
+            "ipv4": [{"address": "192.168.1.23", "network_prefix": 24}],
+        }
+    ]
+    with (
+        patch(
+            "custom_components.madelon_ventilation.config_flow.network.async_get_adapters",
+            return_value=adapters,
+        ),
+        patch(
+            "custom_components.madelon_ventilation.config_flow.async_discover_gateways",
+            return_value=Discovery(["192.168.1.50"], ["192.168.1.60"]),
+        ) as discover,
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"next_step_id": "discovery"}
+        )
+        assert result["type"] == data_entry_flow.FlowResultType.SHOW_PROGRESS
+        await hass.async_block_till_done()
+        result = await hass.config_entries.flow.async_configure(result["flow_id"])
+
+    discover.assert_called_once_with(
+        [ipaddress.IPv4Network("192.168.1.0/24")], known={"192.168.1.60"}
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "pick"
+    host_validator = result["data_schema"].schema["host"]
+    assert host_validator.container == ["192.168.1.50"]
+
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.return_value = MagicMock(
+            registers=[0] * 18
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"host": "192.168.1.50"}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert result["data"] == {"host": "192.168.1.50", "port": 8899, "unit_id": 1}
+
+
+@pytest.mark.asyncio
+async def test_config_flow_probe_creates_an_entry_per_unit(hass):
+    """Every chosen unit behind a probed gateway gets its own confirmed entry."""
+    MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="Fresh Air System - 192.168.1.50 (unit 3)",
+        data={"host": "192.168.1.50", "port": 8899, "unit_id": 3},
+    ).add_to_hass(hass)
+    with (
+        patch(
+            "custom_components.madelon_ventilation.config_flow.async_probe_units",
+            return_value=[1, 2, 3, 7],
+        ) as probe,
+        patch(
+            "custom_components.madelon_ventilation.async_setup_entry",
+            return_value=True,
+        ),
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"next_step_id": "probe"}
+        )
+        assert result["step_id"] == "probe"
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"host": "192.168.1.50"}
+        )
+        assert result["type"] == data_entry_flow.FlowResultType.SHOW_PROGRESS
+        await hass.async_block_till_done()
+        result = await hass.config_entries.flow.async_configure(result["flow_id"])
+
+        probe.assert_called_once_with("192.168.1.50", 8899)
+        assert result["step_id"] == "units"
+        assert result["data_schema"]({}) == {"units": ["1", "2", "7"]}
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"units": ["2", "7"]}
+        )
+        await hass.async_block_till_done()
+
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        assert result["title"] == "Fresh Air System - 192.168.1.50 (unit 2)"
+        # Unit 7 waits for its own confirmation.
+        assert sorted(
+            entry.data["unit_id"] for entry in hass.config_entries.async_entries(DOMAIN)
+        ) == [2, 3]
+        (discovered,) = hass.config_entries.flow.async_progress_by_handler(DOMAIN)
+        assert discovered["step_id"] == "confirm"
+        assert (
+            discovered["context"]["source"]
+            == config_entries.SOURCE_INTEGRATION_DISCOVERY
+        )
+
+        result = await hass.config_entries.flow.async_configure(
+            discovered["flow_id"], {}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert result["data"] == {"host": "192.168.1.50", "port": 8899, "unit_id": 7}
+    assert sorted(
+        entry.data["unit_id"] for entry in hass.config_entries.async_entries(DOMAIN)
+    ) == [2, 3, 7]
@@ -13,17 +13,28 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.madelon_ventilation.button import FilterResetButton
 from custom_components.madelon_ventilation.const import (
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
     DOMAIN,
 )
 from custom_components.madelon_ventilation.coordinator import (
     MadelonVentilationCoordinator,
 )
 from custom_components.madelon_ventilation.fan import FreshAirFan
-from custom_components.madelon_ventilation.fresh_air_controller import FreshAirSystem
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+    RegisterSnapshot,
+)
+from custom_components.madelon_ventilation.planner import PollTier
+from custom_components.madelon_ventilation.scheduler import RequestPriority
 from custom_components.madelon_ventilation.sensor import FreshAirTemperatureSensor
 from custom_components.madelon_ventilation.switch import MadelonBypassSwitch
 
+from .common import patch_modbus_client
+
 
 def _registers(*, power=1, supply_speed=1, bypass=1, temperature=255):
     registers = [0] * 18
@@ -62,10 +73,31 @@ async def test_coordinator_uses_public_refresh_contract(hass):
     result = await coordinator._async_update_data()
 
     assert result is system
-    system.refresh_registers.assert_called_once_with(True)
+    system.refresh_registers.assert_called_once_with(True, RequestPriority.POLL, None)
     assert not hasattr(system, "_read_all_registers")
 
 
+@pytest.mark.asyncio
+async def test_requested_refresh_reads_before_periodic_polls(hass):
+    """Refreshes requested after commands use confirmation priority once."""
+    entry = _entry(hass)
+    system = MagicMock(spec=FreshAirSystem)
+    system.refresh_registers.return_value = True
+    coordinator = MadelonVentilationCoordinator(
+        hass, entry, system, timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+    )
+
+    await coordinator.async_request_refresh()
+    await hass.async_block_till_done()
+    system.refresh_registers.assert_awaited_once_with(
+        True, RequestPriority.CONFIRM, None
+    )
+
+    await coordinator.async_refresh()
+    system.refresh_registers.assert_awaited_with(True, RequestPriority.POLL, None)
+    await coordinator.async_shutdown()
+
+
 @pytest.mark.asyncio
 async def test_all_platforms_share_one_batch_read_per_coordinator_cycle(hass):
     """Adding and notifying every platform does not duplicate the batch read."""
@@ -74,12 +106,10 @@ async def test_all_platforms_share_one_batch_read_per_coordinator_cycle(hass):
     with (
         patch(
             "custom_components.madelon_ventilation.fresh_air_controller."
-            "ModbusClient.MIN_COMMUNICATION_INTERVAL",
+            "ModbusGateway.MIN_COMMUNICATION_INTERVAL",
             0,
         ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-        ) as mock_modbus,
+        patch_modbus_client() as mock_modbus,
     ):
         client = mock_modbus.return_value
         client.connected = True
@@ -128,18 +158,33 @@ def test_entities_use_coordinator_without_legacy_polling():
 
 @pytest.mark.parametrize(
     ("options", "expected_seconds"),
-    [({}, DEFAULT_SCAN_INTERVAL), ({CONF_SCAN_INTERVAL: 42}, 42)],
+    [
+        (
+            {},
+            (
+                DEFAULT_FAST_SCAN_INTERVAL,
+                DEFAULT_SCAN_INTERVAL,
+                DEFAULT_SLOW_SCAN_INTERVAL,
+            ),
+        ),
+        (
+            {
+                CONF_FAST_SCAN_INTERVAL: 12,
+                CONF_SCAN_INTERVAL: 42,
+                CONF_SLOW_SCAN_INTERVAL: 600,
+            },
+            (12, 42, 600),
+        ),
+    ],
 )
 @pytest.mark.asyncio
 async def test_scan_interval_uses_default_or_configured_option(
     hass, options, expected_seconds
 ):
-    """The coordinator interval comes from config-entry options with a default."""
+    """Tier intervals come from config-entry options with defaults."""
     entry = _entry(hass, options=options)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connected = True
         client.read_holding_registers.return_value = _response(_registers())
@@ -147,19 +192,24 @@ async def test_scan_interval_uses_default_or_configured_option(
         assert await hass.config_entries.async_setup(entry.entry_id)
         await hass.async_block_till_done()
         coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-        assert coordinator.update_interval == timedelta(seconds=expected_seconds)
+        assert coordinator.poll_intervals == {
+            tier: timedelta(seconds=seconds)
+            for tier, seconds in zip(
+                (PollTier.FAST, PollTier.NORMAL, PollTier.SLOW), expected_seconds
+            )
+        }
+        # The schedule ticks when the fastest tier falls due.
+        assert coordinator.update_interval == timedelta(seconds=expected_seconds[0])
 
         assert await hass.config_entries.async_unload(entry.entry_id)
 
 
 @pytest.mark.asyncio
-async def test_options_change_reloads_coordinator_interval(hass):
-    """Changing options reloads the entry so a new interval takes effect."""
+async def test_options_change_applies_without_reload(hass):
+    """New options reach the running coordinator; a new port reloads."""
     entry = _entry(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connected = True
         client.read_holding_registers.return_value = _response(_registers())
@@ -168,12 +218,24 @@ async def test_options_change_reloads_coordinator_interval(hass):
         await hass.async_block_till_done()
         old_coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
-        hass.config_entries.async_update_entry(entry, options={CONF_SCAN_INTERVAL: 25})
+        hass.config_entries.async_update_entry(
+            entry, options={CONF_SCAN_INTERVAL: 25, CONF_FAST_SCAN_INTERVAL: 60}
+        )
+        await hass.async_block_till_done()
+
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        assert coordinator is old_coordinator
+        assert coordinator.poll_intervals[PollTier.NORMAL] == timedelta(seconds=25)
+        assert coordinator.history.capacity == 24 * 60 + 1
+        assert mock_modbus.call_count == 1
+
+        hass.config_entries.async_update_entry(entry, data={**entry.data, "port": 8900})
         await hass.async_block_till_done()
 
         new_coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
         assert new_coordinator is not old_coordinator
-        assert new_coordinator.update_interval == timedelta(seconds=25)
+        assert new_coordinator.system.modbus.port == 8900
+        assert new_coordinator.poll_intervals[PollTier.NORMAL] == timedelta(seconds=25)
 
         assert await hass.config_entries.async_unload(entry.entry_id)
 
@@ -186,12 +248,10 @@ async def test_successful_write_publishes_cache_before_hardware_reconciliation(h
     with (
         patch(
             "custom_components.madelon_ventilation.fresh_air_controller."
-            "ModbusClient.MIN_COMMUNICATION_INTERVAL",
+            "ModbusGateway.MIN_COMMUNICATION_INTERVAL",
             0,
         ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-        ) as mock_modbus,
+        patch_modbus_client() as mock_modbus,
     ):
         client = mock_modbus.return_value
         client.connected = True
@@ -235,9 +295,7 @@ async def test_unload_closes_modbus_once(hass):
     """Normal unload closes the Modbus client exactly once."""
     entry = _entry(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connected = True
         client.read_holding_registers.return_value = _response(_registers())
@@ -249,3 +307,161 @@ async def test_unload_closes_modbus_once(hass):
 
         client.close.assert_called_once_with()
         assert entry.entry_id not in hass.data[DOMAIN]
+
+
+@pytest.mark.asyncio
+async def test_tiers_are_read_when_due_and_merged_into_one_refresh(hass):
+    """Each cycle reads the due tiers together and waits for the next one."""
+    entry = _entry(hass)
+    system = MagicMock(spec=FreshAirSystem)
+    system.refresh_registers.return_value = True
+    coordinator = MadelonVentilationCoordinator(
+        hass,
+        entry,
+        system,
+        timedelta(seconds=60),
+        {PollTier.FAST: timedelta(seconds=20), PollTier.SLOW: timedelta(seconds=900)},
+    )
+
+    reads = []
+    for now in (0, 20, 40, 60, 80, 900):
+        with patch(
+            "custom_components.madelon_ventilation.coordinator.time.monotonic",
+            return_value=now,
+        ):
+            await coordinator._async_update_data()
+        reads.append(system.refresh_registers.await_args.args[2])
+        assert coordinator.update_interval == timedelta(seconds=20)
+
+    assert reads == [
+        None,
+        frozenset({PollTier.FAST}),
+        frozenset({PollTier.FAST}),
+        frozenset({PollTier.FAST, PollTier.NORMAL}),
+        frozenset({PollTier.FAST}),
+        None,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_listeners_are_notified_only_for_changed_registers(hass):
+    """Unchanged entities skip their update; availability changes reach all."""
+    entry = _entry(hass)
+    system = MagicMock(spec=FreshAirSystem)
+    coordinator = MadelonVentilationCoordinator(
+        hass, entry, system, timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+    )
+    calls = {"temperature": 0, "bypass": 0, "stats": 0}
+
+    def listener(name):
+        def update():
+            calls[name] += 1
+
+        return update
+
+    coordinator.async_add_listener(listener("temperature"), frozenset({"temperature"}))
+    coordinator.async_add_listener(listener("bypass"), frozenset({"bypass"}))
+    coordinator.async_add_listener(listener("stats"))
+
+    def publish(**registers):
+        raw = _registers(**registers)
+        system.snapshot = RegisterSnapshot(raw, system.snapshot.version + 1)
+        coordinator.async_set_updated_data(system)
+
+    system.snapshot = RegisterSnapshot.empty()
+    publish()
+    assert calls == {"temperature": 1, "bypass": 1, "stats": 1}
+
+    publish()
+    assert calls == {"temperature": 1, "bypass": 1, "stats": 2}
+
+    publish(bypass=0)
+    assert calls == {"temperature": 1, "bypass": 2, "stats": 3}
+
+    coordinator.last_update_success = False
+    coordinator.async_update_listeners()
+    assert calls == {"temperature": 2, "bypass": 3, "stats": 4}
+    coordinator.async_update_listeners()
+    assert calls == {"temperature": 2, "bypass": 3, "stats": 5}
+
+    publish(bypass=0)
+    assert calls == {"temperature": 3, "bypass": 4, "stats": 6}
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_adaptive_schedule_backs_off_and_confirms_changes(hass):
+    """Idle cycles stretch the schedule; writes and changes poll quickly."""
+    entry = _entry(hass)
+    system = MagicMock(spec=FreshAirSystem)
+    system.snapshot = RegisterSnapshot.empty()
+    registers = _registers()
+
+    async def refresh(force_refresh, priority, tiers):
+        system.snapshot = RegisterSnapshot(registers, system.snapshot.version + 1)
+        return True
+
+    system.refresh_registers.side_effect = refresh
+    coordinator = MadelonVentilationCoordinator(
+        hass,
+        entry,
+        system,
+        timedelta(seconds=60),
+        {PollTier.FAST: timedelta(seconds=20), PollTier.SLOW: timedelta(seconds=900)},
+        max_interval=timedelta(seconds=120),
+    )
+    clock = 0.0
+
+    async def cycle():
+        nonlocal clock
+        with patch(
+            "custom_components.madelon_ventilation.coordinator.time.monotonic",
+            return_value=clock,
+        ):
+            await coordinator._async_update_data()
+        clock += coordinator.update_interval.total_seconds()
+        return coordinator.update_interval.total_seconds()
+
+    delays = [await cycle() for _ in range(10)]
+    assert delays[:3] == [20, 30, 45]
+    assert delays[-1] == 120
+
+    # A drifting measurement only snaps the schedule back.
+    registers[16] += 1
+    assert await cycle() == 20
+
+    # A control change is confirmed quickly, then backs off again.
+    registers[9] = 0
+    assert await cycle() == coordinator.CONFIRM_INTERVAL
+    await cycle()
+    assert {PollTier.FAST, PollTier.NORMAL} <= (
+        system.refresh_registers.await_args.args[2] or set(PollTier)
+    )
+    delays = [await cycle() for _ in range(6)]
+    assert delays[:4] == [coordinator.CONFIRM_INTERVAL] * 4
+    assert delays[-1] > 20
+
+    # A write opens the same window without a prior change.
+    coordinator._open_confirm_window(clock)
+    assert await cycle() == coordinator.CONFIRM_INTERVAL
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_fixed_schedule_ignores_changes(hass):
+    """Without a maximum interval the tiers keep their configured intervals."""
+    entry = _entry(hass)
+    system = MagicMock(spec=FreshAirSystem)
+    system.refresh_registers.return_value = True
+    coordinator = MadelonVentilationCoordinator(
+        hass, entry, system, timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+    )
+
+    for now in (0, 60, 120):
+        with patch(
+            "custom_components.madelon_ventilation.coordinator.time.monotonic",
+            return_value=now,
+        ):
+            coordinator._open_confirm_window(now)
+            await coordinator._async_update_data()
+        assert coordinator.update_interval == timedelta(seconds=DEFAULT_SCAN_INTERVAL)
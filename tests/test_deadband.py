@@ -0,0 +1,58 @@
+"""Tests for the measurement deadband."""
+
+from custom_components.madelon_ventilation.deadband import Deadband
+
+
+class FakeClock:
+    def __init__(self):
+        self.current = 0.0
+
+    def __call__(self):
+        return self.current
+
+
+def test_first_value_and_changes_without_limits_are_published():
+    deadband = Deadband(clock=FakeClock())
+    assert deadband.evaluate(21.0) == (True, None)
+    deadband.published(21.0)
+    assert deadband.evaluate(21.0) == (False, None)
+    assert deadband.evaluate(21.1) == (True, None)
+
+
+def test_flicker_inside_the_band_is_dropped_but_drift_is_kept():
+    clock = FakeClock()
+    deadband = Deadband(delta=0.2, clock=clock)
+    deadband.published(21.0)
+    assert deadband.evaluate(21.1) == (False, None)
+    assert deadband.evaluate(20.9) == (False, None)
+    # Measured against the published value, so slow drift crosses the band.
+    assert deadband.evaluate(21.2) == (True, None)
+    assert deadband.evaluate(20.8) == (True, None)
+
+
+def test_min_interval_holds_back_changes_until_due():
+    clock = FakeClock()
+    deadband = Deadband(delta=0.2, min_interval=60, clock=clock)
+    deadband.published(21.0)
+    clock.current = 15
+    assert deadband.evaluate(22.0) == (False, 45)
+    clock.current = 60
+    assert deadband.evaluate(22.0) == (True, None)
+
+
+def test_heartbeat_publishes_after_max_silence():
+    clock = FakeClock()
+    deadband = Deadband(delta=0.2, max_silence=900, clock=clock)
+    deadband.published(21.0)
+    clock.current = 300
+    assert deadband.evaluate(21.1) == (False, 600)
+    clock.current = 900
+    assert deadband.evaluate(21.1) == (True, None)
+
+
+def test_unknown_values_are_always_published():
+    deadband = Deadband(delta=5, min_interval=60, clock=FakeClock())
+    deadband.published(21.0)
+    assert deadband.evaluate(None) == (True, None)
+    deadband.published(None)
+    assert deadband.evaluate(21.0) == (True, None)
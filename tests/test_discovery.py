@@ -0,0 +1,124 @@
+"""Tests for gateway discovery on the local network."""
+
+import asyncio
+import ipaddress
+
+import pytest
+
+from custom_components.madelon_ventilation.discovery import (
+    Discovery,
+    GatewayInUseError,
+    async_discover_gateways,
+    async_probe_units,
+    scan_networks,
+)
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+)
+from simulator import Fault, FaultProfile, MadelonDevice, SimulatedGateway
+
+# The test environment only allows connections to 127.0.0.1.
+LOOPBACK = ipaddress.IPv4Network("127.0.0.1/32")
+
+
+def test_scan_networks_are_bounded_and_local():
+    assert scan_networks(
+        [
+            ("192.168.1.23", 24),
+            ("10.1.2.3", 8),
+            ("192.168.1.40", 24),
+            ("127.0.0.1", 8),
+            ("169.254.10.1", 16),
+        ]
+    ) == [
+        ipaddress.IPv4Network("192.168.1.0/24"),
+        ipaddress.IPv4Network("10.1.2.0/24"),
+    ]
+
+
+async def test_only_hosts_answering_modbus_are_found(socket_enabled):
+    async with SimulatedGateway(baud_rate=None) as gateway:
+        discovery = await async_discover_gateways([LOOPBACK], gateway.port)
+        assert discovery == Discovery(["127.0.0.1"], [])
+
+    async def hang_up(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(hang_up, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        assert (await async_discover_gateways([LOOPBACK], port)).found == []
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def test_known_gateways_are_not_contacted(socket_enabled):
+    async with SimulatedGateway(baud_rate=None) as gateway:
+        assert await async_discover_gateways(
+            [LOOPBACK], gateway.port, known=["127.0.0.1"]
+        ) == Discovery([], ["127.0.0.1"])
+
+        # A loaded entry holds this gateway open.
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        try:
+            discovery = await async_discover_gateways([LOOPBACK], gateway.port)
+        finally:
+            await system.modbus.close()
+
+    assert discovery == Discovery([], ["127.0.0.1"])
+    assert gateway.stats["connections"] == 0
+
+
+async def test_probe_sweeps_every_unit_on_one_connection(socket_enabled):
+    devices = {unit_id: MadelonDevice() for unit_id in (1, 17, 247)}
+    async with SimulatedGateway(devices, unit_timeout=0.001) as gateway:
+        assert await async_probe_units("127.0.0.1", gateway.port) == [1, 17, 247]
+        assert gateway.stats["connections"] == 1
+        assert gateway.stats["requests"] == 247
+
+
+async def test_probe_counts_answers_after_the_timeout(socket_enabled):
+    # Unit 2 answers after the probe gave up on it; the pipeline moved on to
+    # units 3 and 4 meanwhile, and the slow answer still counts.
+    faults = FaultProfile(slow_delay=0.05)
+    faults.scheduled.extend([None, Fault.SLOW])
+    async with SimulatedGateway(
+        {2: MadelonDevice()}, baud_rate=None, unit_timeout=0.001, faults=faults
+    ) as gateway:
+        found = await async_probe_units(
+            "127.0.0.1", gateway.port, range(1, 5), timeout=0.02
+        )
+    assert found == [2]
+
+
+async def test_probe_refuses_a_gateway_in_use(socket_enabled):
+    async with SimulatedGateway(baud_rate=None) as gateway:
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        try:
+            with pytest.raises(GatewayInUseError):
+                await async_probe_units("127.0.0.1", gateway.port)
+        finally:
+            await system.modbus.close()
+        assert gateway.stats["connections"] == 0
+
+
+async def test_probe_gives_up_on_malformed_frames(socket_enabled):
+    async def garble(reader, writer):
+        await reader.read(1)
+        # MBAP header with a length of zero.
+        writer.write(bytes(7))
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(garble, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        found = await asyncio.wait_for(
+            async_probe_units("127.0.0.1", port, range(1, 4)), 1
+        )
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert found == []
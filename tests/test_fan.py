@@ -1,6 +1,7 @@
 # pyright: reportMissingImports=false
 
-from unittest.mock import AsyncMock, MagicMock, call, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call
 
 import pytest
 from homeassistant.components.fan import (
@@ -9,12 +10,17 @@ from homeassistant.components.fan import (
 from homeassistant.components.fan import (
     SERVICE_SET_PERCENTAGE,
     SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
 )
 from homeassistant.const import ATTR_ENTITY_ID
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.madelon_ventilation.const import DOMAIN
 from custom_components.madelon_ventilation.fan import FreshAirFan
+from custom_components.madelon_ventilation.fresh_air_controller import FreshAirSystem
+from custom_components.madelon_ventilation.scheduler import RequestPriority
+
+from .common import patch_modbus_client
 
 
 @pytest.mark.asyncio
@@ -33,9 +39,7 @@ async def test_fan_entities(hass):
     )
     entry.add_to_hass(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connect.return_value = True
         client.connected = True
@@ -91,6 +95,8 @@ async def test_fan_entities(hass):
             call(address=7, value=3, device_id=1),
             call(address=0, value=1, device_id=1),
         ]
+        # The read-only filter counter between them keeps the two apart.
+        client.write_registers.assert_not_called()
         supply_fan = hass.states.get("fan.fresh_air_system_supply_fan")
         assert supply_fan.state == "on"
         assert supply_fan.attributes["percentage"] == 100
@@ -100,8 +106,54 @@ async def test_fan_entities(hass):
         await hass.async_block_till_done()
 
 
+@pytest.mark.asyncio
+async def test_fan_whose_power_write_was_replaced_shows_the_device(hass):
+    """Coalesced opposite power writes leave neither fan showing a lost value."""
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={"host": "127.0.0.1"}, entry_id="test_entry"
+    )
+    entry.add_to_hass(hass)
+
+    with patch_modbus_client() as mock_modbus:
+        client = mock_modbus.return_value
+        registers = [0] * 18
+        registers[0] = 1  # power
+        registers[7] = registers[8] = 1  # low speeds
+        client.read_holding_registers.return_value = MagicMock(registers=registers)
+        client.write_register.return_value = MagicMock()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        system = hass.data[DOMAIN][entry.entry_id]["system"]
+
+        async def call(service, entity_id):
+            await hass.services.async_call(
+                FAN_DOMAIN, service, {ATTR_ENTITY_ID: entity_id}, blocking=True
+            )
+
+        # Both fans share the power register; hold the bus so the writes merge.
+        async with system.modbus.gateway.scheduler.access(RequestPriority.WRITE):
+            calls = [
+                hass.async_create_task(
+                    call(SERVICE_TURN_OFF, "fan.fresh_air_system_supply_fan")
+                ),
+                hass.async_create_task(
+                    call(SERVICE_TURN_ON, "fan.fresh_air_system_exhaust_fan")
+                ),
+            ]
+            for _ in range(10):
+                await asyncio.sleep(0)
+        await asyncio.gather(*calls)
+        await hass.async_block_till_done()
+
+        client.write_register.assert_awaited_once_with(address=0, value=1, device_id=1)
+        assert hass.states.get("fan.fresh_air_system_supply_fan").state == "on"
+        assert hass.states.get("fan.fresh_air_system_exhaust_fan").state == "on"
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
 def _fan_for_write_test(hass, *, is_on: bool):
-    system = MagicMock(unique_identifier="127.0.0.1:8899")
+    system = MagicMock(spec=FreshAirSystem, unique_identifier="127.0.0.1:8899")
     coordinator = MagicMock(system=system, last_update_success=False)
     coordinator.async_request_refresh = AsyncMock()
     fan = FreshAirFan(coordinator, "supply")
@@ -116,16 +168,12 @@ def _fan_for_write_test(hass, *, is_on: bool):
 async def test_percentage_writes_speed_before_power(hass):
     """A stopped fan receives its speed before the non-atomic power write."""
     fan, system, coordinator = _fan_for_write_test(hass, is_on=False)
-    writes = []
-    system.set_supply_speed.side_effect = lambda speed: (
-        writes.append(("speed", speed)) or True
-    )
-    system.set_power.side_effect = lambda state: writes.append(("power", state)) or True
+    system.apply_state.return_value = True
 
     await fan.async_set_percentage(100)
 
-    assert [name for name, _ in writes] == ["speed", "power"]
-    assert [value for _, value in writes] == ["high", True]
+    system.apply_state.assert_awaited_once_with(supply_speed="high", power=True)
+    assert list(system.apply_state.call_args.kwargs) == ["supply_speed", "power"]
     assert fan.is_on
     assert fan.percentage == 100
     coordinator.async_set_updated_data.assert_called_once_with(system)
@@ -133,15 +181,14 @@ async def test_percentage_writes_speed_before_power(hass):
 
 
 @pytest.mark.asyncio
-async def test_percentage_speed_failure_skips_power_and_refreshes(hass):
-    """A failed speed selection must not power on, but state is reconciled."""
+async def test_percentage_write_failure_rolls_back_and_refreshes(hass):
+    """A failed write is rolled back and state is reconciled."""
     fan, system, coordinator = _fan_for_write_test(hass, is_on=False)
-    system.set_supply_speed.return_value = False
+    system.apply_state.return_value = False
 
     await fan.async_set_percentage(66)
 
-    system.set_supply_speed.assert_called_once_with("medium")
-    system.set_power.assert_not_called()
+    system.apply_state.assert_awaited_once_with(supply_speed="medium", power=True)
     assert not fan.is_on
     assert fan.percentage == 0
     assert fan.async_write_ha_state.call_count == 2
@@ -153,12 +200,11 @@ async def test_percentage_speed_failure_skips_power_and_refreshes(hass):
 async def test_percentage_change_while_known_on_skips_power_write(hass):
     """Changing only speed does not rewrite known-on shared power state."""
     fan, system, coordinator = _fan_for_write_test(hass, is_on=True)
-    system.set_supply_speed.return_value = True
+    system.apply_state.return_value = True
 
     await fan.async_set_percentage(33)
 
-    system.set_supply_speed.assert_called_once_with("low")
-    system.set_power.assert_not_called()
+    system.apply_state.assert_awaited_once_with(supply_speed="low")
     assert fan.is_on
     assert fan.percentage == 33
     coordinator.async_set_updated_data.assert_called_once_with(system)
@@ -1,8 +1,7 @@
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import subprocess
 import sys
-from threading import Event
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -10,15 +9,21 @@ import custom_components.madelon_ventilation.fresh_air_controller as controller_
 from custom_components.madelon_ventilation.fresh_air_controller import (
     FreshAirSystem,
     ModbusClient,
+    ModbusGateway,
     OperationMode,
+    RegisterSnapshot,
+    RequestPriority,
 )
+from custom_components.madelon_ventilation.planner import PollTier
+
+from .common import patch_modbus_client
+
+_real_sleep = asyncio.sleep
 
 
 @pytest.fixture
 def mock_modbus_client():
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock:
+    with patch_modbus_client() as mock:
         client_instance = mock.return_value
         client_instance.connected = True
         yield client_instance
@@ -32,11 +37,18 @@ class FakeClock:
     def monotonic(self):
         return self.current
 
-    def sleep(self, seconds):
+    async def sleep(self, seconds):
         self.sleeps.append(seconds)
         self.current += seconds
 
 
+def _patch_clock(clock):
+    return (
+        patch.object(controller_module.time, "monotonic", side_effect=clock.monotonic),
+        patch.object(controller_module.asyncio, "sleep", side_effect=clock.sleep),
+    )
+
+
 def test_import_does_not_configure_root_logger():
     script = """
 import logging
@@ -51,37 +63,37 @@ assert root_logger.level == logging.DEBUG
     subprocess.run([sys.executable, "-c", script], check=True)
 
 
-def test_modbus_client_constructs_transport_with_explicit_timeout():
+async def test_modbus_client_constructs_transport_with_explicit_timeout():
     transport = MagicMock(connected=False)
-    transport.connect.return_value = False
+    transport.connect = AsyncMock(return_value=False)
     with patch.object(
-        controller_module, "ModbusTcpClient", return_value=transport
+        controller_module, "AsyncModbusTcpClient", return_value=transport
     ) as tcp:
         client = controller_module.ModbusClient("127.0.0.1")
-        client.retry_count = 1
+        client.gateway.retry_count = 1
 
-        assert client._ensure_connected() is False
+        assert await client.gateway._ensure_connected() is False
 
-    tcp.assert_called_once_with(host="127.0.0.1", port=8899, timeout=1.0)
+    tcp.assert_called_once_with(
+        host="127.0.0.1", port=8899, timeout=1.0, reconnect_delay=0
+    )
 
 
-def test_connect_false_retries_without_real_waiting(mock_modbus_client):
+async def test_connect_false_retries_without_real_waiting(mock_modbus_client):
     mock_modbus_client.connected = False
     mock_modbus_client.connect.return_value = False
     client = ModbusClient("127.0.0.1")
     clock = FakeClock()
 
-    with (
-        patch.object(controller_module.time, "monotonic", side_effect=clock.monotonic),
-        patch.object(controller_module.time, "sleep", side_effect=clock.sleep),
-    ):
-        assert client._ensure_connected() is False
+    monotonic, sleep = _patch_clock(clock)
+    with monotonic, sleep:
+        assert await client.gateway._ensure_connected() is False
 
-    assert mock_modbus_client.connect.call_count == 2
+    assert mock_modbus_client.connect.await_count == 2
     assert clock.sleeps == pytest.approx([0.2])
 
 
-def test_connection_retry_stops_when_budget_is_exhausted(mock_modbus_client):
+async def test_connection_retry_stops_when_budget_is_exhausted(mock_modbus_client):
     mock_modbus_client.connected = False
     clock = FakeClock()
 
@@ -92,34 +104,36 @@ def test_connection_retry_stops_when_budget_is_exhausted(mock_modbus_client):
     mock_modbus_client.connect.side_effect = consume_budget
     client = ModbusClient("127.0.0.1")
 
-    with (
-        patch.object(controller_module.time, "monotonic", side_effect=clock.monotonic),
-        patch.object(controller_module.time, "sleep", side_effect=clock.sleep),
-    ):
-        assert client._ensure_connected() is False
+    monotonic, sleep = _patch_clock(clock)
+    with monotonic, sleep:
+        assert await client.gateway._ensure_connected() is False
 
-    mock_modbus_client.connect.assert_called_once_with()
+    mock_modbus_client.connect.assert_awaited_once_with()
     assert clock.sleeps == []
 
 
-def test_modbus_client_reconnects_after_idempotent_close():
+async def test_modbus_client_reconnects_after_idempotent_close():
     first_transport = MagicMock(connected=True)
-    first_transport.read_holding_registers.return_value = MagicMock(registers=[1])
+    first_transport.read_holding_registers = AsyncMock(
+        return_value=MagicMock(registers=[1])
+    )
     second_transport = MagicMock(connected=True)
-    second_transport.read_holding_registers.return_value = MagicMock(registers=[2])
+    second_transport.read_holding_registers = AsyncMock(
+        return_value=MagicMock(registers=[2])
+    )
 
     with patch.object(
         controller_module,
-        "ModbusTcpClient",
+        "AsyncModbusTcpClient",
         side_effect=[first_transport, second_transport],
     ) as tcp:
         client = controller_module.ModbusClient("127.0.0.1")
-        first_response = client.read_registers(0, 1)
+        first_response = await client.read_registers(0, 1)
         assert first_response is not None
         assert first_response.registers == [1]
-        client.close()
-        client.close()
-        second_response = client.read_registers(0, 1)
+        await client.close()
+        await client.close()
+        second_response = await client.read_registers(0, 1)
         assert second_response is not None
         assert second_response.registers == [2]
 
@@ -128,52 +142,46 @@ def test_modbus_client_reconnects_after_idempotent_close():
     second_transport.close.assert_not_called()
 
 
-def test_modbus_client_rejects_modbus_error_responses(mock_modbus_client):
+async def test_modbus_client_rejects_modbus_error_responses(mock_modbus_client):
     client = ModbusClient("127.0.0.1")
-    client.MIN_COMMUNICATION_INTERVAL = 0
+    client.gateway.spacing = 0
     error_response = MagicMock()
     error_response.isError.return_value = True
     mock_modbus_client.read_holding_registers.return_value = error_response
     mock_modbus_client.write_register.return_value = error_response
 
-    assert client.read_registers(0, 1) is None
-    assert client.write_single_register(1, 1) is False
+    assert await client.read_registers(0, 1) is None
+    assert await client.write_single_register(1, 1) is False
 
 
-def test_modbus_client_enforces_interval_between_read_and_write(mock_modbus_client):
+async def test_modbus_client_enforces_interval_between_read_and_write(
+    mock_modbus_client,
+):
     client = ModbusClient("127.0.0.1")
     clock = FakeClock()
     mock_modbus_client.read_holding_registers.return_value = MagicMock(registers=[0])
     mock_modbus_client.write_register.return_value = MagicMock()
 
-    with (
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.time.monotonic",
-            side_effect=clock.monotonic,
-        ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.time.sleep",
-            side_effect=clock.sleep,
-        ),
-    ):
-        assert client.read_registers(0, 1) is not None
-        assert client.write_single_register(1, 1) is True
+    monotonic, sleep = _patch_clock(clock)
+    with monotonic, sleep:
+        assert await client.read_registers(0, 1) is not None
+        assert await client.write_single_register(1, 1) is True
 
     assert clock.sleeps == pytest.approx([0.2])
 
 
-def test_modbus_client_serializes_concurrent_requests(mock_modbus_client):
+async def test_modbus_client_serializes_concurrent_requests(mock_modbus_client):
     client = ModbusClient("127.0.0.1")
-    read_started = Event()
-    finish_read = Event()
-    write_started = Event()
+    read_started = asyncio.Event()
+    finish_read = asyncio.Event()
+    write_started = asyncio.Event()
 
-    def blocking_read(**kwargs):
+    async def blocking_read(**kwargs):
         read_started.set()
-        finish_read.wait(timeout=1)
+        await finish_read.wait()
         return MagicMock(registers=[0])
 
-    def tracked_write(**kwargs):
+    async def tracked_write(**kwargs):
         write_started.set()
         return MagicMock()
 
@@ -181,30 +189,133 @@ def test_modbus_client_serializes_concurrent_requests(mock_modbus_client):
     mock_modbus_client.write_register.side_effect = tracked_write
     clock = FakeClock()
 
-    with (
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.time.monotonic",
-            side_effect=clock.monotonic,
-        ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.time.sleep",
-            side_effect=clock.sleep,
-        ),
-        ThreadPoolExecutor(max_workers=2) as executor,
-    ):
-        read_future = executor.submit(client.read_registers, 0, 1)
-        assert read_started.wait(timeout=1)
-        write_future = executor.submit(client.write_single_register, 1, 1)
-        assert not write_started.wait(timeout=0.05)
+    monotonic, sleep = _patch_clock(clock)
+    with monotonic, sleep:
+        read_task = asyncio.create_task(client.read_registers(0, 1))
+        await asyncio.wait_for(read_started.wait(), timeout=1)
+        write_task = asyncio.create_task(client.write_single_register(1, 1))
+        for _ in range(5):
+            await _real_sleep(0)
+        assert not write_started.is_set()
         finish_read.set()
-        assert read_future.result(timeout=1) is not None
-        assert write_future.result(timeout=1) is True
+        assert await asyncio.wait_for(read_task, timeout=1) is not None
+        assert await asyncio.wait_for(write_task, timeout=1) is True
 
     assert write_started.is_set()
     assert clock.sleeps == pytest.approx([0.2])
 
 
-def test_reset_filter_usage_time_obeys_modbus_interval(mock_modbus_client):
+async def test_queued_writes_to_one_register_coalesce(mock_modbus_client):
+    client = ModbusClient("127.0.0.1")
+    client.gateway.spacing = 0
+    finish_read = asyncio.Event()
+
+    async def blocking_read(**kwargs):
+        await finish_read.wait()
+        return MagicMock(registers=[0])
+
+    mock_modbus_client.read_holding_registers.side_effect = blocking_read
+    mock_modbus_client.write_register.return_value = MagicMock()
+
+    read_task = asyncio.create_task(client.read_registers(0, 1))
+    await asyncio.sleep(0)
+    writes = [asyncio.create_task(client.submit_write(7, value)) for value in (1, 2, 3)]
+    other = asyncio.create_task(client.write_single_register(8, 2))
+    await asyncio.sleep(0)
+    finish_read.set()
+
+    assert await read_task is not None
+    assert await asyncio.gather(*writes) == [3, 3, 3]
+    assert await other is True
+    assert [c.kwargs for c in mock_modbus_client.write_register.await_args_list] == [
+        {"address": 7, "value": 3, "device_id": 1},
+        {"address": 8, "value": 2, "device_id": 1},
+    ]
+    assert client._pending_writes == {}
+
+
+async def test_write_after_send_starts_is_not_merged(mock_modbus_client):
+    client = ModbusClient("127.0.0.1")
+    client.gateway.spacing = 0
+    write_started = asyncio.Event()
+    finish_write = asyncio.Event()
+
+    async def blocking_write(**kwargs):
+        write_started.set()
+        await finish_write.wait()
+        return MagicMock()
+
+    mock_modbus_client.write_register.side_effect = blocking_write
+
+    first = asyncio.create_task(client.submit_write(9, 1))
+    await write_started.wait()
+    second = asyncio.create_task(client.submit_write(9, 0))
+    await asyncio.sleep(0)
+    finish_write.set()
+
+    assert await first == 1
+    assert await second == 0
+    assert mock_modbus_client.write_register.await_count == 2
+
+
+async def test_coalesced_failure_is_reported_to_every_caller(mock_modbus_client):
+    client = ModbusClient("127.0.0.1")
+    client.gateway.spacing = 0
+    error_response = MagicMock()
+    error_response.isError.return_value = True
+    mock_modbus_client.write_register.return_value = error_response
+
+    async with client.gateway.scheduler.access(RequestPriority.WRITE):
+        tasks = [
+            asyncio.create_task(client.write_single_register(0, value))
+            for value in (0, 1)
+        ]
+        await asyncio.sleep(0)
+
+    assert await asyncio.gather(*tasks) == [False, False]
+    mock_modbus_client.write_register.assert_awaited_once_with(
+        address=0, value=1, device_id=1
+    )
+
+
+async def test_superseded_setter_caches_the_written_value(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system._registers_cache = [0] * 18
+    mock_modbus_client.write_register.return_value = MagicMock()
+
+    async with system.modbus.gateway.scheduler.access(RequestPriority.WRITE):
+        tasks = [
+            asyncio.create_task(system.set_supply_speed(speed))
+            for speed in ("low", "high")
+        ]
+        await asyncio.sleep(0)
+
+    # Only the caller whose value reached the device sees success.
+    assert await asyncio.gather(*tasks) == [False, True]
+    mock_modbus_client.write_register.assert_awaited_once_with(
+        address=7, value=3, device_id=1
+    )
+    assert system._registers_cache[7] == 3
+
+
+async def test_offline_device_does_not_use_executor_threads(mock_modbus_client):
+    mock_modbus_client.connected = False
+    mock_modbus_client.connect.return_value = False
+    client = ModbusClient("127.0.0.1")
+    loop = asyncio.get_running_loop()
+    clock = FakeClock()
+
+    monotonic, sleep = _patch_clock(clock)
+    with (
+        monotonic,
+        sleep,
+        patch.object(loop, "run_in_executor", side_effect=AssertionError),
+    ):
+        assert await client.read_registers(0, 1) is None
+        assert await client.write_single_register(1, 1) is False
+
+
+async def test_reset_filter_usage_time_obeys_modbus_interval(mock_modbus_client):
     system = FreshAirSystem("127.0.0.1")
     clock = FakeClock()
     mock_modbus_client.write_register.return_value = MagicMock()
@@ -212,18 +323,10 @@ def test_reset_filter_usage_time_obeys_modbus_interval(mock_modbus_client):
         registers=[0] * 18
     )
 
-    with (
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.time.monotonic",
-            side_effect=clock.monotonic,
-        ),
-        patch(
-            "custom_components.madelon_ventilation.fresh_air_controller.time.sleep",
-            side_effect=clock.sleep,
-        ),
-    ):
-        assert system.reset_filter_usage_time() is True
-        assert system.refresh_registers(force_refresh=True) is True
+    monotonic, sleep = _patch_clock(clock)
+    with monotonic, sleep:
+        assert await system.reset_filter_usage_time() is True
+        assert await system.refresh_registers(force_refresh=True) is True
 
     assert clock.sleeps == pytest.approx([0.2])
 
@@ -233,27 +336,31 @@ def test_fresh_air_system_init(mock_modbus_client):
     assert system.unique_identifier == "127.0.0.1:8899"
 
 
-def test_fresh_air_system_power(mock_modbus_client):
+async def test_fresh_air_system_power(mock_modbus_client):
     system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
 
     # Mock read response
     mock_response = MagicMock()
     mock_response.registers = [1] + [0] * 20
     mock_modbus_client.read_holding_registers.return_value = mock_response
 
+    assert system.power is None
+    assert await system.refresh_registers() is True
     assert system.power is True
 
     # Test setting power
     mock_modbus_client.write_register.return_value = True
-    system.power = False
+    assert await system.set_power(False) is True
     mock_modbus_client.write_register.assert_called_with(
         address=0, value=0, device_id=1
     )
     assert system.power is False
 
 
-def test_fresh_air_system_mode(mock_modbus_client):
+async def test_fresh_air_system_mode(mock_modbus_client):
     system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
 
     # Mock read response for mode (address 4)
     # REGISTERS['mode'] = 4. min address is 0. So index is 4.
@@ -263,41 +370,43 @@ def test_fresh_air_system_mode(mock_modbus_client):
     mock_response.registers = registers
     mock_modbus_client.read_holding_registers.return_value = mock_response
 
+    assert await system.refresh_registers() is True
     assert system.mode == OperationMode.AUTO
 
     # Test setting mode
     mock_modbus_client.write_register.return_value = True
-    system.mode = OperationMode.MANUAL
+    assert await system.set_mode(OperationMode.MANUAL) is True
     mock_modbus_client.write_register.assert_called_with(
         address=4, value=0, device_id=1
     )
     assert system.mode == OperationMode.MANUAL
 
 
-def test_bypass_updates_cache_after_successful_write(mock_modbus_client):
+async def test_bypass_updates_cache_after_successful_write(mock_modbus_client):
     system = FreshAirSystem("127.0.0.1")
     system._registers_cache = [0] * 18
-    system.modbus.write_single_register = MagicMock(return_value=True)
+    system.modbus.submit_write = AsyncMock(return_value=1)
 
-    system.bypass = True
+    assert await system.set_bypass(True) is True
 
-    system.modbus.write_single_register.assert_called_once_with(9, 1)
+    system.modbus.submit_write.assert_awaited_once_with(9, 1)
     assert system._registers_cache[9] == 1
 
 
-def test_bypass_preserves_cache_after_failed_write(mock_modbus_client):
+async def test_bypass_preserves_cache_after_failed_write(mock_modbus_client):
     system = FreshAirSystem("127.0.0.1")
     system._registers_cache = [0] * 18
-    system.modbus.write_single_register = MagicMock(return_value=False)
+    system.modbus.submit_write = AsyncMock(return_value=None)
 
-    system.bypass = True
+    assert await system.set_bypass(True) is False
 
-    system.modbus.write_single_register.assert_called_once_with(9, 1)
+    system.modbus.submit_write.assert_awaited_once_with(9, 1)
     assert system._registers_cache[9] == 0
 
 
-def test_fresh_air_system_speed(mock_modbus_client):
+async def test_fresh_air_system_speed(mock_modbus_client):
     system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
 
     # Mock read response for speeds (address 7 and 8)
     registers = [0] * 20
@@ -307,12 +416,235 @@ def test_fresh_air_system_speed(mock_modbus_client):
     mock_response.registers = registers
     mock_modbus_client.read_holding_registers.return_value = mock_response
 
+    assert await system.refresh_registers() is True
     assert system.supply_speed == "medium"
     assert system.exhaust_speed == "high"
 
     # Test setting speed
     mock_modbus_client.write_register.return_value = True
-    system.supply_speed = "high"
+    assert await system.set_supply_speed("high") is True
     mock_modbus_client.write_register.assert_called_with(
         address=7, value=3, device_id=1
     )
+
+
+async def test_apply_state_writes_both_fan_speeds_in_one_transaction(
+    mock_modbus_client,
+):
+    system = FreshAirSystem("127.0.0.1")
+    system._registers_cache = [0] * 18
+    mock_modbus_client.write_registers.return_value = MagicMock()
+
+    assert await system.apply_state(supply_speed="high", exhaust_speed="high")
+
+    mock_modbus_client.write_registers.assert_awaited_once_with(
+        address=7, values=[3, 3], device_id=1
+    )
+    mock_modbus_client.write_register.assert_not_awaited()
+    assert system._registers_cache[7:9] == [3, 3]
+
+
+async def test_apply_state_fills_writable_gaps_from_snapshot(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system._registers_cache = [0] * 18
+    system._registers_cache[8] = 2
+    system._available = True
+    mock_modbus_client.write_registers.return_value = MagicMock()
+
+    assert await system.apply_state(supply_speed="low", bypass=True)
+
+    mock_modbus_client.write_registers.assert_awaited_once_with(
+        address=7, values=[1, 2, 1], device_id=1
+    )
+
+
+async def test_apply_state_splits_unsafe_gaps_in_request_order(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
+    system._registers_cache = [0] * 18
+    system._available = True
+    mock_modbus_client.write_register.return_value = MagicMock()
+
+    assert await system.apply_state(supply_speed="medium", power=True)
+
+    assert [c.kwargs for c in mock_modbus_client.write_register.await_args_list] == [
+        {"address": 7, "value": 2, "device_id": 1},
+        {"address": 0, "value": 1, "device_id": 1},
+    ]
+    mock_modbus_client.write_registers.assert_not_awaited()
+
+
+async def test_apply_state_stops_at_first_failed_transaction(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system._registers_cache = [0] * 18
+    error_response = MagicMock()
+    error_response.isError.return_value = True
+    mock_modbus_client.write_registers.return_value = error_response
+
+    assert (
+        await system.apply_state(
+            supply_speed="high", exhaust_speed="low", mode=OperationMode.AUTO
+        )
+        is False
+    )
+
+    mock_modbus_client.write_register.assert_not_awaited()
+    assert system._registers_cache[7:9] == [0, 0]
+
+
+async def test_apply_state_rejects_read_only_fields(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+
+    with pytest.raises(ValueError):
+        await system.apply_state(temperature=20)
+    with pytest.raises(ValueError):
+        await system.apply_state(supply_speed="turbo")
+
+    mock_modbus_client.write_register.assert_not_awaited()
+
+
+async def test_units_on_one_gateway_share_a_refcounted_connection(
+    mock_modbus_client,
+):
+    first = FreshAirSystem("127.0.0.1", unit_id=1)
+    second = FreshAirSystem("127.0.0.1", unit_id=2)
+    other = FreshAirSystem("127.0.0.2", unit_id=1)
+    assert first.modbus.gateway is second.modbus.gateway
+    assert other.modbus.gateway is not first.modbus.gateway
+    assert first.unique_identifier == "127.0.0.1:8899"
+    assert second.unique_identifier == "127.0.0.1:8899:2"
+
+    first.modbus.gateway.spacing = 0
+    mock_modbus_client.read_holding_registers.return_value = MagicMock(
+        registers=[0] * 18, isError=MagicMock(return_value=False)
+    )
+    assert await first.refresh_registers(True)
+    assert await second.refresh_registers(True)
+    devices = [
+        call.kwargs["device_id"]
+        for call in mock_modbus_client.read_holding_registers.await_args_list
+    ]
+    assert devices == [1, 2]
+    # One socket for the shared gateway.
+    assert mock_modbus_client.connect.await_count == 0
+
+    await first.modbus.close()
+    await first.modbus.close()
+    mock_modbus_client.close.assert_not_called()
+    assert "127.0.0.1:8899" in ModbusGateway._registry
+
+    await second.modbus.close()
+    mock_modbus_client.close.assert_called_once()
+    assert "127.0.0.1:8899" not in ModbusGateway._registry
+    await other.modbus.close()
+
+
+async def test_refresh_reads_only_subscribed_registers(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
+    mock_modbus_client.read_holding_registers.side_effect = (
+        lambda address, count, device_id: MagicMock(
+            registers=list(range(address, address + count)),
+            isError=MagicMock(return_value=False),
+        )
+    )
+    assert system.read_plan() == ((0, 18),)
+
+    release_fan = system.subscribe(["power", "supply_speed"])
+    release_bypass = system.subscribe(["bypass"])
+    assert system.read_plan() == ((0, 10),)
+    assert await system.refresh_registers(True)
+    mock_modbus_client.read_holding_registers.assert_awaited_with(
+        address=0, count=10, device_id=1
+    )
+    assert system.bypass is True
+    assert system.snapshot.raw[7] == 7
+    # Registers outside the plan are unknown rather than stale.
+    assert system.temperature is None
+
+    release_fan()
+    assert system.read_plan() == ((9, 1),)
+    release_bypass()
+    assert system.read_plan() == ((0, 18),)
+
+    with pytest.raises(ValueError):
+        system.subscribe(["nonexistent"])
+
+
+async def test_tier_refresh_keeps_registers_of_other_tiers(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
+    system.subscribe(["power", "supply_speed", "temperature", "humidity"])
+    mock_modbus_client.read_holding_registers.side_effect = (
+        lambda address, count, device_id: MagicMock(
+            registers=[1] * count, isError=MagicMock(return_value=False)
+        )
+    )
+    assert await system.refresh_registers(True)
+    assert system.read_plan() == ((0, 18),)
+
+    mock_modbus_client.read_holding_registers.side_effect = (
+        lambda address, count, device_id: MagicMock(
+            registers=[2] * count, isError=MagicMock(return_value=False)
+        )
+    )
+    assert await system.refresh_registers(True, tiers={PollTier.FAST})
+    mock_modbus_client.read_holding_registers.assert_awaited_with(
+        address=16, count=2, device_id=1
+    )
+    assert system.temperature == 0.2
+    assert system.snapshot.raw[0] == 1
+
+
+async def test_refresh_and_writes_publish_versioned_snapshots(mock_modbus_client):
+    system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.spacing = 0
+    assert system.snapshot.version == 0
+    assert system.snapshot.power is None
+
+    registers = [0] * 18
+    registers[0] = 1
+    registers[4] = 1
+    registers[7] = 2
+    registers[16] = 215
+    registers[17] = 480
+    mock_modbus_client.read_holding_registers.return_value = MagicMock(
+        registers=registers, isError=MagicMock(return_value=False)
+    )
+    mock_modbus_client.write_register.return_value = MagicMock(
+        isError=MagicMock(return_value=False)
+    )
+    assert await system.refresh_registers(True)
+    first = system.snapshot
+    assert first.version == 1
+    assert first.raw.typecode == "H"
+    assert list(first.raw) == registers
+    assert first.power is True
+    assert first.mode is OperationMode.AUTO
+    assert first.supply_speed == "medium"
+    assert first.exhaust_speed is None
+    assert first.temperature == 21.5
+    assert first.humidity == 48.0
+
+    assert await system.set_supply_speed(3)
+    second = system.snapshot
+    assert second.version == 2
+    assert second.supply_speed == "high"
+    # Published snapshots never change.
+    assert first.supply_speed == "medium"
+    with pytest.raises(AttributeError):
+        first.power = False
+    with pytest.raises(AttributeError):
+        first.extra = 1
+
+
+def test_snapshot_decodes_unread_registers_as_none():
+    registers = [None] * RegisterSnapshot.SIZE
+    registers[9] = 1
+    snapshot = RegisterSnapshot(registers, 7)
+    assert snapshot.version == 7
+    assert snapshot.bypass is True
+    assert snapshot.power is None
+    assert snapshot.raw[0] == 0
+    registers[4] = 9
+    assert RegisterSnapshot(registers, 1).mode is OperationMode.MANUAL
@@ -0,0 +1,94 @@
+"""Tests for the in-memory snapshot history."""
+
+import random
+
+import pytest
+
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+    RegisterSnapshot,
+)
+from custom_components.madelon_ventilation.history import SnapshotHistory
+
+TEMPERATURE = FreshAirSystem.REGISTERS["temperature"]
+HUMIDITY = FreshAirSystem.REGISTERS["humidity"]
+
+
+def _registers(temperature, humidity=450):
+    registers = [0] * RegisterSnapshot.SIZE
+    registers[TEMPERATURE] = temperature
+    registers[HUMIDITY] = humidity
+    return registers
+
+
+def _slope(times, values):
+    count = len(times)
+    mean_t = sum(times) / count
+    mean_v = sum(values) / count
+    covariance = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values))
+    return covariance / sum((t - mean_t) ** 2 for t in times) * 3600
+
+
+def test_statistics_match_a_full_recomputation():
+    rng = random.Random(3)
+    history = SnapshotHistory(("temperature", "humidity"), capacity=50, window=400)
+    readings = []
+    now = 1000.0
+    for _ in range(500):
+        now += rng.choice((5, 20, 20, 60))
+        temperature = rng.randint(150, 300)
+        history.append(now, _registers(temperature))
+        readings.append((now, temperature))
+        window = [reading for reading in readings[-50:] if reading[0] >= now - 400]
+        times = [time for time, _ in window]
+        values = [value for _, value in window]
+
+        assert len(history) == len(window)
+        assert history.mean("temperature") == pytest.approx(sum(values) / len(values))
+        assert history.minimum("temperature") == min(values)
+        assert history.maximum("temperature") == max(values)
+        if len(window) > 1:
+            assert history.slope("temperature") == pytest.approx(_slope(times, values))
+        assert history.mean("humidity") == 450
+        assert history.slope("humidity") in (0, None)
+
+
+def test_empty_and_single_reading_windows():
+    history = SnapshotHistory(("temperature",), capacity=4, window=60)
+    assert history.mean("temperature") is None
+    assert history.minimum("temperature") is None
+    assert history.slope("temperature") is None
+
+    history.append(0.0, _registers(210))
+    assert history.mean("temperature") == 210
+    assert history.slope("temperature") is None
+
+    # A reading that leaves the window alone makes room for the next one.
+    history.append(120.0, _registers(230))
+    assert len(history) == 1
+    assert history.minimum("temperature") == history.maximum("temperature") == 230
+
+
+def test_columns_are_compact_arrays():
+    history = SnapshotHistory(("temperature", "humidity"), capacity=8640, window=86400)
+    column = history._columns["temperature"]
+    assert column.values.typecode == "H"
+    assert column.values.itemsize * len(column.values) == 2 * 8640
+
+
+def test_resize_keeps_the_newest_readings():
+    history = SnapshotHistory(("temperature",), capacity=4, window=3600)
+    for second, temperature in enumerate((250, 200, 220, 210, 230, 240)):
+        history.append(second, _registers(temperature))
+
+    history.resize(3)
+    assert len(history) == 3
+    assert history.minimum("temperature") == 210
+    assert history.slope("temperature") == pytest.approx(15 * 3600)
+
+    history.resize(5)
+    history.append(6, _registers(100))
+    history.append(7, _registers(110))
+    assert len(history) == 5
+    assert history.mean("temperature") == pytest.approx(178)
+    assert history.maximum("temperature") == 240
@@ -1,10 +1,23 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+from datetime import timedelta
+from unittest.mock import MagicMock
 
 import pytest
 from homeassistant.config_entries import ConfigEntryState
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.const import (
+    ATTR_SNAPSHOT_TIME,
+    ATTR_STALE,
+    DOMAIN,
+)
+from custom_components.madelon_ventilation.snapshot_store import SnapshotStore
+
+from .common import patch_modbus_client
 
 
 @pytest.mark.asyncio
@@ -23,9 +36,7 @@ async def test_setup_entry(hass):
     )
     entry.add_to_hass(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         mock_modbus.return_value.connect.return_value = True
         mock_modbus.return_value.connected = True
 
@@ -41,8 +52,116 @@ async def test_setup_entry(hass):
     assert DOMAIN in hass.data
     assert entry.entry_id in hass.data[DOMAIN]
 
+    # Enabled entities subscribe to the registers they read; the diagnostic
+    # bus sensors are disabled by default and read none.
+    system = hass.data[DOMAIN][entry.entry_id]["system"]
+    assert set(system._subscriptions) == {
+        "power",
+        "supply_speed",
+        "exhaust_speed",
+        "mode",
+        "bypass",
+        "temperature",
+        "humidity",
+        "filter_usage_time",
+    }
+
     # Unload the entry and verify cleanup
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
     assert entry.state == ConfigEntryState.NOT_LOADED
     assert entry.entry_id not in hass.data[DOMAIN]
+
+
+@pytest.mark.asyncio
+async def test_entries_on_one_gateway_share_the_connection(hass):
+    """Units behind the same gateway reuse one transport until the last unload."""
+    entries = [
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={"host": "127.0.0.1", "port": 8899, "unit_id": unit_id},
+            entry_id=f"unit_{unit_id}",
+        )
+        for unit_id in (1, 2)
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+
+    with patch_modbus_client() as mock_modbus:
+        mock_response = MagicMock()
+        mock_response.registers = [0] * 20
+        mock_modbus.return_value.read_holding_registers.return_value = mock_response
+
+        # Setting up the integration loads every entry of the domain.
+        assert await hass.config_entries.async_setup(entries[0].entry_id)
+        await hass.async_block_till_done()
+        assert all(entry.state == ConfigEntryState.LOADED for entry in entries)
+
+        systems = [hass.data[DOMAIN][entry.entry_id]["system"] for entry in entries]
+        assert systems[0].modbus.gateway is systems[1].modbus.gateway
+        assert mock_modbus.call_count == 1
+
+        assert await hass.config_entries.async_unload(entries[0].entry_id)
+        mock_modbus.return_value.close.assert_not_called()
+        assert await hass.config_entries.async_unload(entries[1].entry_id)
+        mock_modbus.return_value.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_persisted_snapshot_renders_before_the_first_live_read(
+    hass, hass_storage
+):
+    """Entities show the stored snapshot as stale while the gateway is slow."""
+    stored = [0] * 18
+    stored[0] = 1
+    stored[16] = 215
+    read_at = dt_util.utcnow() - timedelta(hours=1)
+    hass_storage[f"{DOMAIN}.test_entry.snapshot"] = {
+        "version": SnapshotStore.VERSION,
+        "key": f"{DOMAIN}.test_entry.snapshot",
+        "data": {"registers": stored, "read_at": read_at.isoformat()},
+    }
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+    live = [0] * 18
+    live[0] = 1
+    live[16] = 198
+    gateway_ready = asyncio.Event()
+
+    async def slow_read(address, count, device_id):
+        await gateway_ready.wait()
+        return MagicMock(registers=live[address : address + count])
+
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.side_effect = slow_read
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.fresh_air_system_temperature")
+        assert state.state == "21.5"
+        assert state.attributes[ATTR_STALE] is True
+        assert state.attributes[ATTR_SNAPSHOT_TIME] == read_at.isoformat()
+
+        gateway_ready.set()
+        await hass.async_block_till_done(wait_background_tasks=True)
+        state = hass.states.get("sensor.fresh_air_system_temperature")
+        assert state.state == "19.8"
+        assert ATTR_STALE not in state.attributes
+
+        # The live snapshot is persisted after the save delay.
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=SnapshotStore.SAVE_DELAY)
+        )
+        await hass.async_block_till_done()
+        saved = hass_storage[f"{DOMAIN}.test_entry.snapshot"]["data"]
+        assert saved["registers"][16] == 198
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.test_entry.snapshot" not in hass_storage
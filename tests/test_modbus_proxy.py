@@ -0,0 +1,136 @@
+"""Tests for the Modbus TCP proxy against the simulator."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from pymodbus.client import AsyncModbusTcpClient
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.coordinator import (
+    MadelonVentilationCoordinator,
+)
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+    ModbusGateway,
+)
+from custom_components.madelon_ventilation.modbus_proxy import (
+    GATEWAY_TARGET_FAILED,
+    ILLEGAL_DATA_ADDRESS,
+    ModbusProxy,
+)
+from simulator import MadelonDevice, SimulatedGateway
+
+REGISTERS = FreshAirSystem.REGISTERS
+
+
+@pytest.fixture
+async def proxied(hass, socket_enabled):
+    """Yield the simulated device, its gateway and a running proxy."""
+    device = MadelonDevice(temperature=21.5)
+    with patch.object(ModbusGateway, "MIN_COMMUNICATION_INTERVAL", 0):
+        async with SimulatedGateway({1: device}, baud_rate=None) as gateway:
+            entry = MockConfigEntry(domain=DOMAIN, entry_id="test_entry")
+            entry.add_to_hass(hass)
+            system = FreshAirSystem("127.0.0.1", gateway.port)
+            coordinator = MadelonVentilationCoordinator(
+                hass, entry, system, timedelta(seconds=60)
+            )
+            proxy = ModbusProxy(coordinator, 0, 10)
+            await proxy.async_start()
+            await coordinator.async_refresh()
+            try:
+                yield device, gateway, proxy
+            finally:
+                await proxy.async_stop()
+                await coordinator.async_shutdown()
+                await system.modbus.close()
+
+
+async def _client(proxy):
+    client = AsyncModbusTcpClient("127.0.0.1", port=proxy.port, timeout=1)
+    assert await client.connect()
+    return client
+
+
+async def test_reads_are_served_from_the_cache(proxied):
+    device, gateway, proxy = proxied
+    requests = gateway.stats["requests"]
+    clients = [await _client(proxy), await _client(proxy)]
+    try:
+        for client in clients:
+            response = await client.read_holding_registers(
+                REGISTERS["temperature"], count=2, device_id=1
+            )
+            assert not response.isError()
+            assert response.registers[0] == 215
+        assert gateway.stats["requests"] == requests
+
+        # Stale tiers are read once before answering.
+        proxy.max_age = 0
+        response = await clients[0].read_holding_registers(0, count=18, device_id=1)
+        assert response.registers[REGISTERS["supply_speed"]] == device.supply_speed
+        assert gateway.stats["requests"] > requests
+        assert gateway.stats["connections"] == 1
+    finally:
+        for client in clients:
+            client.close()
+
+
+async def test_writes_are_forwarded(proxied):
+    device, _, proxy = proxied
+    client = await _client(proxy)
+    try:
+        response = await client.write_registers(
+            REGISTERS["supply_speed"], [3, 2], device_id=1
+        )
+        assert not response.isError()
+        assert (device.supply_speed, device.exhaust_speed) == (3, 2)
+        assert proxy._system.supply_speed == "high"
+
+        response = await client.write_register(
+            REGISTERS["temperature"], 100, device_id=1
+        )
+        assert response.exception_code == ILLEGAL_DATA_ADDRESS
+    finally:
+        client.close()
+
+
+async def test_other_units_and_addresses_are_rejected(proxied):
+    _, _, proxy = proxied
+    client = await _client(proxy)
+    try:
+        response = await client.read_holding_registers(0, count=1, device_id=2)
+        assert response.exception_code == GATEWAY_TARGET_FAILED
+        response = await client.read_holding_registers(17, count=2, device_id=1)
+        assert response.exception_code == ILLEGAL_DATA_ADDRESS
+    finally:
+        client.close()
+
+
+async def test_listens_on_loopback_by_default(proxied):
+    _, _, proxy = proxied
+    assert proxy.host == "127.0.0.1"
+
+
+async def test_malformed_header_closes_the_connection(proxied):
+    _, _, proxy = proxied
+    reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+    try:
+        # MBAP header with a length of zero, too short for a function code.
+        writer.write(bytes(7))
+        await writer.drain()
+        assert await asyncio.wait_for(reader.read(), 1) == b""
+    finally:
+        writer.close()
+    # The proxy keeps serving other clients.
+    client = await _client(proxy)
+    try:
+        response = await client.read_holding_registers(
+            REGISTERS["temperature"], count=1, device_id=1
+        )
+    finally:
+        client.close()
+    assert response.registers == [215]
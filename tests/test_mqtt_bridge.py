@@ -0,0 +1,135 @@
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock, call
+
+import pytest
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_mqtt_message,
+    async_fire_time_changed,
+)
+
+from custom_components.madelon_ventilation.const import (
+    CONF_MQTT_BRIDGE,
+    CONF_MQTT_PREFIX,
+    DOMAIN,
+)
+from custom_components.madelon_ventilation.mqtt_bridge import MqttBridge
+
+from .common import patch_modbus_client
+
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    """The mocked MQTT client leaves its periodic housekeeping timer behind."""
+    return True
+
+
+@pytest.fixture
+async def bridged_client(hass, mqtt_mock):
+    """Set up an entry with the MQTT bridge; yield the Modbus client mock."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        options={CONF_MQTT_BRIDGE: True, CONF_MQTT_PREFIX: "madelon"},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+
+    with patch_modbus_client() as mock_modbus:
+        client = mock_modbus.return_value
+        registers = [0] * 18
+        registers[0] = 1  # power
+        registers[4] = 1  # mode: auto
+        registers[7] = 2  # supply_speed: medium
+        registers[9] = 1  # bypass
+        registers[16] = 215  # temperature
+        registers[17] = 480  # humidity
+        response = MagicMock()
+        response.registers = registers
+        client.read_holding_registers.return_value = response
+        client.write_register.return_value = MagicMock()
+        client.write_registers.return_value = MagicMock()
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        yield client
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_state_is_published_retained_and_only_on_change(
+    hass, mqtt_mock, bridged_client
+):
+    mqtt_mock.async_publish.assert_has_calls(
+        [
+            call(
+                "madelon/state/environment",
+                json.dumps({"temperature": 21.5, "humidity": 48.0}),
+                0,
+                True,
+            ),
+            call("madelon/state/mode", "auto_bypass", 0, True),
+            call("madelon/state/speed", "medium", 0, True),
+        ],
+        any_order=True,
+    )
+    assert mqtt_mock.async_publish.call_count == 3
+
+    # Only the mode topic changes when the unit is switched off.
+    mqtt_mock.async_publish.reset_mock()
+    registers = bridged_client.read_holding_registers.return_value.registers
+    registers[0] = 0
+    coordinator = hass.data[DOMAIN]["test_entry"]["coordinator"]
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    mqtt_mock.async_publish.assert_called_once_with(
+        "madelon/state/mode", "off", 0, True
+    )
+
+
+async def test_commands_are_coalesced_into_one_write(hass, mqtt_mock, bridged_client):
+    bridged_client.write_registers.reset_mock()
+    async_fire_mqtt_message(hass, "madelon/ctrl/speed", "high")
+    async_fire_mqtt_message(hass, "madelon/ctrl/mode", "Timer")
+    async_fire_mqtt_message(hass, "madelon/ctrl/power", "ON")
+    async_fire_mqtt_message(hass, "madelon/ctrl/speed", "turbo")
+    await hass.async_block_till_done()
+    bridged_client.write_registers.assert_not_called()
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=MqttBridge.COALESCE_DELAY)
+    )
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    # Speeds and bypass share one block; mode and power are written alone.
+    bridged_client.write_registers.assert_awaited_once_with(
+        address=7, values=[3, 3, 0], device_id=1
+    )
+    assert [
+        c.kwargs["address"] for c in bridged_client.write_register.await_args_list
+    ] == [4, 0]
+    mqtt_mock.async_publish.assert_any_call("madelon/state/mode", "timer", 0, True)
+    mqtt_mock.async_publish.assert_any_call("madelon/state/speed", "high", 0, True)
+
+
+@pytest.mark.parametrize(
+    ("command", "payload", "fields"),
+    [
+        ("power", "off", {"power": False}),
+        ("speed", "off", {"power": False}),
+        (
+            "speed",
+            "low",
+            {"supply_speed": "low", "exhaust_speed": "low", "power": True},
+        ),
+        ("mode", "manual_bypass", {"mode": "manual", "bypass": True}),
+        ("mode", "auto", {"mode": "auto", "bypass": False}),
+        ("mode", "off", None),
+        ("fan", "on", None),
+    ],
+)
+def test_command_fields(command, payload, fields):
+    assert MqttBridge._command_fields(command, payload) == fields
@@ -0,0 +1,33 @@
+"""Tests for the register read planner."""
+
+import pytest
+
+from custom_components.madelon_ventilation.planner import ReadCostModel, plan_reads
+
+
+def test_adjacent_addresses_share_one_window():
+    assert plan_reads([9, 7, 8, 7]) == ((7, 3),)
+
+
+def test_gap_is_read_when_cheaper_than_a_round_trip():
+    # At 9600 baud with pacing a round trip costs far more than ten registers.
+    assert plan_reads([0, 16, 17]) == ((0, 18),)
+
+
+def test_gap_is_split_when_round_trips_are_cheap():
+    model = ReadCostModel(baud_rate=9600, pacing=0.0)
+    # 14 unused registers cost more than one extra request at this speed.
+    assert plan_reads([0, 1, 16, 17], model) == ((0, 2), (16, 2))
+    assert plan_reads([0, 1, 4], model) == ((0, 5),)
+
+
+def test_windows_respect_the_protocol_limit():
+    assert plan_reads([0, 200], max_count=125) == ((0, 1), (200, 1))
+    assert plan_reads([]) == ()
+
+
+@pytest.mark.parametrize("baud_rate", [9600, 19200, 115200])
+def test_cost_model_prefers_fewer_registers(baud_rate):
+    model = ReadCostModel(baud_rate=baud_rate)
+    assert model.cost(10) < model.cost(18)
+    assert model.request_cost > model.register_cost
@@ -0,0 +1,147 @@
+"""Tests for priority-ordered bus access."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.madelon_ventilation.fresh_air_controller import ModbusClient
+from custom_components.madelon_ventilation.scheduler import (
+    BusScheduler,
+    RequestPriority,
+)
+
+from .common import patch_modbus_client
+
+
+@pytest.fixture
+def mock_modbus_client():
+    with patch_modbus_client() as mock:
+        yield mock.return_value
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_scheduler_serves_most_urgent_waiter_first():
+    scheduler = BusScheduler()
+    order = []
+
+    async def use(name, priority):
+        async with scheduler.access(priority):
+            order.append(name)
+
+    async with scheduler.access(RequestPriority.POLL):
+        tasks = [
+            asyncio.create_task(use("poll", RequestPriority.POLL)),
+            asyncio.create_task(use("confirm", RequestPriority.CONFIRM)),
+            asyncio.create_task(use("write", RequestPriority.WRITE)),
+            asyncio.create_task(use("second write", RequestPriority.WRITE)),
+        ]
+        await _settle()
+        assert order == []
+
+    await asyncio.gather(*tasks)
+    assert order == ["write", "second write", "confirm", "poll"]
+    assert not scheduler.locked()
+
+
+async def test_units_of_equal_priority_take_turns():
+    scheduler = BusScheduler()
+    order = []
+
+    async def use(name, unit_id, priority=RequestPriority.POLL):
+        async with scheduler.access(priority, unit_id):
+            order.append(name)
+
+    async with scheduler.access(RequestPriority.POLL, 1):
+        tasks = [
+            asyncio.create_task(use("1a", 1)),
+            asyncio.create_task(use("1b", 1)),
+            asyncio.create_task(use("2a", 2)),
+            asyncio.create_task(use("3a", 3)),
+            asyncio.create_task(use("2b", 2)),
+            asyncio.create_task(use("write 1", 1, RequestPriority.WRITE)),
+        ]
+        await _settle()
+
+    await asyncio.gather(*tasks)
+    # Priority still wins; within a priority unit 1, which just held the bus,
+    # waits until units 2 and 3 had a turn.
+    assert order == ["write 1", "2a", "3a", "1a", "2b", "1b"]
+
+
+async def test_cancelled_waiter_does_not_stall_the_queue():
+    scheduler = BusScheduler()
+    order = []
+
+    async def use(name, priority):
+        async with scheduler.access(priority):
+            order.append(name)
+
+    async with scheduler.access(RequestPriority.POLL):
+        cancelled = asyncio.create_task(use("write", RequestPriority.WRITE))
+        waiting = asyncio.create_task(use("poll", RequestPriority.POLL))
+        await _settle()
+        cancelled.cancel()
+        await _settle()
+
+    await waiting
+    assert cancelled.cancelled()
+    assert order == ["poll"]
+    assert not scheduler.locked()
+
+
+async def test_write_preempts_queued_poll(mock_modbus_client):
+    client = ModbusClient("127.0.0.1")
+    client.gateway.spacing = 0
+    wire = []
+
+    async def read(**kwargs):
+        wire.append(("read", kwargs["address"]))
+        return MagicMock(registers=[0] * kwargs["count"])
+
+    async def write(**kwargs):
+        wire.append(("write", kwargs["address"]))
+        return MagicMock()
+
+    mock_modbus_client.read_holding_registers.side_effect = read
+    mock_modbus_client.write_register.side_effect = write
+
+    async with client.gateway.scheduler.access(RequestPriority.POLL):
+        poll = asyncio.create_task(client.read_registers(0, 18))
+        await _settle()
+        toggle = asyncio.create_task(client.write_single_register(9, 1))
+        await _settle()
+
+    assert await toggle is True
+    assert await poll is not None
+    assert wire == [("write", 9), ("read", 0)]
+
+
+async def test_queued_reads_of_one_block_merge_and_promote(mock_modbus_client):
+    client = ModbusClient("127.0.0.1")
+    client.gateway.spacing = 0
+    wire = []
+
+    async def read(**kwargs):
+        wire.append(kwargs["address"])
+        return MagicMock(registers=[kwargs["address"]] * kwargs["count"])
+
+    mock_modbus_client.read_holding_registers.side_effect = read
+
+    async with client.gateway.scheduler.access(RequestPriority.POLL):
+        other_poll = asyncio.create_task(client.read_registers(12, 2))
+        poll = asyncio.create_task(client.read_registers(0, 18))
+        await _settle()
+        confirm = asyncio.create_task(
+            client.read_registers(0, 18, RequestPriority.CONFIRM)
+        )
+        await _settle()
+
+    poll_response, confirm_response, _ = await asyncio.gather(poll, confirm, other_poll)
+    assert poll_response is confirm_response
+    assert wire == [0, 12]
+    assert client._pending_reads == {}
@@ -1,10 +1,30 @@
+from datetime import timedelta
+from functools import partial
 from unittest.mock import MagicMock, patch
 
 import pytest
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_component import async_update_entity
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.const import (
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_TEMPERATURE_MAX_SILENCE,
+    CONF_TEMPERATURE_MIN_INTERVAL,
+    DOMAIN,
+)
+from custom_components.madelon_ventilation.deadband import Deadband
+from custom_components.madelon_ventilation.sensor import (
+    FreshAirHumiditySensor,
+    FreshAirTemperatureSensor,
+    FreshAirTrendSensor,
+)
+
+from .common import patch_modbus_client
 
 
 @pytest.mark.asyncio
@@ -23,9 +43,7 @@ async def test_sensor_entities(hass):
     )
     entry.add_to_hass(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connect.return_value = True
         client.connected = True
@@ -68,3 +86,207 @@ async def test_sensor_entities(hass):
         # Unload the entry
         assert await hass.config_entries.async_unload(entry.entry_id)
         await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_only_sensors_with_changed_registers_write_state(hass):
+    """A poll that changes temperature leaves the humidity sensor untouched."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+
+    with patch_modbus_client() as mock_modbus:
+        client = mock_modbus.return_value
+        registers = [0] * 18
+        registers[16] = 255
+        registers[17] = 450
+        client.read_holding_registers.return_value = MagicMock(registers=registers)
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+        with (
+            patch.object(
+                FreshAirTemperatureSensor, "async_write_ha_state"
+            ) as temperature_writes,
+            patch.object(
+                FreshAirHumiditySensor, "async_write_ha_state"
+            ) as humidity_writes,
+        ):
+            await coordinator.async_refresh()
+            assert temperature_writes.call_count == 0
+            assert humidity_writes.call_count == 0
+
+            registers[16] = 260
+            await coordinator.async_refresh()
+            assert temperature_writes.call_count == 1
+            assert humidity_writes.call_count == 0
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_temperature_publishes_through_deadband(hass):
+    """Flicker is dropped, held-back changes and heartbeats publish on time."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        options={
+            CONF_TEMPERATURE_DEADBAND: 0.3,
+            CONF_TEMPERATURE_MIN_INTERVAL: 60,
+            CONF_TEMPERATURE_MAX_SILENCE: 900,
+        },
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+    clock = MagicMock(return_value=0.0)
+    start = dt_util.utcnow()
+
+    def advance(seconds):
+        clock.return_value += seconds
+        async_fire_time_changed(hass, start + timedelta(seconds=clock.return_value))
+
+    with (
+        patch(
+            "custom_components.madelon_ventilation.Deadband",
+            partial(Deadband, clock=clock),
+        ),
+        patch(
+            "custom_components.madelon_ventilation.fresh_air_controller."
+            "ModbusGateway.MIN_COMMUNICATION_INTERVAL",
+            0,
+        ),
+        patch_modbus_client() as mock_modbus,
+    ):
+        client = mock_modbus.return_value
+        registers = [0] * 18
+        registers[16] = 210
+        client.read_holding_registers.return_value = MagicMock(registers=registers)
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+        async def poll(raw, seconds):
+            advance(seconds)
+            registers[16] = raw
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+            return hass.states.get("sensor.fresh_air_system_temperature")
+
+        initial = hass.states.get("sensor.fresh_air_system_temperature")
+        assert initial.state == "21.0"
+        assert (await poll(211, 20)).state == "21.0"
+        assert (await poll(209, 20)).state == "21.0"
+        # Outside the band, but only 50 s after the last publish.
+        assert (await poll(215, 10)).state == "21.0"
+        advance(10)
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.fresh_air_system_temperature")
+        assert state.state == "21.5"
+
+        # Nothing changes; the heartbeat still reports after max silence.
+        reported = state.last_reported
+        advance(900)
+        await hass.async_block_till_done()
+        assert (
+            hass.states.get("sensor.fresh_air_system_temperature").last_reported
+            > reported
+        )
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_trend_sensors_follow_the_history(hass, freezer):
+    """Rolling statistics come from the coordinator's in-memory history."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+
+    with (
+        patch_modbus_client() as mock_modbus,
+        patch.object(
+            FreshAirTrendSensor, "_attr_entity_registry_enabled_default", True
+        ),
+    ):
+        client = mock_modbus.return_value
+        registers = [0] * 18
+        registers[16] = 200
+        client.read_holding_registers.return_value = MagicMock(registers=registers)
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        for temperature in (220, 230):
+            freezer.tick(timedelta(minutes=1))
+            registers[16] = temperature
+            await coordinator.async_refresh()
+
+        assert len(coordinator.history) == 3
+        assert (
+            hass.states.get("sensor.fresh_air_system_temperature_24_h_mean").state
+            == "21.67"
+        )
+        assert (
+            hass.states.get("sensor.fresh_air_system_temperature_24_h_min").state
+            == "20.0"
+        )
+        assert (
+            hass.states.get("sensor.fresh_air_system_temperature_24_h_max").state
+            == "23.0"
+        )
+        # Least-squares fit through 20.0, 22.0 and 23.0 a minute apart.
+        trend = hass.states.get("sensor.fresh_air_system_temperature_24_h_trend")
+        assert trend.state == "90.0"
+        assert trend.attributes["unit_of_measurement"] == "°C/h"
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_history_reads_its_registers_with_their_sensors_disabled(hass):
+    """Disabled measurement sensors must not leave the history without data."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    for key in ("temperature", "humidity"):
+        registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            f"{DOMAIN}_127.0.0.1:8899_{key}",
+            config_entry=entry,
+            disabled_by=er.RegistryEntryDisabler.USER,
+        )
+
+    registers = [0] * 18
+    registers[16] = 215
+
+    def read(address, count, **kwargs):
+        return MagicMock(registers=registers[address : address + count])
+
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.side_effect = read
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        assert hass.states.get("sensor.fresh_air_system_temperature") is None
+
+        # Entities narrowed the reads; the FAST tier still has its registers.
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert len(coordinator.history) == 2
+        assert coordinator.history.mean("temperature") == 215
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,188 @@
+"""Tests for the Modbus simulator used in performance and soak testing."""
+
+import asyncio
+import random
+import struct
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+    ModbusGateway,
+)
+from simulator import Fault, FaultProfile, MadelonDevice, SimulatedGateway
+from simulator.device import IllegalAddress, IllegalValue
+
+REGISTERS = FreshAirSystem.REGISTERS
+
+
+class FakeClock:
+    def __init__(self):
+        self.current = 0.0
+
+    def __call__(self):
+        return self.current
+
+
+def test_fans_ramp_toward_the_speed_setting():
+    clock = FakeClock()
+    device = MadelonDevice(clock=clock)
+    device.write(REGISTERS["supply_speed"], [3])
+    clock.current = 1
+    registers = device.registers()
+    assert registers[REGISTERS["actual_supply"]] == MadelonDevice.RAMP_RATE
+    clock.current = 10
+    registers = device.registers()
+    assert registers[REGISTERS["actual_supply"]] == MadelonDevice.SPEED_OUTPUT[3]
+    assert registers[REGISTERS["actual_exhaust"]] == MadelonDevice.SPEED_OUTPUT[1]
+
+    device.write(REGISTERS["power"], [0])
+    clock.current = 60
+    registers = device.registers()
+    assert registers[REGISTERS["actual_supply"]] == 0
+    assert registers[REGISTERS["actual_exhaust"]] == 0
+
+
+def test_measurements_drift_toward_ambient():
+    clock = FakeClock()
+    device = MadelonDevice(
+        temperature=18.0,
+        ambient_temperature=24.0,
+        humidity=60.0,
+        clock=clock,
+        rng=random.Random(1),
+    )
+    clock.current = 10 * MadelonDevice.DRIFT_TIME
+    registers = device.registers()
+    # Within three standard deviations of the ambient values, in tenths.
+    assert registers[REGISTERS["temperature"]] == pytest.approx(240, abs=9)
+    assert registers[REGISTERS["humidity"]] == pytest.approx(600, abs=45)
+
+
+def test_filter_hours_count_powered_time_and_raise_the_reminder():
+    clock = FakeClock()
+    device = MadelonDevice(filter_reminder_setting=10, time_scale=3600, clock=clock)
+    clock.current = 10
+    registers = device.registers()
+    assert registers[REGISTERS["filter_usage_time"]] == 10
+    assert registers[REGISTERS["filter_reminder"]] == 1
+
+    device.write(REGISTERS["filter_usage_time"], [1])
+    registers = device.registers()
+    assert registers[REGISTERS["filter_usage_time"]] == 0
+    assert registers[REGISTERS["filter_reminder"]] == 0
+
+
+def test_invalid_writes_change_nothing():
+    device = MadelonDevice(clock=FakeClock())
+    with pytest.raises(IllegalValue):
+        device.write(REGISTERS["supply_speed"], [2, 9])
+    with pytest.raises(IllegalAddress):
+        device.write(REGISTERS["temperature"], [200])
+    with pytest.raises(IllegalAddress):
+        device.read(0, len(device.registers()) + 1)
+    assert device.supply_speed == 1
+
+
+@pytest.fixture
+def fast_bus(socket_enabled):
+    """Allow local sockets; remove pacing and shorten client timeouts."""
+    with (
+        patch.object(ModbusGateway, "MIN_COMMUNICATION_INTERVAL", 0),
+        patch.object(ModbusGateway, "CONNECTION_TIMEOUT", 0.2),
+    ):
+        yield
+
+
+async def test_integration_reads_and_writes_several_units(fast_bus):
+    devices = {1: MadelonDevice(temperature=21.5), 2: MadelonDevice(humidity=55.0)}
+    async with SimulatedGateway(devices, baud_rate=None) as gateway:
+        first = FreshAirSystem("127.0.0.1", gateway.port, 1)
+        second = FreshAirSystem("127.0.0.1", gateway.port, 2)
+        try:
+            assert await first.refresh_registers(force_refresh=True)
+            assert await second.refresh_registers(force_refresh=True)
+            assert first.temperature == 21.5
+            assert second.humidity == 55.0
+
+            assert await second.set_supply_speed(2)
+            assert devices[2].supply_speed == 2
+            assert devices[1].supply_speed == 1
+            assert gateway.stats["connections"] == 1
+        finally:
+            await first.modbus.close()
+            await second.modbus.close()
+
+
+async def test_bus_timing_follows_the_baud_rate():
+    gateway = SimulatedGateway(baud_rate=9600)
+    # 18 registers: 8 + 41 byte RTU frames plus 7 silent characters.
+    assert gateway.frame_time(5, 38) == pytest.approx(56 * 11 / 9600)
+    assert SimulatedGateway(baud_rate=None).frame_time(5, 38) == 0
+
+
+@pytest.mark.parametrize(
+    "fault", [Fault.DROP, Fault.LOST_RESPONSE, Fault.EXCEPTION, Fault.HALF_OPEN]
+)
+async def test_injected_faults_fail_one_refresh(fast_bus, fault):
+    faults = FaultProfile()
+    async with SimulatedGateway(baud_rate=None, faults=faults) as gateway:
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        system.modbus.gateway.retry_count = 1
+        try:
+            # Every retry pymodbus makes on a timeout meets the fault again.
+            faults.schedule(fault, times=5)
+            assert not await system.refresh_registers(force_refresh=True)
+            assert gateway.stats[fault.value] >= 1
+
+            faults.scheduled.clear()
+            if fault is Fault.HALF_OPEN:
+                # The client reconnects after its timeout closed the socket.
+                await system.modbus.gateway.close()
+            assert await system.refresh_registers(force_refresh=True)
+        finally:
+            await system.modbus.close()
+
+
+async def test_slow_responses_hold_the_bus(fast_bus):
+    faults = FaultProfile(slow_delay=0.05)
+    async with SimulatedGateway(baud_rate=None, faults=faults) as gateway:
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        try:
+            faults.schedule(Fault.SLOW)
+            assert await system.refresh_registers(force_refresh=True)
+            assert system.modbus.gateway.telemetry.rtt.maximum >= 0.05
+        finally:
+            await system.modbus.close()
+
+
+async def test_unknown_units_answer_with_a_gateway_exception(fast_bus):
+    async with SimulatedGateway(baud_rate=None, unit_timeout=0) as gateway:
+        system = FreshAirSystem("127.0.0.1", gateway.port, 9)
+        try:
+            assert not await system.refresh_registers(force_refresh=True)
+            assert system.modbus.gateway.telemetry.exception_responses == 1
+        finally:
+            await system.modbus.close()
+
+
+@pytest.mark.parametrize("length", [0, 1])
+async def test_malformed_header_closes_the_connection(fast_bus, length):
+    async with SimulatedGateway(baud_rate=None) as gateway:
+        reader, writer = await asyncio.open_connection("127.0.0.1", gateway.port)
+        try:
+            # An MBAP length below 2 leaves no room for a function code.
+            writer.write(struct.pack(">HHHB", 1, 0, length, 1))
+            await writer.drain()
+            assert await asyncio.wait_for(reader.read(), 1) == b""
+        finally:
+            writer.close()
+        assert gateway.stats["malformed"] == 1
+
+        # The gateway keeps serving other connections.
+        system = FreshAirSystem("127.0.0.1", gateway.port)
+        try:
+            assert await system.refresh_registers(force_refresh=True)
+        finally:
+            await system.modbus.close()
@@ -13,8 +13,12 @@ from pytest_homeassistant_custom_component.common import (  # pyright: ignore[re
 )
 
 from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.fresh_air_controller import FreshAirSystem
+from custom_components.madelon_ventilation.scheduler import RequestPriority
 from custom_components.madelon_ventilation.switch import MadelonBypassSwitch
 
+from .common import patch_modbus_client
+
 
 @pytest.mark.asyncio
 async def test_switch_entities(hass):
@@ -32,9 +36,7 @@ async def test_switch_entities(hass):
     )
     entry.add_to_hass(hass)
 
-    with patch(
-        "custom_components.madelon_ventilation.fresh_air_controller.ModbusTcpClient"
-    ) as mock_modbus:
+    with patch_modbus_client() as mock_modbus:
         client = mock_modbus.return_value
         client.connect.return_value = True
         client.connected = True
@@ -87,7 +89,7 @@ async def test_switch_entities(hass):
 
 
 def _bypass_for_write_test(hass, *, is_on: bool):
-    system = MagicMock(unique_identifier="127.0.0.1:8899")
+    system = MagicMock(spec=FreshAirSystem, unique_identifier="127.0.0.1:8899")
     coordinator = MagicMock(system=system, last_update_success=False)
     coordinator.async_request_refresh = AsyncMock()
     bypass = MadelonBypassSwitch(coordinator)
@@ -100,17 +102,16 @@ def _bypass_for_write_test(hass, *, is_on: bool):
 
 @pytest.mark.asyncio
 async def test_switch_publishes_optimistic_state_before_modbus_io(hass):
-    """The requested switch state is visible before the executor completes."""
+    """The requested switch state is visible before the Modbus write completes."""
     bypass, system, coordinator = _bypass_for_write_test(hass, is_on=True)
-    system.set_bypass.return_value = True
 
-    async def execute(write):
+    async def write(state):
         assert not bypass.is_on
         bypass.async_write_ha_state.assert_called_once_with()
-        return write()
+        return True
 
-    with patch.object(hass, "async_add_executor_job", side_effect=execute):
-        await bypass.async_turn_off()
+    system.set_bypass.side_effect = write
+    await bypass.async_turn_off()
 
     coordinator.async_set_updated_data.assert_called_once_with(system)
     coordinator.async_request_refresh.assert_not_awaited()
@@ -148,7 +149,7 @@ async def test_switch_entities_created_when_initial_read_fails(hass):
         assert await hass.config_entries.async_setup(entry.entry_id)
         await hass.async_block_till_done()
 
-        mock_initial_read.assert_any_call(True)
+        mock_initial_read.assert_any_call(True, RequestPriority.POLL, None)
         assert hass.states.get("switch.fresh_air_system_auto_mode") is not None
         assert hass.states.get("switch.fresh_air_system_bypass") is not None
 
@@ -0,0 +1,142 @@
+"""Tests for Modbus bus telemetry."""
+
+# pyright: reportMissingImports=false
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from homeassistant.helpers import entity_registry as er
+from pymodbus.exceptions import ModbusIOException
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+import custom_components.madelon_ventilation.fresh_air_controller as controller_module
+from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+    ModbusClient,
+)
+from custom_components.madelon_ventilation.sensor import (
+    BUS_STATS_SENSORS,
+    FreshAirBusStatsSensor,
+)
+from custom_components.madelon_ventilation.telemetry import Histogram
+
+from .common import patch_modbus_client
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    assert histogram.summary()["mean"] is None
+
+    for seconds in (0.004, 0.004, 0.004, 0.04, 7.0):
+        histogram.record(seconds)
+
+    assert histogram.count == 5
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.8) == 0.05
+    assert histogram.quantile(0.99) == 7.0
+    summary = histogram.summary()
+    assert summary["max"] == 7.0
+    assert summary["buckets"]["le_0.005"] == 3
+    assert summary["buckets"]["inf"] == 1
+
+
+async def test_modbus_client_records_latency_and_counters():
+    clock = iter(float(tick) / 100 for tick in range(1000))
+    with (
+        patch_modbus_client() as mock_modbus,
+        patch.object(controller_module.time, "monotonic", lambda: next(clock)),
+    ):
+        transport = mock_modbus.return_value
+        error_response = MagicMock()
+        error_response.isError.return_value = True
+        transport.read_holding_registers.side_effect = [
+            MagicMock(registers=[0]),
+            error_response,
+            ModbusIOException("No response received"),
+        ]
+        client = ModbusClient("127.0.0.1")
+        client.gateway.spacing = 0
+
+        assert await client.read_registers(0, 1) is not None
+        assert await client.read_registers(0, 1) is None
+        assert await client.read_registers(0, 1) is None
+
+    stats = client.gateway.telemetry.snapshot()
+    assert stats["requests"] == 3
+    assert stats["exception_responses"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["rtt"]["count"] == 2
+    assert stats["lock_wait"]["count"] == 3
+
+
+async def test_connection_retries_and_connect_time_are_recorded():
+    with patch_modbus_client() as mock_modbus:
+        transport = mock_modbus.return_value
+        transport.connected = False
+        transport.connect.return_value = False
+        client = ModbusClient("127.0.0.1")
+        client.gateway.retry_delay = 0
+
+        assert await client.read_registers(0, 1) is None
+
+    stats = client.gateway.telemetry.snapshot()
+    assert stats["retries"] == client.gateway.retry_count - 1
+    assert stats["connect"]["count"] == client.gateway.retry_count
+    assert stats["requests"] == 0
+
+
+def test_system_stats_include_circuit_state():
+    system = FreshAirSystem("127.0.0.1")
+
+    stats = system.stats()
+
+    assert stats["circuit_state"] == "closed"
+    assert set(stats) >= {"rtt", "lock_wait", "pacing", "connect", "retries"}
+
+
+def test_bus_stats_sensor_reads_stats_snapshot():
+    system = FreshAirSystem("127.0.0.1")
+    system.modbus.gateway.telemetry.rtt.record(0.04)
+    system.modbus.gateway.telemetry.retries = 2
+    coordinator = MagicMock(system=system, last_update_success=False)
+    sensors = {
+        description.key: FreshAirBusStatsSensor(coordinator, description)
+        for description in BUS_STATS_SENSORS
+    }
+    for sensor in sensors.values():
+        sensor._update_from_snapshot()
+
+    assert sensors["rtt"].native_value == 40.0
+    assert sensors["rtt"].extra_state_attributes["max_ms"] == 40.0
+    assert sensors["retries"].native_value == 2
+    assert sensors["rtt"].available
+
+
+@pytest.mark.asyncio
+async def test_bus_stats_sensors_are_disabled_diagnostics(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": "127.0.0.1", "port": 8899, "unit_id": 1},
+        entry_id="test_entry",
+    )
+    entry.add_to_hass(hass)
+
+    with patch_modbus_client() as mock_modbus:
+        mock_modbus.return_value.read_holding_registers.return_value = MagicMock(
+            registers=[0] * 18
+        )
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        registry = er.async_get(hass)
+        entity_id = registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{DOMAIN}_127.0.0.1:8899_bus_rtt"
+        )
+        assert entity_id is not None
+        registry_entry = registry.async_get(entity_id)
+        assert registry_entry.entity_category == "diagnostic"
+        assert registry_entry.disabled_by is er.RegistryEntryDisabler.INTEGRATION
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,99 @@
+"""Tests for handing validated connections to new config entries."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from homeassistant import config_entries
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.madelon_ventilation.const import DOMAIN
+from custom_components.madelon_ventilation.fresh_air_controller import (
+    FreshAirSystem,
+)
+from custom_components.madelon_ventilation.transport_cache import (
+    CLAIM_TIMEOUT,
+    TransportCache,
+)
+
+from .common import patch_modbus_client
+
+
+async def test_setup_reuses_the_validated_connection(hass):
+    with patch_modbus_client() as mock_modbus:
+        client = mock_modbus.return_value
+        client.read_holding_registers.return_value = MagicMock(
+            registers=list(range(18))
+        )
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"next_step_id": "manual"}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"host": "127.0.0.1"}
+        )
+        await hass.async_block_till_done()
+
+        entry = result["result"]
+        system = hass.data[DOMAIN][entry.entry_id]["system"]
+        coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        # One connection, and no read beyond the validating one.
+        assert mock_modbus.call_count == 1
+        assert client.read_holding_registers.await_count == 1
+        assert coordinator.last_update_success
+        assert system.registers == list(range(18))
+        assert coordinator.snapshot_age(["temperature"]) is not None
+
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_reconfigure_hands_over_the_entry_connection(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="Fresh Air System - 127.0.0.1 (unit 3)",
+        data={"host": "127.0.0.1", "port": 502, "unit_id": 3},
+    )
+    entry.add_to_hass(hass)
+    cache = TransportCache.async_get(hass)
+    with (
+        patch_modbus_client() as mock_modbus,
+        patch.object(cache, "async_park", wraps=cache.async_park) as park,
+    ):
+        mock_modbus.return_value.read_holding_registers.return_value = MagicMock(
+            registers=list(range(18))
+        )
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        result = await entry.start_reconfigure_flow(hass)
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {})
+        await hass.async_block_till_done()
+
+        assert result["reason"] == "reconfigure_successful"
+        validated = park.call_args.args[0]
+        assert (validated.modbus.port, validated.modbus.unit_id) == (502, 3)
+        # The reloaded entry runs on the connection the flow validated.
+        assert hass.data[DOMAIN][entry.entry_id]["system"] is validated
+
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_unclaimed_connections_are_closed(hass):
+    cache = TransportCache.async_get(hass)
+    system = FreshAirSystem("127.0.0.1", unit_id=4)
+    cache.async_park(system, 0.0)
+    assert cache.async_claim("127.0.0.1", 8899, 5) is None
+
+    with patch.object(system.modbus, "close") as close:
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=CLAIM_TIMEOUT + 1)
+        )
+        await hass.async_block_till_done()
+
+    close.assert_awaited_once()
+    assert cache.async_claim("127.0.0.1", 8899, 4) is None